@@ -11,10 +11,15 @@ from googleapiclient.errors import HttpError
 import os
 import pickle
 import re
+import time
+
+# How long folder discovery results are reused before Drive is listed again
+FOLDER_CACHE_TTL = 300
 
 class DepartmentAI:
     def __init__(self):
         self.departments = ['finance', 'marketing', 'IT']
+        self._folder_cache = (0.0, None)
         self.service = self.authenticate_google_docs()
         self.drive_service = self.authenticate_google_drive()
         
@@ -63,7 +68,11 @@ class DepartmentAI:
         return build('drive', 'v3', credentials=creds)
     
     def find_department_folders(self):
-        """Find department folders in Google Drive"""
+        """Find department folders in Google Drive, memoized for FOLDER_CACHE_TTL seconds"""
+        cached_at, cached_folders = self._folder_cache
+        if cached_folders is not None and time.monotonic() - cached_at < FOLDER_CACHE_TTL:
+            return dict(cached_folders)
+        
         department_folders = {}
         
         try:
@@ -78,18 +87,20 @@ class DepartmentAI:
             
             company_reports_id = company_reports_folder[0]['id']
             
-            # Find department folders inside Company Reports
+            # Find all department folders inside Company Reports with a single query
+            name_filter = ' or '.join(f"name='{department}'" for department in self.departments)
+            query = f"'{company_reports_id}' in parents and ({name_filter}) and mimeType='application/vnd.google-apps.folder' and trashed=false"
+            results = self.drive_service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
+            
+            for folder in results.get('files', []):
+                department_folders.setdefault(folder['name'], folder['id'])
+            
             for department in self.departments:
-                query = f"'{company_reports_id}' in parents and name='{department}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-                results = self.drive_service.files().list(q=query, spaces='drive', fields='files(id, name)').execute()
-                dept_folders = results.get('files', [])
-                
-                if dept_folders:
-                    department_folders[department] = dept_folders[0]['id']
-                else:
+                if department not in department_folders:
                     print(f"Warning: '{department}' folder not found in Company Reports")
             
-            return department_folders
+            self._folder_cache = (time.monotonic(), department_folders)
+            return dict(department_folders)
             
         except HttpError as error:
             print(f"Error finding department folders: {error}")
@@ -219,9 +230,9 @@ class DepartmentAI:
     def get_available_departments(self):
         """Get list of departments that have data available"""
         available = []
+        department_folders = self.find_department_folders()
         for department in self.departments:
             try:
-                department_folders = self.find_department_folders()
                 if department in department_folders:
                     weekly_reports = self.discover_weekly_reports(department_folders[department])
                     if weekly_reports:
@@ -0,0 +1,130 @@
+# answer_cache.py
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from vector_store import HashingEmbedder
+
+STOPWORDS = {
+    'a', 'an', 'the', 'what', 'whats', 'is', 'are', 'was', 'were', 'please', 'tell', 'me', 'us', 'our',
+    'of', 'for', 'in', 'on', 'can', 'you', 'do', 'does', 'did', 'give', 'show', 'i', 'we', 'to', 'about'
+}
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[.%][0-9]+)?%?")
+NUMBER_PATTERN = re.compile(r'\d')
+
+
+def normalize_question(question):
+    """Lowercase, drop punctuation and filler words so trivial rewordings share a key"""
+    words = WORD_PATTERN.findall(question.lower().replace("'", ''))
+    return ' '.join(word for word in words if word not in STOPWORDS)
+
+
+class AnswerCache:
+    """LRU + TTL cache of answers keyed by (department, corpus version, normalized question)
+
+    A miss on the exact key falls back to the most similar cached question of
+    the same department and corpus version, accepted only above `threshold`
+    cosine similarity and only when both questions mention the same numbers,
+    so "Q3 budget" never answers "Q4 budget". Entries for an older corpus
+    version of a department are dropped as soon as a newer version is seen.
+    """
+
+    def __init__(self, embedder=None, threshold=0.95, ttl=3600, max_entries=1000):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()   # key -> (stored_at, vector, answer)
+        self._versions = {}             # department -> newest corpus version seen
+        self._lock = threading.Lock()
+
+    def _numbers(self, normalized):
+        return {word for word in normalized.split() if NUMBER_PATTERN.search(word)}
+
+    def _check_version(self, department, version):
+        """Drop a department's entries when its corpus version moves on"""
+        if self._versions.get(department) == version:
+            return
+        self._versions[department] = version
+        for key in [key for key in self._entries if key[0] == department and key[1] != version]:
+            del self._entries[key]
+            self.invalidations += 1
+
+    def _expire(self, now):
+        if self.ttl is None:
+            return
+        for key in [key for key, entry in self._entries.items() if now - entry[0] > self.ttl]:
+            del self._entries[key]
+            self.evictions += 1
+
+    def get(self, department, version, question):
+        """Return a cached answer for the question, or None"""
+        normalized = normalize_question(question)
+        with self._lock:
+            self._check_version(department, version)
+            self._expire(time.time())
+            key = (department, version, normalized)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][2]
+
+            candidates = [
+                (other, entry) for other, entry in self._entries.items()
+                if other[0] == department and other[1] == version
+                and self._numbers(other[2]) == self._numbers(normalized)
+            ]
+        if candidates:
+            vector = self.embedder.embed([normalized])[0]
+            matrix = np.stack([entry[1] for _, entry in candidates])
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                with self._lock:
+                    other = candidates[best][0]
+                    if other in self._entries:
+                        self._entries.move_to_end(other)
+                        self.hits += 1
+                        self.semantic_hits += 1
+                        return self._entries[other][2]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, department, version, question, answer):
+        """Remember an answer, evicting the least recently used entries past max_entries"""
+        normalized = normalize_question(question)
+        vector = self.embedder.embed([normalized])[0]
+        with self._lock:
+            self._check_version(department, version)
+            self._entries[(department, version, normalized)] = (time.time(), vector, answer)
+            self._entries.move_to_end((department, version, normalized))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, department=None):
+        """Forget cached answers for one department, or for all of them"""
+        with self._lock:
+            for key in [key for key in self._entries if department is None or key[0] == department]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries)
+            }
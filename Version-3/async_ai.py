@@ -0,0 +1,208 @@
+# async_ai.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ollama_pool import is_backend_error
+from single_flight import TokenBroadcast
+
+
+class AsyncDepartmentAI:
+    """Asyncio front end for DepartmentAI that serves many questions at once
+
+    Drive discovery, downloads and retrieval stay in the synchronous
+    DepartmentAI and run on a thread pool, while the LLM calls go through
+    the AsyncClient of a backend picked from the AI's Ollama pool. A
+    per-department semaphore caps how many questions about one department
+    are in flight at the same time. Identical questions share one answer
+    through the AI's question single-flight.
+    """
+
+    def __init__(self, ai, max_concurrent_per_department=4, io_workers=8):
+        self.ai = ai
+        self.max_concurrent_per_department = max_concurrent_per_department
+        self.executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='department-io')
+        self._semaphores = {}
+
+    def _semaphore(self, department):
+        if department not in self._semaphores:
+            self._semaphores[department] = asyncio.Semaphore(self.max_concurrent_per_department)
+        return self._semaphores[department]
+
+    async def run_blocking(self, function, *args):
+        """Run a blocking DepartmentAI call on the I/O executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    async def acquire_backend(self, question, tried):
+        """Wait on the I/O executor for a pool slot; raise when every backend has been tried"""
+        pool = self.ai.ollama_pool
+        backend = await self.run_blocking(pool.acquire, pool.tier_for(question), tried)
+        if backend is None:
+            raise ConnectionError(f"No Ollama backend could answer ({len(tried)} tried)")
+        tried.append(backend)
+        return backend
+
+    async def build_messages(self, department, question):
+        return await self.run_blocking(self.ai.build_messages, department, question)
+
+    async def query_ollama(self, department, question):
+        """Answer one question; Drive I/O and generation overlap with other questions
+
+        An identical question already being answered, here or by the
+        synchronous DepartmentAI, is not sent again: its answer is shared.
+        """
+        if department not in self.ai.departments:
+            return f"Error: Unknown department {department}"
+
+        version, cached = await self.run_blocking(self.ai.cached_answer, department, question)
+        if cached is not None:
+            return cached
+
+        flight = self.ai.question_flight
+        key = self.ai.question_key('answer', department, question, version)
+        future, leader = flight.begin(key, owner=asyncio.current_task())
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            answer = await self._answer(department, question, version)
+        except BaseException as e:
+            flight.end(key, future)
+            future.set_exception(e)
+            raise
+        flight.end(key, future)
+        future.set_result(answer)
+        return answer
+
+    async def _answer(self, department, question, version):
+        async with self._semaphore(department):
+            messages = await self.build_messages(department, question)
+            if isinstance(messages, str):
+                return messages
+
+            tried = []
+            while True:
+                try:
+                    backend = await self.acquire_backend(question, tried)
+                except ConnectionError as e:
+                    return f"Error in query_ollama: {e}"
+                failed = False
+                try:
+                    response = await backend.async_client.chat(model=backend.model, messages=messages,
+                                                               keep_alive=self.ai.keep_alive)
+                    answer = response['message']['content']
+                    self.ai.remember_answer(department, version, question, answer)
+                    return answer
+                except Exception as e:
+                    failed = is_backend_error(e)
+                    if not failed:
+                        return f"Error in query_ollama: {e}"
+                finally:
+                    self.ai.ollama_pool.release(backend, failed)
+
+    async def stream_ollama(self, department, question, stats=None):
+        """Async generator of answer tokens, recording TTFT and total latency in stats
+
+        As with DepartmentAI.stream_ollama, an identical question already
+        being streamed is replayed (stats['coalesced']) and a failed answer
+        sets stats['error'].
+        """
+        stats = {} if stats is None else stats
+        started = time.perf_counter()
+        if department not in self.ai.departments:
+            stats['error'] = f"Unknown department {department}"
+            yield f"Error: Unknown department {department}"
+            return
+
+        version, cached = await self.run_blocking(self.ai.cached_answer, department, question)
+        stats['cache_hit'] = cached is not None
+        if cached is not None:
+            stats['context_seconds'] = stats['ttft_seconds'] = stats['total_seconds'] = \
+                time.perf_counter() - started
+            yield cached
+            return
+
+        flight = self.ai.question_flight
+        key = self.ai.question_key('stream', department, question, version)
+        broadcast, leader = flight.begin(key, TokenBroadcast, owner=asyncio.current_task())
+        stats['coalesced'] = not leader
+        if not leader:
+            # The broadcast blocks until the next token, so wait for it on the executor
+            tokens = iter(broadcast)
+            try:
+                while True:
+                    token = await self.run_blocking(next, tokens, None)
+                    if token is None:
+                        break
+                    if 'ttft_seconds' not in stats:
+                        stats['ttft_seconds'] = time.perf_counter() - started
+                    yield token
+                if not broadcast.complete:
+                    stats['error'] = "the shared answer was interrupted"
+            finally:
+                stats['total_seconds'] = time.perf_counter() - started
+            return
+
+        complete = False
+        try:
+            async for token in self._stream_answer(department, question, version, stats, started):
+                broadcast.publish(token)
+                yield token
+            complete = not stats.get('error')
+        finally:
+            flight.end(key, broadcast)
+            broadcast.finish(complete)
+
+    async def _stream_answer(self, department, question, version, stats, started):
+        async with self._semaphore(department):
+            messages = await self.build_messages(department, question)
+            stats['context_seconds'] = time.perf_counter() - started
+            if isinstance(messages, str):
+                if messages.startswith("Error"):
+                    stats['error'] = messages
+                stats['total_seconds'] = time.perf_counter() - started
+                yield messages
+                return
+
+            tokens = []
+            tried = []
+            try:
+                while True:
+                    backend = await self.acquire_backend(question, tried)
+                    failed = False
+                    try:
+                        async for part in await backend.async_client.chat(model=backend.model, messages=messages,
+                                                                          stream=True, keep_alive=self.ai.keep_alive):
+                            stats['backend'], stats['model'] = backend.host, backend.model
+                            token = part['message']['content']
+                            if token and 'ttft_seconds' not in stats:
+                                stats['ttft_seconds'] = time.perf_counter() - started
+                            if part.get('done'):
+                                self.ai.record_final_stats(stats, part)
+                                self.ai.remember_answer(department, version, question, ''.join(tokens) + token)
+                            if token:
+                                tokens.append(token)
+                                yield token
+                        break
+                    except Exception as e:
+                        # Only move to another backend while nothing has been sent
+                        failed = is_backend_error(e)
+                        if tokens or not failed:
+                            raise
+                    finally:
+                        self.ai.ollama_pool.release(backend, failed)
+            except Exception as e:
+                stats['error'] = str(e)
+                yield f"Error in stream_ollama: {e}"
+            finally:
+                stats['total_seconds'] = time.perf_counter() - started
+
+    async def ask_many(self, questions):
+        """Answer (department, question) pairs concurrently, keeping their order"""
+        return await asyncio.gather(*(self.query_ollama(department, question) for department, question in questions))
+
+    async def get_available_departments(self):
+        return await self.run_blocking(self.ai.get_available_departments)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
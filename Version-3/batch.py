@@ -0,0 +1,161 @@
+# batch.py
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.errors import HttpError
+
+from index import DepartmentAI
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def question_id(department, question):
+    """Stable id for a question without one, so reruns can recognise it"""
+    return hashlib.sha1(json.dumps([department, question]).encode('utf-8')).hexdigest()[:12]
+
+
+def read_questions(path, departments):
+    """Read {"department", "question", "id"?} lines; department may be a name, a list or "all" """
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            department = item['department']
+            if department == 'all':
+                department = list(departments)
+            elif isinstance(department, list) and len(department) == 1:
+                department = department[0]
+            unknown = [name for name in ([department] if isinstance(department, str) else department)
+                       if name not in departments]
+            if unknown:
+                raise ValueError(f"Line {line_number}: unknown department {', '.join(unknown)}")
+            questions.append({
+                'id': str(item.get('id') or question_id(department, item['question'])),
+                'department': department,
+                'question': item['question']
+            })
+    return questions
+
+
+def completed_ids(output_path):
+    """Ids already answered in an earlier, possibly interrupted, run"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by the interruption
+            if not result.get('error'):
+                done.add(result['id'])
+    return done
+
+
+def department_label(department):
+    return department if isinstance(department, str) else '+'.join(department)
+
+
+def run_batch(ai, questions, output_path, concurrency=4):
+    """Answer questions with `concurrency` LLM calls in flight, appending results to output_path
+
+    Each department's reports are ingested once before any question is
+    asked, so concurrent questions share one context load instead of racing
+    to download the same files. Every answer is flushed as soon as it is
+    complete, and questions already in output_path are skipped.
+    Returns per-department latency statistics.
+    """
+    done = completed_ids(output_path)
+    pending = [item for item in questions if item['id'] not in done]
+    print(f"📋 {len(questions)} questions, {len(done)} already answered, {len(pending)} to go")
+
+    departments = sorted({
+        name for item in pending
+        for name in ([item['department']] if isinstance(item['department'], str) else item['department'])
+    })
+    for department in departments:
+        started = time.perf_counter()
+        ai.ingest_department(department)
+        print(f"📚 Loaded {department} context in {time.perf_counter() - started:.2f}s")
+
+    latencies = {}
+    write_lock = threading.Lock()
+
+    def answer(item):
+        stats = {}
+        text = ''.join(ai.stream_ollama(item['department'], item['question'], stats))
+        # A stream that breaks after its first token still ends in an error
+        failed = bool(stats.get('error'))
+        result = dict(item, answer=text, stats=stats, error=failed)
+        with write_lock:
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            if not failed:
+                latencies.setdefault(department_label(item['department']), []).append(stats['total_seconds'])
+        return failed
+
+    started = time.perf_counter()
+    with open(output_path, 'a', encoding='utf-8') as output, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch-question') as pool:
+        failures = sum(pool.map(answer, pending))
+    elapsed = time.perf_counter() - started
+
+    summary = {
+        department: {
+            'answered': len(values),
+            'p50_seconds': percentile(values, 0.5),
+            'p95_seconds': percentile(values, 0.95)
+        }
+        for department, values in sorted(latencies.items())
+    }
+    print(f"\n📊 Answered {len(pending) - failures}/{len(pending)} questions in {elapsed:.2f}s "
+          f"({failures} failed)")
+    for department, row in summary.items():
+        print(f"   {department:20s} {row['answered']:4d} answers  p50 {row['p50_seconds']:.2f}s  "
+              f"p95 {row['p95_seconds']:.2f}s")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Answer a JSONL file of department questions without the REPL')
+    parser.add_argument('questions', help='JSONL with one {"department", "question", "id"} per line')
+    parser.add_argument('--output', default='answers.jsonl', help='JSONL answers; reruns resume from it')
+    parser.add_argument('--concurrency', type=int, default=4, help='LLM calls in flight')
+    parser.add_argument('--ollama-host', default=None)
+    parser.add_argument('--ollama-backend', action='append', default=None, metavar='HOST[=MODEL][*MAX][@TIER]',
+                        help='add an Ollama backend to the pool; repeat for several, tier is small or large')
+    parser.add_argument('--quiet', action='store_true', help='no per-file progress lines')
+    parser.add_argument('--telemetry-log', default=None, help='append one JSON line per timed span')
+    args = parser.parse_args()
+
+    ai = DepartmentAI(ollama_host=args.ollama_host, quiet=args.quiet, telemetry_log=args.telemetry_log,
+                      ollama_backends=args.ollama_backend)
+    if not ai.drive_service:
+        print("❌ Failed to initialize Google Drive service")
+        return
+
+    try:
+        ai.start_drive_sync()
+    except HttpError as error:
+        print(f"⚠️ Drive sync unavailable, falling back to folder scans: {error}")
+        ai.drive_sync = None
+
+    questions = read_questions(args.questions, ai.departments)
+    run_batch(ai, questions, args.output, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
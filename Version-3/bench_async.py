@@ -0,0 +1,72 @@
+# bench_async.py
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from async_ai import AsyncDepartmentAI
+from fake_drive import build_synthetic_drive
+from index import DepartmentAI
+from stub_ollama import StubOllamaServer
+
+
+def make_questions(departments, count):
+    topics = ['key metrics', 'open actions', 'project progress', 'weekly summary']
+    return [(departments[i % len(departments)], f'What were the {topics[i % len(topics)]} in week {i % 12 + 1}?')
+            for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare sync and async DepartmentAI throughput')
+    parser.add_argument('--clients', type=int, default=16, help='simultaneous async clients')
+    parser.add_argument('--questions', type=int, default=32)
+    parser.add_argument('--tokens-per-second', type=float, default=100.0)
+    parser.add_argument('--parallel', type=int, default=8, help='stub Ollama parallel slots')
+    parser.add_argument('--drive-latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    stub = StubOllamaServer(tokens_per_second=args.tokens_per_second, parallel=args.parallel)
+    host = stub.start()
+    drive = build_synthetic_drive(latency=args.drive_latency)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ai = DepartmentAI(drive_service=drive, ollama_host=host, embedding_model=None,
+                          cache_path=':memory:', vector_store_dir=None, manifest_path=None, answer_cache_size=0)
+        ai.start_drive_sync(interval=3600)
+        for department in ai.departments:
+            ai.ingest_department(department)
+
+    questions = make_questions(ai.departments, args.questions)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        for department, question in questions:
+            ai.query_ollama(department, question)
+        sync_elapsed = time.perf_counter() - started
+
+    async def run_async():
+        async_ai = AsyncDepartmentAI(ai, max_concurrent_per_department=args.clients)
+        limit = asyncio.Semaphore(args.clients)
+
+        async def client(department, question):
+            async with limit:
+                return await async_ai.query_ollama(department, question)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(d, q) for d, q in questions))
+        async_ai.close()
+        return time.perf_counter() - started
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        async_elapsed = asyncio.run(run_async())
+
+    stub.stop()
+    print(f"📊 {len(questions)} questions, {args.clients} async clients, stub at {args.tokens_per_second:g} tok/s")
+    print(f"   sync : {sync_elapsed:6.2f}s  {len(questions) / sync_elapsed:6.2f} q/s")
+    print(f"   async: {async_elapsed:6.2f}s  {len(questions) / async_elapsed:6.2f} q/s")
+    print(f"   speedup: {sync_elapsed / async_elapsed:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# bench_docx.py
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+from docx_text import extract_docx_text
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+
+def write_synthetic_docx(path, target_mb=50):
+    """Write a .docx whose document.xml is about target_mb with paragraphs and tables"""
+    paragraph = '<w:p><w:r><w:t>{}</w:t></w:r><w:r><w:tab/><w:t xml:space="preserve"> {}</w:t></w:r></w:p>'
+    row = '<w:tr>' + '<w:tc><w:p><w:r><w:t>{}</w:t></w:r></w:p></w:tc>' * 3 + '</w:tr>'
+    target = target_mb * 1024 * 1024
+
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr('[Content_Types].xml', '<?xml version="1.0"?><Types/>')
+        docx.writestr('word/header1.xml', f'<w:hdr xmlns:w="{W_NS}"><w:p><w:r><w:t>Company Reports</w:t></w:r></w:p></w:hdr>')
+        docx.writestr('word/footer1.xml', f'<w:ftr xmlns:w="{W_NS}"><w:p><w:r><w:t>Confidential</w:t></w:r></w:p></w:ftr>')
+        with docx.open('word/document.xml', 'w', force_zip64=True) as stream:
+            stream.write(f'<?xml version="1.0"?><w:document xmlns:w="{W_NS}"><w:body>'.encode('utf-8'))
+            written, block = 0, 0
+            while written < target:
+                pieces = [paragraph.format(f'Week {block % 52 + 1} item {block}', escape('Server Uptime: 99.95% & stable'))
+                          for _ in range(50)]
+                pieces.append('<w:tbl>' + ''.join(row.format('Metric', block, f'{block % 97}%') for _ in range(10)) + '</w:tbl>')
+                data = ''.join(pieces).encode('utf-8')
+                stream.write(data)
+                written += len(data)
+                block += 1
+            stream.write(b'</w:body></w:document>')
+
+
+def legacy_extract(path):
+    """The previous extractor: read the whole part, build the full tree, join every w:t"""
+    with zipfile.ZipFile(path) as docx:
+        root = ET.fromstring(docx.read('word/document.xml'))
+        return ''.join(elem.text for elem in root.findall('.//w:t', {'w': W_NS}) if elem.text).strip()
+
+
+def streaming_extract(path):
+    return extract_docx_text(path)
+
+
+def _measure(name, path, queue):
+    function = {'legacy': legacy_extract, 'streaming': streaming_extract}[name]
+    started = time.perf_counter()
+    text = function(path)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, peak_kb / 1024, len(text), text.count('\n')))
+
+
+def measure(name, path):
+    """Run one extractor in a fresh process so its peak RSS is its own"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(name, path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare legacy and streaming .docx extraction')
+    parser.add_argument('--size-mb', type=int, default=50, help='uncompressed document.xml size')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'synthetic.docx')
+        write_synthetic_docx(path, args.size_mb)
+        print(f"📄 {args.size_mb} MB document.xml ({os.path.getsize(path) / 1e6:.1f} MB zipped)")
+        for name in ('legacy', 'streaming'):
+            elapsed, peak_mb, chars, lines = measure(name, path)
+            print(f"   {name:9s}: {elapsed:6.2f}s  peak RSS {peak_mb:7.1f} MB  {chars:,} chars  {lines:,} line breaks")
+
+
+if __name__ == '__main__':
+    main()
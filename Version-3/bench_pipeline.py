@@ -0,0 +1,147 @@
+# bench_pipeline.py
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+from batch import percentile
+from bench_async import make_questions
+from fake_drive import build_synthetic_drive
+from index import DepartmentAI
+from stub_ollama import StubOllamaServer
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def make_ai(drive, ollama_host, cache_path):
+    return DepartmentAI(drive_service=drive, ollama_host=ollama_host, cache_path=cache_path, manifest_path=None,
+                        vector_store_dir=None, embedding_model=None, answer_cache_size=0)
+
+
+def measure_discovery(ai, drive):
+    """Time finding every department's reports and count the listing calls"""
+    drive.reset_calls()
+    started = time.perf_counter()
+    reports = {department: ai.get_department_reports(department) or {} for department in ai.departments}
+    return {
+        'seconds': time.perf_counter() - started,
+        'files': sum(len(found) for found in reports.values()),
+        'api_calls': dict(drive.calls),
+        'total_api_calls': drive.total_calls()
+    }
+
+
+def measure_load(ai, drive):
+    """Time ingesting every department and report extraction throughput"""
+    drive.reset_calls()
+    started = time.perf_counter()
+    for department in ai.departments:
+        ai.ingest_department(department)
+    elapsed = time.perf_counter() - started
+    chars = sum(len(chunk['text']) for chunks in ai.retrieval_index.chunks.values() for chunk in chunks.values())
+    reports = sum(len(reports) for reports in ai.retrieval_index.reports.values())
+    return {
+        'seconds': elapsed,
+        'reports': reports,
+        'reports_per_second': reports / elapsed if elapsed else None,
+        'chunk_chars_per_second': chars / elapsed if elapsed else None,
+        'api_calls': dict(drive.calls),
+        'total_api_calls': drive.total_calls(),
+        'content_cache': ai.content_cache.stats()
+    }
+
+
+def measure_queries(ai, questions):
+    """Ask each question in turn and collect prompt size, TTFT and latency"""
+    runs = []
+    for department, question in questions:
+        stats = {}
+        ''.join(ai.stream_ollama(department, question, stats))
+        runs.append(stats)
+
+    def summary(key):
+        values = [run[key] for run in runs if run.get(key) is not None]
+        return {'p50': percentile(values, 0.5), 'p95': percentile(values, 0.95), 'max': max(values, default=0.0)}
+
+    return {
+        'questions': len(runs),
+        'prompt_tokens': summary('prompt_tokens'),
+        'prefill_seconds': summary('prefill_seconds'),
+        'context_seconds': summary('context_seconds'),
+        'ttft_seconds': summary('ttft_seconds'),
+        'total_seconds': summary('total_seconds')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end DepartmentAI benchmark on a fake Drive and stub Ollama')
+    parser.add_argument('--reports', type=int, default=24, help='reports per department')
+    parser.add_argument('--paragraphs', type=int, default=40, help='filler paragraphs per report')
+    parser.add_argument('--formats', default='txt,gdoc,docx', help='comma list of txt, gdoc, docx, pdf')
+    parser.add_argument('--latency', type=float, default=0.02, help='simulated Drive latency per call (s)')
+    parser.add_argument('--tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--prefill-tokens-per-second', type=float, default=2000.0)
+    parser.add_argument('--questions', type=int, default=12)
+    parser.add_argument('--output', default='bench_results.json')
+    args = parser.parse_args()
+
+    stub = StubOllamaServer(tokens_per_second=args.tokens_per_second,
+                            prefill_tokens_per_second=args.prefill_tokens_per_second)
+    ollama_host = stub.start()
+    drive = build_synthetic_drive(reports_per_department=args.reports, paragraphs=args.paragraphs,
+                                  latency=args.latency, formats=tuple(args.formats.split(',')))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        cache_path = os.path.join(directory, 'bench_cache.db')
+
+        cold = make_ai(drive, ollama_host, cache_path)
+        results['discovery'] = measure_discovery(cold, drive)
+        results['cold_load'] = measure_load(cold, drive)
+        results['queries'] = measure_queries(cold, make_questions(cold.departments, args.questions))
+        cold.content_cache.close()
+
+        # A fresh process would start like this: empty indexes, warm content cache
+        warm = make_ai(drive, ollama_host, cache_path)
+        results['warm_load'] = measure_load(warm, drive)
+        warm.content_cache.close()
+
+    stub.stop()
+
+    report = {
+        'version': os.path.basename(os.path.dirname(os.path.abspath(__file__))),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'config': vars(args),
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    queries = results['queries']
+    print(f"🔍 Discovery: {results['discovery']['files']} files, {results['discovery']['total_api_calls']} API calls "
+          f"in {results['discovery']['seconds']:.2f}s")
+    for phase in ('cold_load', 'warm_load'):
+        load = results[phase]
+        print(f"📦 {phase.replace('_', ' ').capitalize()}: {load['reports']} reports in {load['seconds']:.2f}s "
+              f"({load['reports_per_second']:.1f}/s, {load['total_api_calls']} API calls)")
+    print(f"💬 {queries['questions']} questions: prompt p50 {queries['prompt_tokens']['p50']:.0f} tokens, "
+          f"TTFT p50 {queries['ttft_seconds']['p50']:.2f}s, total p50 {queries['total_seconds']['p50']:.2f}s "
+          f"p95 {queries['total_seconds']['p95']:.2f}s")
+    print(f"📝 Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
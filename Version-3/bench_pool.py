@@ -0,0 +1,90 @@
+# bench_pool.py
+import argparse
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch import percentile
+from bench_async import make_questions
+from fake_drive import build_synthetic_drive
+from index import DepartmentAI
+from stub_ollama import StubOllamaServer
+
+
+def run(ai, questions, clients):
+    """Stream every question with `clients` in flight; return (elapsed, [stats])"""
+    def ask(item):
+        stats = {}
+        ''.join(ai.stream_ollama(item[0], item[1], stats))
+        return stats
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(ask, questions))
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare one Ollama backend with a routed pool of stub backends')
+    parser.add_argument('--backends', type=int, default=3, help='large-model stub backends in the pool')
+    parser.add_argument('--small-backends', type=int, default=1, help='small-model stub backends for short lookups')
+    parser.add_argument('--parallel', type=int, default=2, help='parallel slots per stub backend')
+    parser.add_argument('--clients', type=int, default=12)
+    parser.add_argument('--questions', type=int, default=36)
+    parser.add_argument('--tokens-per-second', type=float, default=50.0, help='large model speed')
+    parser.add_argument('--small-tokens-per-second', type=float, default=150.0)
+    parser.add_argument('--kill-one', action='store_true', help='stop one large backend halfway through')
+    args = parser.parse_args()
+
+    large = [StubOllamaServer(tokens_per_second=args.tokens_per_second, parallel=args.parallel)
+             for _ in range(args.backends)]
+    small = [StubOllamaServer(tokens_per_second=args.small_tokens_per_second, parallel=args.parallel,
+                              model='llama3.2:3b')
+             for _ in range(args.small_backends)]
+    for stub in large + small:
+        stub.start()
+    drive = build_synthetic_drive()
+
+    specs = [f"{stub.url}=llama3.1:8b*{args.parallel}@large" for stub in large]
+    specs += [f"{stub.url}=llama3.2:3b*{args.parallel}@small" for stub in small]
+    questions = make_questions(['finance', 'marketing', 'IT'], args.questions)
+    questions = [(department, question if i % 2 else f"Why did the {question[9:].rstrip('?')} change and what "
+                                                      f"should we do about it?")
+                 for i, (department, question) in enumerate(questions)]
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for label, options in (('single', {'ollama_host': large[0].url}), ('pool', {'ollama_backends': specs})):
+            ai = DepartmentAI(drive_service=drive, embedding_model=None, cache_path=':memory:', vector_store_dir=None,
+                              manifest_path=None, answer_cache_size=0, quiet=True,
+                              ollama_max_concurrent=args.parallel, **options)
+            for department in ai.departments:
+                ai.ingest_department(department)
+            if label == 'pool':
+                ai.ollama_pool.check_health()
+                if args.kill_one:
+                    ThreadPoolExecutor(max_workers=1).submit(
+                        lambda: (time.sleep(1.0), large[0].stop()))
+            results[label] = run(ai, questions, args.clients) + (ai.ollama_pool.stats(),)
+
+    for stub in large[1:] + small:
+        stub.stop()
+    if not args.kill_one:
+        large[0].stop()
+
+    print(f"📊 {len(questions)} questions, {args.clients} clients, {args.parallel} slots per backend")
+    for label, (elapsed, runs, backends) in results.items():
+        totals = [run['total_seconds'] for run in runs]
+        # Coalesced followers share the leader's answer, so they have no backend of their own
+        errors = sum(1 for run in runs if run.get('error') or ('backend' not in run and not run.get('coalesced')))
+        coalesced = sum(1 for run in runs if run.get('coalesced'))
+        print(f"   {label:6s}: {elapsed:6.2f}s  {len(runs) / elapsed:5.2f} q/s  p50 {percentile(totals, 0.5):.2f}s  "
+              f"p95 {percentile(totals, 0.95):.2f}s  {coalesced} coalesced  {errors} errors")
+        for backend in backends:
+            print(f"      {backend['host']} {backend['model']:12s} {backend['tier']:5s} {backend['requests']:3d} requests "
+                  f"{backend['failures']} failures {'healthy' if backend['healthy'] else 'DOWN'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# bench_server.py
+import argparse
+import contextlib
+import io
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from batch import percentile
+from bench_async import make_questions
+from fake_drive import build_synthetic_drive
+from index import DepartmentAI
+from server import DepartmentServer
+from stub_ollama import StubOllamaServer
+
+
+def ask(url, department, question, stream):
+    """POST one question and return (latency, time to first token)"""
+    body = json.dumps({'department': department, 'question': question, 'stream': stream}).encode('utf-8')
+    request = urllib.request.Request(f'{url}/ask', data=body, headers={'Content-Type': 'application/json'})
+    started = time.perf_counter()
+    first_token = None
+    with urllib.request.urlopen(request, timeout=300) as response:
+        if not stream:
+            json.loads(response.read())
+        else:
+            for line in response:
+                if first_token is None and line.startswith(b'event: token'):
+                    first_token = time.perf_counter() - started
+    return time.perf_counter() - started, first_token
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the HTTP server against a fake Drive and stub Ollama')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--tokens-per-second', type=float, default=100.0)
+    parser.add_argument('--parallel', type=int, default=8, help='stub Ollama parallel slots')
+    parser.add_argument('--stream', action='store_true', help='use the SSE endpoint')
+    args = parser.parse_args()
+
+    stub = StubOllamaServer(tokens_per_second=args.tokens_per_second, parallel=args.parallel)
+    ollama_host = stub.start()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ai = DepartmentAI(drive_service=build_synthetic_drive(latency=0.02), ollama_host=ollama_host,
+                          embedding_model=None, cache_path=':memory:', vector_store_dir=None, manifest_path=None)
+        server = DepartmentServer(ai, port=0, max_concurrent_per_department=args.clients)
+        server.warm_up(sync_interval=3600)
+        url = server.start()
+
+        questions = make_questions(ai.departments, args.requests)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            results = list(pool.map(lambda q: ask(url, q[0], q[1], args.stream), questions))
+        elapsed = time.perf_counter() - started
+
+    server.stop()
+    stub.stop()
+
+    latencies = [latency for latency, _ in results]
+    print(f"📊 {len(results)} requests from {args.clients} clients in {elapsed:.2f}s "
+          f"({len(results) / elapsed:.2f} req/s)")
+    print(f"   latency p50 {percentile(latencies, 0.5):.2f}s  p95 {percentile(latencies, 0.95):.2f}s")
+    if args.stream:
+        ttfts = [ttft for _, ttft in results if ttft is not None]
+        print(f"   TTFT    p50 {percentile(ttfts, 0.5):.2f}s  p95 {percentile(ttfts, 0.95):.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# bm25.py
+import math
+import threading
+from collections import Counter
+
+import numpy as np
+
+from retrieval import tokenize
+
+
+def analyze(text):
+    """BM25 terms: whole tokens plus their parts, so 'Week-12' also matches 'week 12'"""
+    terms = []
+    for token in tokenize(text):
+        terms.append(token)
+        if any(sep in token for sep in '-/:'):
+            terms.extend(part for part in token.replace('/', '-').replace(':', '-').split('-') if part)
+        if ',' in token and token.replace(',', '').replace('.', '').isdigit():
+            terms.append(token.replace(',', ''))
+    return terms
+
+
+class BM25Partition:
+    """Inverted index for one department with NumPy scoring"""
+
+    def __init__(self):
+        self.postings = {}        # term -> {doc_id: term frequency}
+        self.doc_keys = {}        # doc_id -> caller's key
+        self.doc_terms = {}       # doc_id -> Counter of terms
+        self.file_docs = {}       # file_id -> [doc_id]
+        self.lengths = np.zeros(64, dtype=np.float32)
+        self.total_length = 0
+        self.next_doc = 0
+        self._arrays = {}         # term -> (doc ids, term frequencies), rebuilt lazily
+
+    def add(self, file_id, key, text):
+        terms = Counter(analyze(text))
+        doc_id = self.next_doc
+        self.next_doc += 1
+        if doc_id >= len(self.lengths):
+            self.lengths = np.concatenate([self.lengths, np.zeros(len(self.lengths), dtype=np.float32)])
+
+        length = sum(terms.values())
+        self.lengths[doc_id] = length
+        self.total_length += length
+        self.doc_keys[doc_id] = key
+        self.doc_terms[doc_id] = terms
+        self.file_docs.setdefault(file_id, []).append(doc_id)
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+            self._arrays.pop(term, None)
+
+    def remove_file(self, file_id):
+        doc_ids = self.file_docs.pop(file_id, [])
+        for doc_id in doc_ids:
+            for term in self.doc_terms.pop(doc_id):
+                postings = self.postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self.postings[term]
+                self._arrays.pop(term, None)
+            self.total_length -= self.lengths[doc_id]
+            self.lengths[doc_id] = 0
+            del self.doc_keys[doc_id]
+        return len(doc_ids)
+
+    def _term_arrays(self, term):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self.postings[term]
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            )
+            self._arrays[term] = arrays
+        return arrays
+
+    def scores(self, query, k1, b):
+        """Return (doc ids, scores) for every document matching any query term"""
+        doc_count = len(self.doc_keys)
+        if not doc_count:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        avg_length = self.total_length / doc_count
+        scores = np.zeros(self.next_doc, dtype=np.float32)
+        for term in set(analyze(query)):
+            if term not in self.postings:
+                continue
+            doc_ids, tfs = self._term_arrays(term)
+            df = len(doc_ids)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            norm = k1 * (1 - b + b * self.lengths[doc_ids] / avg_length)
+            scores[doc_ids] += idf * tfs * (k1 + 1) / (tfs + norm)
+
+        matched = np.flatnonzero(scores)
+        return matched, scores[matched]
+
+
+class BM25Index:
+    """Per-department BM25 index over report text, updated incrementally"""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.partitions = {}
+        self._lock = threading.RLock()
+
+    def add_document(self, department, file_id, key, text):
+        """Index one document (a report or a chunk of one) under a caller-chosen key"""
+        with self._lock:
+            self.partitions.setdefault(department, BM25Partition()).add(file_id, key, text)
+
+    def add_report(self, department, file_id, text):
+        """Index a whole report, replacing any earlier version of the file"""
+        with self._lock:
+            self.remove_file(department, file_id)
+            self.add_document(department, file_id, file_id, text)
+
+    def remove_file(self, department, file_id):
+        """Drop every document that came from a file"""
+        with self._lock:
+            partition = self.partitions.get(department)
+            return partition.remove_file(file_id) if partition else 0
+
+    def search(self, department, query, top_k=8):
+        """Return the top_k (score, key) pairs for a query"""
+        with self._lock:
+            partition = self.partitions.get(department)
+            if partition is None:
+                return []
+            doc_ids, scores = partition.scores(query, self.k1, self.b)
+            if not len(doc_ids):
+                return []
+            k = min(top_k, len(doc_ids))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(float(scores[i]), partition.doc_keys[int(doc_ids[i])]) for i in top]
+
@@ -0,0 +1,153 @@
+# content_cache.py
+import sqlite3
+import threading
+import time
+import zlib
+
+
+# Bump whenever text extraction changes, so text, pages, chunks and summaries
+# cached by an older extractor are rebuilt instead of served
+EXTRACTOR_VERSION = 3
+
+
+def report_version(report_info):
+    """Build the cache version string for a Drive file from its metadata and the extractor version"""
+    return f"x{EXTRACTOR_VERSION}|{report_info.get('modifiedTime', '')}|{report_info.get('md5Checksum', '')}"
+
+
+class ContentCache:
+    """On-disk cache of extracted report text keyed by Drive file id and version"""
+
+    def __init__(self, path='department_cache.db', max_bytes=256 * 1024 * 1024, max_entries=5000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS documents (
+                file_id TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                name TEXT,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_access ON documents(last_access)")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                file_id TEXT NOT NULL,
+                version TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (file_id, page)
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, file_id, version):
+        """Return cached text for a file, or None if missing or out of date"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, content FROM documents WHERE file_id=?", (file_id,)
+            ).fetchone()
+
+            if row is None or row[0] != version:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE documents SET last_access=? WHERE file_id=?", (time.time(), file_id)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return zlib.decompress(row[1]).decode('utf-8')
+
+    def put(self, file_id, version, name, text):
+        """Store extracted text for a file, then evict least recently used entries"""
+        blob = zlib.compress(text.encode('utf-8'))
+        if len(blob) > self.max_bytes:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (file_id, version, name, content, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (file_id, version, name, blob, len(blob), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def get_pages(self, file_id, version):
+        """Return {page_index: text} for the pages of a file cached at this version"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page, content FROM pages WHERE file_id=? AND version=?", (file_id, version)
+            ).fetchall()
+        return {page: zlib.decompress(blob).decode('utf-8') for page, blob in rows}
+
+    def put_pages(self, file_id, version, pages):
+        """Store {page_index: text} for a file, dropping pages cached for older versions"""
+        rows = []
+        for page, text in pages.items():
+            blob = zlib.compress(text.encode('utf-8'))
+            rows.append((file_id, version, page, blob, len(blob)))
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE file_id=? AND version!=?", (file_id, version))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (file_id, version, page, content, size) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def remove(self, file_id):
+        """Drop a file from the cache"""
+        with self._lock:
+            self._conn.execute("DELETE FROM documents WHERE file_id=?", (file_id,))
+            self._conn.execute("DELETE FROM pages WHERE file_id=?", (file_id,))
+            self._conn.commit()
+
+    def _evict(self):
+        """Delete least recently used rows until size and entry limits are met"""
+        total_size, total_entries = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM documents"
+        ).fetchone()
+
+        if total_size <= self.max_bytes and total_entries <= self.max_entries:
+            return
+
+        rows = self._conn.execute(
+            "SELECT file_id, size FROM documents ORDER BY last_access ASC"
+        ).fetchall()
+
+        for file_id, size in rows:
+            if total_size <= self.max_bytes and total_entries <= self.max_entries:
+                break
+            self._conn.execute("DELETE FROM documents WHERE file_id=?", (file_id,))
+            self._conn.execute("DELETE FROM pages WHERE file_id=?", (file_id,))
+            total_size -= size
+            total_entries -= 1
+            self.evictions += 1
+
+    def stats(self):
+        """Return cache counters and current size"""
+        with self._lock:
+            total_size, total_entries = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM documents"
+            ).fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': total_entries,
+            'bytes': total_size
+        }
+
+    def close(self):
+        """Close the underlying database"""
+        with self._lock:
+            self._conn.close()
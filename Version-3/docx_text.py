@@ -0,0 +1,127 @@
+# docx_text.py
+import io
+import re
+import zipfile
+from xml.parsers import expat
+
+W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main '
+W_T, W_TAB, W_BR, W_CR, W_P, W_R, W_TC, W_TR = (W + tag for tag in ('t', 'tab', 'br', 'cr', 'p', 'r', 'tc', 'tr'))
+
+HEADER_PART = re.compile(r'^word/header\d*\.xml$')
+FOOTER_PART = re.compile(r'^word/footer\d*\.xml$')
+
+READ_SIZE = 1024 * 1024
+
+
+class _PartReader:
+    """Expat callbacks that turn WordprocessingML into lines of text
+
+    Paragraphs become lines and table rows become tab-separated lines.
+    No element tree is built, so memory stays flat however large the part is.
+    """
+
+    def __init__(self):
+        self.lines = []
+        self.parts = []     # text runs of the current paragraph
+        self.cells = []     # stack: paragraphs of each open table cell
+        self.rows = []      # stack: cells of each open table row
+        self.in_text = False
+        self.runs = 0       # depth of open w:r elements; w:tab outside a run is a tab stop definition
+
+    def start(self, name, attrs):
+        if name == W_T:
+            self.in_text = True
+        elif name == W_R:
+            self.runs += 1
+        elif name == W_TAB and self.runs:
+            self.parts.append('\t')
+        elif name in (W_BR, W_CR) and self.runs:
+            self.parts.append('\n')
+        elif name == W_TC:
+            self.cells.append([])
+        elif name == W_TR:
+            self.rows.append([])
+
+    def end(self, name):
+        if name == W_T:
+            self.in_text = False
+        elif name == W_R:
+            self.runs -= 1
+        elif name == W_P:
+            paragraph = ''.join(self.parts)
+            self.parts = []
+            if self.cells:
+                self.cells[-1].append(paragraph)
+            elif paragraph.strip():
+                self.lines.append(paragraph)
+        elif name == W_TC:
+            cell = ' '.join(p.strip() for p in self.cells.pop() if p.strip())
+            if self.rows:
+                self.rows[-1].append(cell)
+        elif name == W_TR:
+            line = '\t'.join(self.rows.pop())
+            if self.cells:
+                # Nested table: the row becomes a paragraph of the outer cell
+                self.cells[-1].append(line)
+            elif line.strip():
+                self.lines.append(line)
+
+    def text(self, data):
+        if self.in_text:
+            self.parts.append(data)
+
+
+def iter_part_lines(stream, read_size=READ_SIZE):
+    """Stream one WordprocessingML part and yield its text line by line"""
+    reader = _PartReader()
+    parser = expat.ParserCreate(namespace_separator=' ')
+    parser.buffer_text = True
+    parser.StartElementHandler = reader.start
+    parser.EndElementHandler = reader.end
+    parser.CharacterDataHandler = reader.text
+
+    while True:
+        chunk = stream.read(read_size)
+        parser.Parse(chunk, not chunk)
+        if reader.lines:
+            yield from reader.lines
+            reader.lines = []
+        if not chunk:
+            break
+
+
+def extract_docx_text(source):
+    """Extract text from a .docx given as bytes, a path or a seekable file object
+
+    Headers come first, then the body, then footers; repeated headers and
+    footers from multiple sections are included once.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+
+    with zipfile.ZipFile(source) as docx:
+        names = docx.namelist()
+        if 'word/document.xml' not in names:
+            raise ValueError("Could not find document content in .docx file")
+
+        def part_text(name):
+            with docx.open(name) as stream:
+                return '\n'.join(iter_part_lines(stream))
+
+        headers = _unique(part_text(name) for name in sorted(names) if HEADER_PART.match(name))
+        footers = _unique(part_text(name) for name in sorted(names) if FOOTER_PART.match(name))
+
+        sections = headers
+        sections.append(part_text('word/document.xml'))
+        sections.extend(footers)
+
+    return '\n'.join(section for section in sections if section.strip()).strip()
+
+
+def _unique(texts):
+    seen, result = set(), []
+    for text in texts:
+        if text.strip() and text not in seen:
+            seen.add(text)
+            result.append(text)
+    return result
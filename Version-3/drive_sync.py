@@ -0,0 +1,262 @@
+# drive_sync.py
+import json
+import os
+import threading
+import time
+
+FOLDER_MIME = 'application/vnd.google-apps.folder'
+
+SUPPORTED_MIME_TYPES = [
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',  # .docx
+    'application/vnd.google-apps.document',  # Google Docs
+    'application/pdf',  # PDF files
+    'text/plain'  # Text files
+]
+
+FILE_FIELDS = 'id, name, mimeType, parents, trashed, modifiedTime, md5Checksum, size'
+
+# Drive's largest allowed page size for files.list and changes.list
+MAX_PAGE_SIZE = 1000
+
+
+def supported_mime_filter():
+    """Server-side Drive query clause matching only supported report types"""
+    return '(' + ' or '.join(f"mimeType='{mime_type}'" for mime_type in SUPPORTED_MIME_TYPES) + ')'
+
+
+def iter_files(drive_service, query, fields=FILE_FIELDS, page_size=MAX_PAGE_SIZE):
+    """Yield every file matching a query one page at a time, following nextPageToken"""
+    page_token = None
+    while True:
+        results = drive_service.files().list(
+            q=query,
+            spaces='drive',
+            fields=f'nextPageToken, files({fields})',
+            pageSize=page_size,
+            pageToken=page_token
+        ).execute()
+        for file in results.get('files', []):
+            yield file
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+
+
+class DriveSync:
+    """Keeps a local manifest of department folders and reports up to date
+
+    The first sync lists "Company Reports" and every department folder once
+    and records a Changes API startPageToken. Every later sync only reads
+    changes.list from that token, so answering questions from the manifest
+    needs no listing calls at all.
+    """
+
+    def __init__(self, drive_service, departments, manifest_path='drive_manifest.json', root_name='Company Reports'):
+        self.drive_service = drive_service
+        self.departments = departments
+        self.manifest_path = manifest_path
+        self.root_name = root_name
+        self.last_sync = None
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.manifest = self._load_manifest()
+
+    def _empty_manifest(self):
+        return {'start_page_token': None, 'root_id': None, 'folders': {}, 'files': {}}
+
+    def _load_manifest(self):
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return self._empty_manifest()
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('root_name', self.root_name) != self.root_name:
+                return self._empty_manifest()
+            return manifest
+        except (OSError, ValueError):
+            return self._empty_manifest()
+
+    def _save_manifest(self):
+        if not self.manifest_path:
+            return
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(self.manifest, root_name=self.root_name), f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def full_scan(self):
+        """Rebuild the manifest from a full listing and return the number of files found"""
+        # Take the token first so nothing that changes during the scan is missed
+        token = self.drive_service.changes().getStartPageToken().execute()['startPageToken']
+
+        manifest = self._empty_manifest()
+        roots = list(iter_files(
+            self.drive_service, f"name='{self.root_name}' and mimeType='{FOLDER_MIME}' and trashed=false"
+        ))
+        if roots:
+            manifest['root_id'] = roots[0]['id']
+            for folder in iter_files(
+                self.drive_service, f"'{manifest['root_id']}' in parents and mimeType='{FOLDER_MIME}' and trashed=false"
+            ):
+                if folder['name'] in self.departments:
+                    manifest['folders'][folder['name']] = folder['id']
+
+            for department, folder_id in manifest['folders'].items():
+                manifest['files'][department] = {
+                    file['id']: self._file_entry(file)
+                    for file in iter_files(
+                        self.drive_service, f"'{folder_id}' in parents and {supported_mime_filter()} and trashed=false"
+                    )
+                }
+
+        manifest['start_page_token'] = token
+        with self._lock:
+            self.manifest = manifest
+            self._save_manifest()
+        return sum(len(files) for files in manifest['files'].values())
+
+    def _file_entry(self, file):
+        return {
+            'id': file['id'],
+            'name': file['name'],
+            'mimeType': file['mimeType'],
+            'modifiedTime': file.get('modifiedTime', ''),
+            'md5Checksum': file.get('md5Checksum', ''),
+            'size': file.get('size', '')
+        }
+
+    def _department_for_folder(self, folder_id):
+        for department, department_folder_id in self.manifest['folders'].items():
+            if department_folder_id == folder_id:
+                return department
+        return None
+
+    def _remove_file(self, file_id):
+        removed = False
+        for files in self.manifest['files'].values():
+            if files.pop(file_id, None) is not None:
+                removed = True
+        return removed
+
+    def _apply_change(self, change):
+        """Apply one changes.list entry to the manifest; return True if it mattered"""
+        file_id = change['fileId']
+        file = change.get('file')
+
+        if change.get('removed') or file is None or file.get('trashed'):
+            if file_id in self.manifest['folders'].values():
+                department = self._department_for_folder(file_id)
+                del self.manifest['folders'][department]
+                self.manifest['files'].pop(department, None)
+                return True
+            return self._remove_file(file_id)
+
+        parents = file.get('parents', [])
+
+        if file['mimeType'] == FOLDER_MIME:
+            # A department folder was created, renamed or moved under the root
+            if self.manifest['root_id'] in parents and file['name'] in self.departments:
+                if self.manifest['folders'].get(file['name']) != file_id:
+                    self.manifest['folders'][file['name']] = file_id
+                    return None  # folder contents are unknown, a full scan is needed
+            return False
+
+        department = next(
+            (self._department_for_folder(parent) for parent in parents if self._department_for_folder(parent)),
+            None
+        )
+        if department is None or file['mimeType'] not in SUPPORTED_MIME_TYPES:
+            # Moved out of a department folder or not a report
+            return self._remove_file(file_id)
+
+        self._remove_file(file_id)
+        self.manifest['files'].setdefault(department, {})[file_id] = self._file_entry(file)
+        return True
+
+    def sync(self):
+        """Pull pending changes into the manifest and return sync statistics"""
+        started = time.perf_counter()
+        applied = 0
+        seen = 0
+        needs_full_scan = False
+
+        with self._lock:
+            if not self.manifest.get('start_page_token') or not self.manifest.get('root_id'):
+                files = self.full_scan()
+                self.last_sync = {
+                    'full_scan': True,
+                    'changes_seen': files,
+                    'changes_applied': files,
+                    'duration': time.perf_counter() - started
+                }
+                return self.last_sync
+
+            page_token = self.manifest['start_page_token']
+            while page_token:
+                results = self.drive_service.changes().list(
+                    pageToken=page_token,
+                    spaces='drive',
+                    pageSize=MAX_PAGE_SIZE,
+                    fields=f'nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))'
+                ).execute()
+
+                for change in results.get('changes', []):
+                    seen += 1
+                    result = self._apply_change(change)
+                    if result is None:
+                        needs_full_scan = True
+                    elif result:
+                        applied += 1
+
+                if 'newStartPageToken' in results:
+                    self.manifest['start_page_token'] = results['newStartPageToken']
+                page_token = results.get('nextPageToken')
+
+            if needs_full_scan:
+                self.full_scan()
+            else:
+                self._save_manifest()
+
+        self.last_sync = {
+            'full_scan': needs_full_scan,
+            'changes_seen': seen,
+            'changes_applied': applied,
+            'duration': time.perf_counter() - started
+        }
+        return self.last_sync
+
+    def get_department_folders(self):
+        """Return {department: folder_id} from the manifest"""
+        with self._lock:
+            return dict(self.manifest['folders'])
+
+    def get_department_files(self, department):
+        """Return the manifest entries for a department's supported files"""
+        with self._lock:
+            return [dict(entry) for entry in self.manifest['files'].get(department, {}).values()]
+
+    def start(self, interval=60):
+        """Run sync() every interval seconds in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    stats = self.sync()
+                    if stats['changes_applied']:
+                        print(f"🔄 Drive sync applied {stats['changes_applied']} changes in {stats['duration']:.2f}s")
+                except Exception as e:
+                    print(f"❌ Drive sync failed: {e}")
+
+        self._thread = threading.Thread(target=run, name='drive-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background sync thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,456 @@
+# fake_drive.py
+import hashlib
+import io
+import itertools
+import re
+import threading
+import time
+import zipfile
+from collections import Counter
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+FOLDER_MIME = 'application/vnd.google-apps.folder'
+GOOGLE_DOC_MIME = 'application/vnd.google-apps.document'
+DOCX_MIME = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+PDF_MIME = 'application/pdf'
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class FakeResponse(dict):
+    """Minimal httplib2-style response: a header dict with a status attribute"""
+
+    def __init__(self, status, headers=None):
+        super().__init__(headers or {})
+        self.status = status
+        self.reason = 'OK' if status < 400 else 'Error'
+
+
+class FakeHttp:
+    """Serves media URIs of a FakeDriveService with HTTP Range support"""
+
+    def __init__(self, drive):
+        self.drive = drive
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        self.drive.count('media.chunk')
+        self.drive.simulate_latency()
+        status = self.drive.take_injected_error()
+        if status:
+            return FakeResponse(status), b'{"error": {"code": %d, "message": "Injected error"}}' % status
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        file_id, export_mime = self.drive._parse_media_uri(uri)
+
+        try:
+            content = self.drive._media_bytes(file_id, export_mime)
+        except KeyError:
+            return FakeResponse(404), b'{"error": {"code": 404, "message": "File not found"}}'
+        except ValueError as e:
+            return FakeResponse(403), ('{"error": {"code": 403, "message": "%s"}}' % e).encode('utf-8')
+
+        total = len(content)
+        range_header = headers.get('range')
+        if not range_header:
+            return FakeResponse(200, {'content-length': str(total)}), content
+
+        start, end = range_header.replace('bytes=', '').split('-')
+        start, end = int(start), min(int(end), total - 1)
+        chunk = content[start:end + 1]
+        return FakeResponse(206, {
+            'content-range': f'bytes {start}-{max(end, start)}/{total}',
+            'content-length': str(len(chunk))
+        }), chunk
+
+
+class FakeRequest:
+    """Request object with an execute() method, like googleapiclient.http.HttpRequest"""
+
+    def __init__(self, fn, uri=None, http=None):
+        self._fn = fn
+        self.uri = uri
+        self.http = http
+        self.method = 'GET'
+        self.headers = {}
+
+    def execute(self, num_retries=0):
+        return self._fn()
+
+
+class _FilesResource:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def list(self, q=None, spaces='drive', fields=None, pageSize=100, pageToken=None, **kwargs):
+        return FakeRequest(lambda: self.drive._list_files(q, pageSize, pageToken))
+
+    def get(self, fileId, fields=None, **kwargs):
+        return FakeRequest(lambda: self.drive._get_metadata(fileId))
+
+    def get_media(self, fileId, **kwargs):
+        self.drive.count('files.get_media')
+        uri = f'fake://drive/files/{fileId}?alt=media'
+        http = FakeHttp(self.drive)
+        return FakeRequest(lambda: http.request(uri)[1], uri=uri, http=http)
+
+    def export_media(self, fileId, mimeType, **kwargs):
+        self.drive.count('files.export_media')
+        uri = f'fake://drive/files/{fileId}/export?mimeType={mimeType}'
+        http = FakeHttp(self.drive)
+        return FakeRequest(lambda: http.request(uri)[1], uri=uri, http=http)
+
+
+class _ChangesResource:
+    def __init__(self, drive):
+        self.drive = drive
+
+    def getStartPageToken(self, **kwargs):
+        return FakeRequest(self.drive._start_page_token)
+
+    def list(self, pageToken, pageSize=100, fields=None, spaces='drive', **kwargs):
+        return FakeRequest(lambda: self.drive._list_changes(pageToken, pageSize))
+
+
+class FakeDriveService:
+    """In-memory stand-in for the Drive v3 service used by DepartmentAI
+
+    Supports the subset of the API the assistant uses: files().list with the
+    query forms built in index.py, get_media/export_media downloads through
+    MediaIoBaseDownload, and the changes feed. Every call is counted so
+    callers can assert how many round-trips an operation needed.
+    """
+
+    def __init__(self, latency=0.0):
+        self.files_by_id = {}
+        self.change_log = []
+        self.calls = Counter()
+        self.latency = latency
+        self.injected_errors = []
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def total_calls(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def simulate_latency(self):
+        """Sleep for the configured per-round-trip latency"""
+        if self.latency:
+            time.sleep(self.latency)
+
+    def inject_errors(self, status, count=1):
+        """Make the next count media requests fail with an HTTP status such as 429 or 503"""
+        with self._lock:
+            self.injected_errors.extend([status] * count)
+
+    def take_injected_error(self):
+        with self._lock:
+            return self.injected_errors.pop(0) if self.injected_errors else None
+
+    # Resources
+    def files(self):
+        return _FilesResource(self)
+
+    def changes(self):
+        return _ChangesResource(self)
+
+    # Mutations
+    def add_folder(self, name, parent_id=None):
+        """Create a folder and return its id"""
+        return self._add(name, FOLDER_MIME, parent_id, b'')
+
+    def add_file(self, name, parent_id, mime_type, content):
+        """Create a file with str or bytes content and return its id"""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        return self._add(name, mime_type, parent_id, content)
+
+    def update_file(self, file_id, content=None, name=None):
+        """Change a file's content or name and bump its modifiedTime"""
+        with self._lock:
+            record = self.files_by_id[file_id]
+            if content is not None:
+                if isinstance(content, str):
+                    content = content.encode('utf-8')
+                record['content'] = content
+                record['md5Checksum'] = hashlib.md5(content).hexdigest()
+                record['size'] = str(len(content))
+            if name is not None:
+                record['name'] = name
+            record['modifiedTime'] = _now()
+            self._log_change(file_id)
+
+    def trash_file(self, file_id):
+        with self._lock:
+            self.files_by_id[file_id]['trashed'] = True
+            self.files_by_id[file_id]['modifiedTime'] = _now()
+            self._log_change(file_id)
+
+    def delete_file(self, file_id):
+        with self._lock:
+            del self.files_by_id[file_id]
+            self._log_change(file_id)
+
+    def _add(self, name, mime_type, parent_id, content):
+        with self._lock:
+            file_id = f'fake{next(self._ids):06d}'
+            self.files_by_id[file_id] = {
+                'id': file_id,
+                'name': name,
+                'mimeType': mime_type,
+                'parents': [parent_id] if parent_id else [],
+                'trashed': False,
+                'modifiedTime': _now(),
+                'md5Checksum': '' if mime_type.startswith('application/vnd.google-apps') else hashlib.md5(content).hexdigest(),
+                'size': str(len(content)),
+                'content': content
+            }
+            self._log_change(file_id)
+            return file_id
+
+    def _log_change(self, file_id):
+        self.change_log.append(file_id)
+
+    # Queries
+    def _metadata(self, record):
+        return {k: v for k, v in record.items() if k != 'content'}
+
+    def _get_metadata(self, file_id):
+        self.count('files.get')
+        with self._lock:
+            return self._metadata(self.files_by_id[file_id])
+
+    def _list_files(self, q, page_size, page_token):
+        self.count('files.list')
+        self.simulate_latency()
+        page_size = max(1, min(int(page_size or 100), 1000))
+        with self._lock:
+            matches = [
+                self._metadata(record) for record in self.files_by_id.values()
+                if q is None or _matches(q, record)
+            ]
+        offset = int(page_token or 0)
+        page = matches[offset:offset + page_size]
+        result = {'files': page}
+        if offset + page_size < len(matches):
+            result['nextPageToken'] = str(offset + page_size)
+        return result
+
+    def _start_page_token(self):
+        self.count('changes.getStartPageToken')
+        with self._lock:
+            return {'startPageToken': str(len(self.change_log) + 1)}
+
+    def _list_changes(self, page_token, page_size):
+        self.count('changes.list')
+        self.simulate_latency()
+        page_size = max(1, min(int(page_size or 100), 1000))
+        with self._lock:
+            start = int(page_token) - 1
+            entries = self.change_log[start:start + page_size]
+            changes = []
+            for file_id in entries:
+                record = self.files_by_id.get(file_id)
+                if record is None:
+                    changes.append({'fileId': file_id, 'removed': True})
+                else:
+                    changes.append({'fileId': file_id, 'removed': False, 'file': self._metadata(record)})
+
+            result = {'changes': changes}
+            if start + page_size < len(self.change_log):
+                result['nextPageToken'] = str(start + page_size + 1)
+            else:
+                result['newStartPageToken'] = str(len(self.change_log) + 1)
+            return result
+
+    # Media
+    def _parse_media_uri(self, uri):
+        match = re.match(r'fake://drive/files/([^/?]+)(/export\?mimeType=(.+))?', uri)
+        return match.group(1), match.group(3)
+
+    def _media_bytes(self, file_id, export_mime):
+        with self._lock:
+            record = self.files_by_id[file_id]
+        if export_mime is None:
+            if record['mimeType'].startswith('application/vnd.google-apps'):
+                raise ValueError('Only files with binary content can be downloaded. Use Export')
+            return record['content']
+        if not record['mimeType'].startswith('application/vnd.google-apps'):
+            raise ValueError('Export only supports Docs Editors files.')
+        return record['content']
+
+
+_CLAUSE_PATTERNS = [
+    (re.compile(r"^'([^']*)' in parents$"), lambda m, r: m.group(1) in r['parents']),
+    (re.compile(r"^name\s*=\s*'([^']*)'$"), lambda m, r: r['name'] == m.group(1)),
+    (re.compile(r"^name\s+contains\s+'([^']*)'$"), lambda m, r: m.group(1) in r['name']),
+    (re.compile(r"^mimeType\s*=\s*'([^']*)'$"), lambda m, r: r['mimeType'] == m.group(1)),
+    (re.compile(r"^mimeType\s*!=\s*'([^']*)'$"), lambda m, r: r['mimeType'] != m.group(1)),
+    (re.compile(r"^trashed\s*=\s*(true|false)$"), lambda m, r: r['trashed'] == (m.group(1) == 'true')),
+]
+
+
+def _split_top_level(expression, keyword):
+    """Split a query on ' and ' / ' or ' outside of quotes and parentheses"""
+    parts, depth, quoted, current = [], 0, False, ''
+    token = f' {keyword} '
+    i = 0
+    while i < len(expression):
+        char = expression[i]
+        if char == "'" and (i == 0 or expression[i - 1] != '\\'):
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        if not quoted and depth == 0 and expression[i:i + len(token)] == token:
+            parts.append(current)
+            current = ''
+            i += len(token)
+            continue
+        current += char
+        i += 1
+    parts.append(current)
+    return [part.strip() for part in parts]
+
+
+def _matches(expression, record):
+    """Evaluate the subset of the Drive query language used by the assistant"""
+    expression = expression.strip()
+    while expression.startswith('(') and expression.endswith(')') and _balanced(expression[1:-1]):
+        expression = expression[1:-1].strip()
+
+    or_parts = _split_top_level(expression, 'or')
+    if len(or_parts) > 1:
+        return any(_matches(part, record) for part in or_parts)
+
+    and_parts = _split_top_level(expression, 'and')
+    if len(and_parts) > 1:
+        return all(_matches(part, record) for part in and_parts)
+
+    for pattern, check in _CLAUSE_PATTERNS:
+        match = pattern.match(expression)
+        if match:
+            return check(match, record)
+    raise ValueError(f"Unsupported fake Drive query clause: {expression}")
+
+
+def _balanced(expression):
+    depth, quoted = 0, False
+    for char in expression:
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+SAMPLE_METRICS = {
+    'finance': ['Total Revenue: ${value},000', 'Operating Expenses: ${value},500', 'Net Profit Margin: {pct}%'],
+    'marketing': ['Campaign Spend: ${value},000', 'Leads Generated: {value}', 'Conversion Rate: {pct}%'],
+    'IT': ['Server Uptime: 99.{pct}%', 'Help Desk Tickets: {value}', 'Storage I/O: {value},000 IOPS average'],
+}
+
+
+def synthetic_report(department, week, paragraphs=20):
+    """Generate a weekly report body with bullet metrics and filler paragraphs"""
+    metrics = SAMPLE_METRICS.get(department, ['Metric: {value}'])
+    lines = [f'{department.upper()} DEPARTMENT - WEEK {week} REPORT', '', 'KEY METRICS:']
+    for i, metric in enumerate(metrics):
+        lines.append('• ' + metric.format(value=100 + (week * 37 + i * 11) % 900, pct=10 + (week * 7 + i) % 89))
+    lines.append('')
+    for p in range(paragraphs):
+        lines.append(
+            f'Week {week} update {p + 1}: the {department} team reviewed item {week * 100 + p} '
+            f'and recorded progress on project {p % 7} with {(week + p) % 13} open actions.'
+        )
+    return '\n'.join(lines)
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('latin-1', 'replace')
+
+
+def make_text_pdf(pages):
+    """Build a minimal PDF with one page per string in pages, one text line per line"""
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in pages:
+        stream = b'BT /F1 10 Tf 12 TL 40 800 Td ' + b' '.join(
+            b'(' + _pdf_escape(line) + b') Tj T*' for line in text.split('\n')
+        ) + b' ET'
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects)
+        )
+        kids.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(kids), len(kids))
+
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def make_docx(text):
+    """Build a minimal .docx with one paragraph per line of text"""
+    body = ''.join(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' for line in text.split('\n'))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr('[Content_Types].xml', '<?xml version="1.0"?><Types/>')
+        docx.writestr('word/document.xml', f'<?xml version="1.0"?><w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+def build_synthetic_drive(departments=('finance', 'marketing', 'IT'), reports_per_department=12, paragraphs=20,
+                          latency=0.0, formats=('txt', 'gdoc')):
+    """Build a FakeDriveService holding a Company Reports tree of weekly reports
+
+    Reports cycle through `formats`: 'txt', 'gdoc' (Google Docs), 'docx'
+    and 'pdf'.
+    """
+    drive = FakeDriveService(latency=latency)
+    root = drive.add_folder('Company Reports')
+    for department in departments:
+        folder = drive.add_folder(department, root)
+        for week in range(1, reports_per_department + 1):
+            body = synthetic_report(department, week, paragraphs)
+            file_format = formats[(week - 1) % len(formats)]
+            name = f'Week-{week} {department} report'
+            if file_format == 'txt':
+                drive.add_file(f'{name}.txt', folder, 'text/plain', body)
+            elif file_format == 'gdoc':
+                drive.add_file(name, folder, GOOGLE_DOC_MIME, body)
+            elif file_format == 'docx':
+                drive.add_file(f'{name}.docx', folder, DOCX_MIME, make_docx(body))
+            elif file_format == 'pdf':
+                # About 40 lines per page
+                lines = body.split('\n')
+                drive.add_file(f'{name}.pdf', folder, PDF_MIME,
+                               make_text_pdf(['\n'.join(lines[i:i + 40]) for i in range(0, len(lines), 40)]))
+            else:
+                raise ValueError(f"Unknown report format {file_format}")
+    drive.reset_calls()
+    return drive
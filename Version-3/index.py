@@ -6,19 +6,128 @@ from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
+from google_auth_httplib2 import AuthorizedHttp
+from concurrent.futures import ThreadPoolExecutor
+import httplib2
+import threading
+import time
 import pickle
-import re
 import io
-import zipfile
-import xml.etree.ElementTree as ET
+import os
+import mmap
+import tempfile
+from docx_text import extract_docx_text
+from pdf_text import PdfTextExtractor, get_extractor
+from content_cache import ContentCache, report_version
+from prompt_cache import PromptCache, corpus_version
+from answer_cache import AnswerCache, normalize_question
+from telemetry import Telemetry
+from summaries import SummaryStore, best_fit
+from metrics import MetricStore, describe, question_operation
+from weeks import WeekIndex, parse_period, report_order, report_week
+from ollama_pool import Backend, BackendPool
+from single_flight import SingleFlight, TokenBroadcast
+from drive_sync import DriveSync, iter_files, supported_mime_filter
+from retrieval import RetrievalIndex, estimate_tokens
+from bm25 import BM25Index
+from vector_store import VectorStore, OllamaEmbedder, HashingEmbedder
+
+# Short, low-cardinality labels for metrics
+MIME_LABELS = {
+    'application/vnd.google-apps.document': 'gdoc',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
+    'application/pdf': 'pdf',
+    'text/plain': 'txt'
+}
+
+# System prompt when a question was answered from the metric table
+METRIC_PROMPT = (
+    "You are an AI assistant for a company. The figures below were computed directly from the {department} "
+    "department's weekly reports. Answer the user's question from them in one or two sentences, quoting the "
+    "numbers exactly.\n\nCOMPUTED RESULT:\n{result}"
+)
 
 class DepartmentAI:
-    def __init__(self):
+    def __init__(self, cache_path='department_cache.db', cache_max_bytes=256 * 1024 * 1024, cache_max_entries=5000,
+                 drive_service=None, manifest_path='drive_manifest.json',
+                 use_retrieval=True, top_k=8, context_token_budget=3000, chunk_tokens=300, chunk_overlap=50,
+                 vector_store_dir='vector_store', embedding_model='nomic-embed-text',
+                 download_workers=8, download_retries=5, drive_service_factory=None,
+                 ollama_host=None, model='llama3.1:8b', folder_cache_ttl=300,
+                 pdf_extractor=None, pdf_workers=None,
+                 download_chunk_size=4 * 1024 * 1024, spill_threshold=16 * 1024 * 1024,
+                 prompt_path='ai_prompt.txt', keep_alive='30m',
+                 answer_cache_size=1000, answer_cache_ttl=3600, answer_similarity=0.95,
+                 quiet=False, telemetry_log=None, full_context_budget=6000,
+                 ollama_backends=None, ollama_max_concurrent=8):
         self.departments = ['finance', 'marketing', 'IT']
+        self.quiet = quiet
+        self.telemetry = Telemetry(telemetry_log)
         self.service = None
-        self.drive_service = None
-        self.authenticate_services()
+        self.drive_service = drive_service
+        self.drive_service_factory = drive_service_factory
+        self.credentials = None
+        self.drive_sync = None
+        self.folder_cache_ttl = folder_cache_ttl
+        self._folder_cache = (0.0, None)
+        self._folder_lock = threading.Lock()
+        self.manifest_path = manifest_path
+        self.content_cache = ContentCache(cache_path, max_bytes=cache_max_bytes, max_entries=cache_max_entries)
+        self.summary_store = SummaryStore(cache_path)
+        self.full_context_budget = full_context_budget
+        self.pdf_extractor = PdfTextExtractor(
+            extractor=get_extractor(pdf_extractor), workers=pdf_workers, page_cache=self.content_cache
+        )
+        self.use_retrieval = use_retrieval
+        self.top_k = top_k
+        self.context_token_budget = context_token_budget
+        self.ollama_host = ollama_host
+        self.model = model
+        self.ollama_client = ollama.Client(host=ollama_host)
+        # Answers go through the pool; embeddings and summaries keep the single client
+        if ollama_backends:
+            self.ollama_pool = BackendPool.from_specs(ollama_backends, default_model=model,
+                                                      default_concurrent=ollama_max_concurrent)
+        else:
+            self.ollama_pool = BackendPool([Backend(ollama_host, model, ollama_max_concurrent)])
+        self.keep_alive = keep_alive
+        self.prompt_cache = PromptCache(prompt_path)
+        self.vector_store = None
+        if vector_store_dir:
+            embedder = OllamaEmbedder(embedding_model, client=self.ollama_client) if embedding_model else HashingEmbedder()
+            self.vector_store = VectorStore(vector_store_dir, self.departments, embedder,
+                                            chunking={'chunk_tokens': chunk_tokens, 'chunk_overlap': chunk_overlap})
+        self.answer_cache = None
+        if answer_cache_size:
+            self.answer_cache = AnswerCache(
+                embedder=self.vector_store.embedder if self.vector_store else None,
+                threshold=answer_similarity, ttl=answer_cache_ttl, max_entries=answer_cache_size
+            )
+        self.retrieval_index = RetrievalIndex(
+            chunk_tokens=chunk_tokens, overlap_tokens=chunk_overlap,
+            vector_store=self.vector_store, lexical_index=BM25Index()
+        )
+        self.metric_store = MetricStore()
+        # Concurrent identical loads, downloads and questions share one operation
+        self.department_flight = SingleFlight('department', self.telemetry)
+        self.file_flight = SingleFlight('file', self.telemetry)
+        self.question_flight = SingleFlight('question', self.telemetry)
+        self.week_indexes = {}
+        self.last_context_stats = {}
+        self.last_query_stats = {}
+        self.download_retries = download_retries
+        self.download_chunk_size = download_chunk_size
+        self.spill_threshold = spill_threshold
+        self.download_executor = ThreadPoolExecutor(max_workers=download_workers, thread_name_prefix='drive-download')
+        self._worker_state = threading.local()
+        if self.drive_service is None:
+            self.authenticate_services()
         
+    def say(self, message):
+        """Print a progress line unless running quietly; errors always use print"""
+        if not self.quiet:
+            print(message)
+
     def authenticate_services(self):
         """Authenticate Google Drive service"""
         SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
@@ -89,121 +198,122 @@ class DepartmentAI:
         
         # Build service
         try:
+            self.credentials = creds
             return build('drive', 'v3', credentials=creds)
         except Exception as e:
             print(f"❌ Failed to build {service_name} service: {e}")
             return None
 
+    def get_worker_service(self):
+        """Get this thread's own Drive service, since httplib2 is not thread-safe"""
+        service = getattr(self._worker_state, 'drive_service', None)
+        if service is None:
+            if self.drive_service_factory:
+                service = self.drive_service_factory()
+            elif self.credentials:
+                http = AuthorizedHttp(self.credentials, http=httplib2.Http())
+                service = build('drive', 'v3', http=http, cache_discovery=False)
+            else:
+                service = self.drive_service
+            self._worker_state.drive_service = service
+        return service
+
+    def start_drive_sync(self, interval=60):
+        """Build the local Drive manifest and keep it current in the background"""
+        if not self.drive_service:
+            return None
+        
+        self.drive_sync = DriveSync(self.drive_service, self.departments, manifest_path=self.manifest_path)
+        stats = self.drive_sync.sync()
+        kind = "full scan" if stats['full_scan'] else "incremental sync"
+        print(f"🔄 Drive {kind}: {stats['changes_applied']} changes applied in {stats['duration']:.2f}s")
+        self.drive_sync.start(interval)
+        return stats
+
     def find_department_folders(self):
-        """Find department folders in Google Drive"""
+        """Find department folders in Google Drive, memoized for folder_cache_ttl seconds"""
         if not self.drive_service:
             return {}
+        
+        with self._folder_lock:
+            cached_at, cached_folders = self._folder_cache
+            if cached_folders is not None and time.monotonic() - cached_at < self.folder_cache_ttl:
+                return dict(cached_folders)
             
+            with self.telemetry.span('discovery', stage='folders'):
+                department_folders = self._discover_department_folders()
+            if department_folders is not None:
+                self._folder_cache = (time.monotonic(), department_folders)
+            return dict(department_folders or {})
+
+    def _discover_department_folders(self):
+        """List the root folder and all department folders in two Drive calls
+
+        Listings run on the calling thread's own Drive service: discovery is
+        reached from batch and load_relevant_context_many worker threads too.
+        """
         department_folders = {}
         
         try:
-            print("🔍 Searching for Company Reports folder...")
+            self.say("🔍 Searching for Company Reports folder...")
             
             query = "name='Company Reports' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = self.drive_service.files().list(
-                q=query, 
-                spaces='drive', 
-                fields='files(id, name)'
-            ).execute()
-            
-            company_reports_folders = results.get('files', [])
+            company_reports_folders = list(iter_files(self.get_worker_service(), query, fields='id, name', page_size=10))
             
             if not company_reports_folders:
                 print("❌ 'Company Reports' folder not found")
                 return {}
             
             company_reports_id = company_reports_folders[0]['id']
-            print(f"✅ Found Company Reports folder")
+            self.say(f"✅ Found Company Reports folder")
+            
+            # Find every department folder with one query instead of one per department
+            name_filter = ' or '.join(
+                "name='{}'".format(department.replace("'", "\\'")) for department in self.departments
+            )
+            query = f"'{company_reports_id}' in parents and ({name_filter}) and mimeType='application/vnd.google-apps.folder' and trashed=false"
+            for folder in iter_files(self.get_worker_service(), query, fields='id, name', page_size=len(self.departments) * 4):
+                department_folders.setdefault(folder['name'], folder['id'])
             
-            # Find department folders
             for department in self.departments:
-                query = f"'{company_reports_id}' in parents and name='{department}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
-                results = self.drive_service.files().list(
-                    q=query, 
-                    spaces='drive', 
-                    fields='files(id, name)'
-                ).execute()
-                
-                dept_folders = results.get('files', [])
-                
-                if dept_folders:
-                    department_folders[department] = dept_folders[0]['id']
-                    print(f"✅ Found {department} folder")
+                if department in department_folders:
+                    self.say(f"✅ Found {department} folder")
                 else:
-                    print(f"⚠️ {department} folder not found")
+                    self.say(f"⚠️ {department} folder not found")
             
             return department_folders
             
         except HttpError as error:
             print(f"❌ Error accessing Google Drive: {error}")
-            return {}
+            return None
 
     def discover_weekly_reports(self, department_folder_id, department_name):
         """Discover all weekly reports in a department folder"""
         if not self.drive_service:
             return {}
             
-        weekly_reports = {}
-        
         try:
-            print(f"   🔍 Searching for documents in {department_name} folder...")
-            
-            # Find all files in the department folder
-            query = f"'{department_folder_id}' in parents and trashed=false"
-            results = self.drive_service.files().list(
-                q=query,
-                spaces='drive', 
-                fields='files(id, name, mimeType)',
-                pageSize=50
-            ).execute()
+            self.say(f"   🔍 Searching for documents in {department_name} folder...")
             
-            all_files = results.get('files', [])
+            # Page through supported files only; the type filter runs on Drive's side
+            query = f"'{department_folder_id}' in parents and {supported_mime_filter()} and trashed=false"
+            supported_files = iter_files(
+                self.get_worker_service(),
+                query,
+                fields='id, name, mimeType, modifiedTime, size, md5Checksum'
+            )
             
-            if not all_files:
-                print(f"   ❌ No files found in {department_name} folder")
-                return {}
-            
-            # Filter for supported file types
-            supported_files = [
-                f for f in all_files 
-                if f['mimeType'] in [
-                    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',  # .docx
-                    'application/vnd.google-apps.document',  # Google Docs
-                    'application/pdf',  # PDF files
-                    'text/plain'  # Text files
-                ]
-            ]
+            with self.telemetry.span('discovery', stage='reports', department=department_name) as span:
+                weekly_reports = self.index_reports(supported_files)
+                span['files'] = len(weekly_reports)
             
-            if not supported_files:
-                print(f"   ❌ No supported files found in {department_name} folder")
+            if not weekly_reports:
+                self.say(f"   ❌ No supported files found in {department_name} folder")
                 return {}
             
-            print(f"   ✅ Found {len(supported_files)} supported files in {department_name} folder")
-            
-            # Pattern to match Week-XX format
-            week_pattern = re.compile(r'Week[-\s]*(\d+)', re.IGNORECASE)
+            self.say(f"   ✅ Found {len(weekly_reports)} supported files in {department_name} folder")
             
-            for file in supported_files:
-                file_name = file['name']
-                match = week_pattern.search(file_name)
-                
-                if match:
-                    week_number = match.group(1)
-                    key = f'Week-{week_number}'
-                else:
-                    key = file_name
-                
-                weekly_reports[key] = {
-                    'id': file['id'],
-                    'name': file_name,
-                    'mimeType': file['mimeType']
-                }
-                
+            for key, report_info in weekly_reports.items():
                 # Show file type icon
                 file_type_icons = {
                     'application/vnd.google-apps.document': '📝',
@@ -211,8 +321,8 @@ class DepartmentAI:
                     'application/pdf': '📕',
                     'text/plain': '📃'
                 }
-                icon = file_type_icons.get(file['mimeType'], '📎')
-                print(f"      {icon} {key} ({file['mimeType'].split('/')[-1]})")
+                icon = file_type_icons.get(report_info['mimeType'], '📎')
+                self.say(f"      {icon} {key} ({report_info['mimeType'].split('/')[-1]})")
             
             return weekly_reports
             
@@ -220,91 +330,130 @@ class DepartmentAI:
             print(f"❌ Error discovering reports for {department_name}: {error}")
             return {}
 
+    def index_reports(self, files):
+        """Key supported files by their Week-XX number, or by name when there is none"""
+        weekly_reports = {}
+        
+        for file in files:
+            file_name = file['name']
+            modified_time = file.get('modifiedTime', '')
+            week, year = report_week(file_name, modified_time)
+            key = f'Week-{week}' if week is not None else file_name
+            
+            # Two files for the same week (another year, a re-upload) or with the same name keep both
+            if key in weekly_reports:
+                key = f'{key} ({file_name})' if week is not None else key
+            if key in weekly_reports:
+                key = f"{key} [{file['id']}]"
+            
+            weekly_reports[key] = {
+                'id': file['id'],
+                'name': file_name,
+                'mimeType': file['mimeType'],
+                'modifiedTime': modified_time,
+                'size': file.get('size', ''),
+                'md5Checksum': file.get('md5Checksum', ''),
+                'week': week,
+                'year': year
+            }
+        
+        return weekly_reports
+
+    def week_index(self, department, weekly_reports):
+        """Return the department's WeekIndex, rebuilt only when its reports change"""
+        version = corpus_version(weekly_reports)
+        cached = self.week_indexes.get(department)
+        if cached is None or cached[0] != version:
+            cached = (version, WeekIndex(weekly_reports))
+            self.week_indexes[department] = cached
+        return cached[1]
+
+    def select_reports(self, department, question):
+        """Return the reports for the period a question names, or None to use every report"""
+        period = parse_period(question)
+        if period is None:
+            return None
+        weekly_reports = self.get_department_reports(department)
+        if not weekly_reports:
+            return None
+        keys = self.week_index(department, weekly_reports).select(period)
+        if not keys:
+            self.say(f"📅 No {department} reports for {period['label']} - using every report")
+            return None
+        self.say(f"📅 Using {len(keys)}/{len(weekly_reports)} {department} reports for {period['label']}")
+        return {key: weekly_reports[key] for key in keys}
+
+    def get_department_reports(self, department):
+        """Get a department's reports from the sync manifest, or by listing Drive"""
+        if self.drive_sync:
+            if department not in self.drive_sync.get_department_folders():
+                return None
+            return self.index_reports(self.drive_sync.get_department_files(department))
+        
+        department_folders = self.find_department_folders()
+        if department not in department_folders:
+            return None
+        return self.department_flight.do(('reports', department), self.discover_weekly_reports,
+                                         department_folders[department], department)
+
     def extract_text_from_docx(self, file_content):
-        """Extract text from .docx file content in memory"""
+        """Extract text from .docx content (bytes or a seekable file) by streaming its XML"""
         try:
-            # .docx is a zip file containing XML - process in memory
-            with zipfile.ZipFile(io.BytesIO(file_content)) as docx:
-                # Read the main document XML
-                if 'word/document.xml' in docx.namelist():
-                    document_xml = docx.read('word/document.xml')
-                    
-                    # Parse XML and extract text
-                    root = ET.fromstring(document_xml)
-                    
-                    # Namespace for Word documents
-                    ns = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
-                    
-                    # Extract all text elements
-                    text_elements = root.findall('.//w:t', ns)
-                    text_content = ''.join(elem.text for elem in text_elements if elem.text)
-                    
-                    return text_content.strip()
-                else:
-                    return "Error: Could not find document content in .docx file"
-                
+            # .docx is a zip file containing XML - parts are streamed, never loaded whole
+            return extract_docx_text(file_content)
+        except ValueError as e:
+            return f"Error: {e}"
         except Exception as e:
             return f"Error extracting text from .docx: {e}"
 
-    def get_file_content_in_memory(self, file_id, file_name, mime_type):
-        """Get file content directly in memory without saving to disk"""
-        if not self.drive_service:
+    def get_file_content_in_memory(self, file_id, file_name, mime_type, drive_service=None, version=None, size=None):
+        """Get file content, buffering in memory for small files and spilling to disk above spill_threshold"""
+        drive_service = drive_service or self.drive_service
+        if not drive_service:
             return "Error: Drive service not available"
             
         try:
-            print(f"      📖 Reading content from '{file_name}'...")
+            self.say(f"      📖 Reading content from '{file_name}'...")
             
             # Choose the appropriate method based on file type
             if mime_type == 'application/vnd.google-apps.document':
                 # Export Google Doc as plain text
-                request = self.drive_service.files().export_media(
+                request = drive_service.files().export_media(
                     fileId=file_id,
                     mimeType='text/plain'
                 )
             elif mime_type == 'application/pdf':
-                # Export PDF as plain text
-                request = self.drive_service.files().export_media(
-                    fileId=file_id,
-                    mimeType='text/plain'
-                )
+                # Drive cannot export uploaded PDFs - download and parse locally
+                return self.extract_text_from_pdf(file_id, file_name, drive_service, version)
             elif mime_type == 'text/plain':
                 # Download text file directly
-                request = self.drive_service.files().get_media(fileId=file_id)
+                request = drive_service.files().get_media(fileId=file_id)
             else:
                 # For .docx and other files, download the file content
-                request = self.drive_service.files().get_media(fileId=file_id)
-            
-            # Download the file content to memory
-            file_content = io.BytesIO()
-            downloader = MediaIoBaseDownload(file_content, request)
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
+                request = drive_service.files().get_media(fileId=file_id)
             
-            file_content.seek(0)
-            content_bytes = file_content.read()
+            # Download the file content - exports have no known size, so they spill too
+            with self.telemetry.span('download', mime_type=MIME_LABELS.get(mime_type)) as span:
+                file_content = self.open_download(request, size)
+                span.update(file=file_name, size=size)
             
-            # Process content based on file type
-            if mime_type == 'application/vnd.google-apps.document':
-                # Google Doc exported as text
-                text_content = content_bytes.decode('utf-8')
-            elif mime_type == 'application/pdf':
-                # PDF exported as text
-                text_content = content_bytes.decode('utf-8')
-            elif mime_type == 'text/plain':
-                # Text file
-                text_content = content_bytes.decode('utf-8')
-            elif mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-                # .docx file - extract text
-                text_content = self.extract_text_from_docx(content_bytes)
-            else:
-                text_content = f"Unsupported file type: {mime_type}"
+            with file_content, self.telemetry.span('extraction', mime_type=MIME_LABELS.get(mime_type)) as span:
+                span['file'] = file_name
+                # Process content based on file type
+                if mime_type == 'application/vnd.google-apps.document':
+                    # Google Doc exported as text
+                    text_content = self.decode_download(file_content)
+                elif mime_type == 'text/plain':
+                    # Text file
+                    text_content = self.decode_download(file_content)
+                elif mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
+                    # .docx file - zip members are streamed straight from the buffer
+                    text_content = self.extract_text_from_docx(file_content)
+                else:
+                    text_content = f"Unsupported file type: {mime_type}"
+                span['chars'] = len(text_content)
             
-            if text_content and not text_content.startswith("Error"):
-                print(f"      ✅ Read {len(text_content)} characters from '{file_name}'")
-            else:
-                print(f"      ⚠️ Could not extract text from '{file_name}'")
-                
+            self._report_extraction(file_name, text_content)
             return text_content
             
         except HttpError as error:
@@ -316,106 +465,588 @@ class DepartmentAI:
             print(f"      ❌ {error_msg}")
             return error_msg
 
-    def load_department_data(self, department):
-        """Load all data for a specific department"""
+    def download_to(self, stream, request):
+        """Download a Drive media request into a writable file object, one chunk at a time"""
+        downloader = MediaIoBaseDownload(stream, request, chunksize=self.download_chunk_size)
+        done = False
+        while not done:
+            # Retries 429 and 5xx responses with exponential backoff
+            status, done = downloader.next_chunk(num_retries=self.download_retries)
+
+    def open_download(self, request, size=None):
+        """Download into a BytesIO when the file is known to be small, else into a temporary file"""
+        if size is not None and size <= self.spill_threshold:
+            buffer = io.BytesIO()
+        else:
+            buffer = tempfile.TemporaryFile()
         try:
-            print(f"\n📂 Loading data for {department} department...")
+            self.download_to(buffer, request)
+        except Exception:
+            buffer.close()
+            raise
+        buffer.seek(0)
+        return buffer
+
+    def decode_download(self, buffer):
+        """Decode a downloaded buffer as UTF-8 without making an intermediate bytes copy"""
+        if isinstance(buffer, io.BytesIO):
+            with buffer.getbuffer() as view:
+                return str(view, 'utf-8')
+        if os.fstat(buffer.fileno()).st_size == 0:
+            return ''
+        # Spilled files are decoded straight from the page cache
+        with mmap.mmap(buffer.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return str(mapped, 'utf-8')
+
+    def extract_text_from_pdf(self, file_id, file_name, drive_service, version=None):
+        """Download a PDF to a temporary file and extract its pages locally"""
+        if self.pdf_extractor.extractor is None:
+            return "Error: No PDF extractor available - install pypdf"
+        
+        # Worker processes read pages from the file, so it has to live on disk
+        pdf_file = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        path = pdf_file.name
+        try:
+            with pdf_file, self.telemetry.span('download', mime_type='pdf') as span:
+                span['file'] = file_name
+                self.download_to(pdf_file, drive_service.files().get_media(fileId=file_id))
+            with self.telemetry.span('extraction', mime_type='pdf') as span:
+                text_content = self.pdf_extractor.extract_text(path, file_id=file_id, version=version)
+                span.update(file=file_name, chars=len(text_content))
+        finally:
+            os.remove(path)
+        
+        self._report_extraction(file_name, text_content)
+        return text_content
+
+    def _report_extraction(self, file_name, text_content):
+        if text_content and not text_content.startswith("Error"):
+            self.say(f"      ✅ Read {len(text_content)} characters from '{file_name}'")
+        else:
+            self.say(f"      ⚠️ Could not extract text from '{file_name}'")
+
+    def get_report_content(self, report_info):
+        """Get report text from the content cache, downloading only when it changed"""
+        version = report_version(report_info)
+        return self.file_flight.do((report_info['id'], version), self._read_report, report_info, version)
+
+    def _read_report(self, report_info, version):
+        cached = self.content_cache.get(report_info['id'], version)
+        self.telemetry.count('reports_read', source='cache' if cached is not None else 'drive')
+        if cached is not None:
+            self.say(f"      ⚡ Using cached content for '{report_info['name']}'")
+            return cached
+        
+        content = self.get_file_content_in_memory(
+            report_info['id'], 
+            report_info['name'], 
+            report_info['mimeType'],
+            drive_service=self.get_worker_service(),
+            version=version,
+            size=int(report_info['size']) if report_info.get('size') else None
+        )
+        if content and not content.startswith("Error") and len(content.strip()) > 0:
+            self.content_cache.put(report_info['id'], version, report_info['name'], content)
+        return content
+
+    def load_department_data(self, department, weekly_reports=None):
+        """Load all data for a specific department, or only the given subset of its reports"""
+        key = ('load', department, None if weekly_reports is None else corpus_version(weekly_reports))
+        return self.department_flight.do(key, self._load_department_data, department, weekly_reports)
+
+    def _load_department_data(self, department, weekly_reports):
+        try:
+            self.say(f"\n📂 Loading data for {department} department...")
             
-            # Find department folders
-            department_folders = self.find_department_folders()
+            # Discover all weekly reports (from the sync manifest when available)
+            if weekly_reports is None:
+                weekly_reports = self.get_department_reports(department)
             
-            if department not in department_folders:
+            if weekly_reports is None:
                 return f"Could not find folder for {department} department"
             
-            department_folder_id = department_folders[department]
-            
-            # Discover all weekly reports
-            weekly_reports = self.discover_weekly_reports(department_folder_id, department)
-            
             if not weekly_reports:
                 return f"No supported files found for {department} department"
             
-            print(f"📄 Processing {len(weekly_reports)} files for {department}")
+            self.say(f"📄 Processing {len(weekly_reports)} files for {department}")
             
             # Load content from all reports
             all_content = []
             successful_reads = 0
             
-            for report_name, report_info in weekly_reports.items():
-                content = self.get_file_content_in_memory(
-                    report_info['id'], 
-                    report_info['name'], 
-                    report_info['mimeType']
-                )
+            # Download in parallel; map() keeps the original report order
+            contents = self.download_executor.map(self.get_report_content, weekly_reports.values())
+            
+            for (report_name, report_info), content in zip(weekly_reports.items(), contents):
                 if content and not content.startswith("Error") and len(content.strip()) > 0:
                     all_content.append(f"\n--- {report_name} ---\n{content}")
                     successful_reads += 1
                 else:
-                    print(f"   ⚠️ Skipped {report_name} - no readable content")
+                    self.say(f"   ⚠️ Skipped {report_name} - no readable content")
             
             if not all_content:
                 return f"No readable content found for {department} department"
             
-            print(f"✅ Successfully loaded {successful_reads}/{len(weekly_reports)} files for {department}")
+            self.say(f"✅ Successfully loaded {successful_reads}/{len(weekly_reports)} files for {department}")
             return '\n'.join(all_content)
             
         except Exception as e:
             return f"Error loading {department} department data: {e}"
 
-    def load_ai_prompt(self, department):
-        """Load and format the AI prompt with department data"""
+    def ingest_department(self, department, selected=None):
+        """Chunk new or changed reports of a department into the retrieval index
+
+        With `selected` (a subset from select_reports) only those reports
+        are downloaded; the others stay as they are.
+        """
+        key = ('ingest', department, None if selected is None else corpus_version(selected))
+        return self.department_flight.do(key, self._ingest_department, department, selected)
+
+    def _ingest_department(self, department, selected):
+        weekly_reports = self.get_department_reports(department)
+        
+        if weekly_reports is None:
+            return f"Could not find folder for {department} department"
+        
+        current_ids = {report_info['id'] for report_info in weekly_reports.values()}
+        # A persisted retrieval index can outlive the in-memory metric table, so check both
+        pending = [
+            (report_name, report_info) for report_name, report_info in (selected or weekly_reports).items()
+            if not self.retrieval_index.has_report(department, report_info['id'], report_version(report_info))
+            or not self.metric_store.has_report(report_info['id'], report_version(report_info))
+        ]
+        
+        # Download in parallel; map() keeps the original report order
+        contents = self.download_executor.map(self.get_report_content, [report_info for _, report_info in pending])
+        
+        for (report_name, report_info), content in zip(pending, contents):
+            version = report_version(report_info)
+            if content and not content.startswith("Error") and len(content.strip()) > 0:
+                self.metric_store.add_report(department, report_info, version, content)
+                if self.retrieval_index.has_report(department, report_info['id'], version):
+                    continue
+                chunks = self.retrieval_index.add_report(department, report_name, report_info['id'], version, content,
+                                                         report_order(report_info))
+                self.say(f"   🧩 Indexed {report_name} into {chunks} passages")
+            else:
+                self.say(f"   ⚠️ Skipped {report_name} - no readable content")
+        
+        # Forget reports that were removed from the folder
+        self.retrieval_index.prune(department, current_ids)
+        self.metric_store.prune(department, current_ids)
+        
+        return len(self.retrieval_index.report_ids(department))
+
+    def load_relevant_context(self, department, question, context_stats=None):
+        """Retrieve the top-k report passages for a question within the token budget
+
+        Passage and token counts go into context_stats when it is given.
+        """
         try:
-            with open('ai_prompt.txt', 'r', encoding='utf-8') as f:
-                prompt_template = f.read()
+            selected = self.select_reports(department, question)
+            indexed = self.ingest_department(department, selected)
+            if isinstance(indexed, str):
+                return indexed
+            if not indexed:
+                return f"No readable content found for {department} department"
+            
+            chunks, tokens = self.retrieval_index.select_context(
+                department, question, top_k=self.top_k, token_budget=self.context_token_budget,
+                file_ids=self.report_ids(selected)
+            )
+            self.last_context_stats = {
+                'department': department,
+                'passages': len(chunks),
+                'context_tokens': tokens,
+                'token_budget': self.context_token_budget
+            }
+            if context_stats is not None:
+                context_stats.update(self.last_context_stats)
+            self.say(f"📏 Using {tokens}/{self.context_token_budget} context tokens from {len(chunks)} passages")
             
-            department_data = self.load_department_data(department)
+            if not chunks:
+                return "No report passages matched this question."
+            return self.retrieval_index.format_context(chunks)
             
-            prompt_template = prompt_template.replace('{departments}', ', '.join(self.departments))
-            prompt_template = prompt_template.replace('{department}', department.upper())
-            prompt_template = prompt_template.replace('{department_data}', department_data)
+        except Exception as e:
+            return f"Error retrieving {department} department context: {e}"
+
+    def load_relevant_context_many(self, departments, question, context_stats=None):
+        """Retrieve from several departments at once and merge the passages under one token budget
 
-            return prompt_template
+        Per-department retrieval time, passages and tokens go into
+        context_stats['departments'] when context_stats is given.
+        """
+        def retrieve(department):
+            started = time.perf_counter()
+            selected = self.select_reports(department, question)
+            indexed = self.ingest_department(department, selected)
+            ranking = []
+            if not isinstance(indexed, str) and indexed:
+                ranking = self.retrieval_index.search(department, question, self.top_k,
+                                                      file_ids=self.report_ids(selected))
+            return ranking, time.perf_counter() - started
+        
+        try:
+            # A pool of its own: each department's ingest fans out onto download_executor
+            with ThreadPoolExecutor(max_workers=len(departments), thread_name_prefix='department-fanout') as pool:
+                results = dict(zip(departments, pool.map(retrieve, departments)))
+            
+            selected, tokens = self.retrieval_index.select_context_many(
+                {department: ranking for department, (ranking, _) in results.items()},
+                token_budget=self.context_token_budget, top_k=self.top_k * len(departments)
+            )
+            self.last_context_stats = {
+                'departments': {
+                    department: {
+                        'retrieval_seconds': seconds,
+                        'passages': sum(1 for name, _ in selected if name == department),
+                        'context_tokens': sum(chunk['tokens'] for name, chunk in selected if name == department)
+                    }
+                    for department, (_, seconds) in results.items()
+                },
+                'passages': len(selected),
+                'context_tokens': tokens,
+                'token_budget': self.context_token_budget
+            }
+            if context_stats is not None:
+                context_stats.update(self.last_context_stats)
+            self.say(f"📏 Using {tokens}/{self.context_token_budget} context tokens from {len(selected)} passages "
+                  f"across {len(departments)} departments")
+            
+            if not selected:
+                return "No report passages matched this question."
+            return self.retrieval_index.format_context_many(selected)
+            
+        except Exception as e:
+            return f"Error retrieving context for {', '.join(departments)}: {e}"
+
+    def answer_from_metrics(self, department, question):
+        """Answer aggregate and trend questions about report metrics from the metric table, or return None"""
+        if question_operation(question) is None:
+            return None
+        try:
+            with self.telemetry.span('metrics', department=department):
+                selected = self.select_reports(department, question)
+                # A period with no matching reports must not fall back to every week
+                if selected is None and parse_period(question) is not None:
+                    return None
+                indexed = self.ingest_department(department, selected)
+                if isinstance(indexed, str) or not indexed:
+                    return None
+                result = self.metric_store.answer(department, question, self.report_ids(selected))
+            if result is None:
+                return None
+            self.say(f"🧮 Computed {result['operation']} of {result['metric']} from {len(result['weeks'])} reports")
+            return describe(result)
+        except Exception as e:
+            print(f"❌ Metric lookup failed: {e}")
+            return None
+
+    def report_catalog(self, weekly_reports):
+        """List a department's reports for the stable part of the system prompt"""
+        lines = [f"{len(weekly_reports)} reports are available:"]
+        for report_name, report_info in weekly_reports.items():
+            modified = report_info.get('modifiedTime', '')[:10]
+            lines.append(f"- {report_name}: {report_info['name']}" + (f" (updated {modified})" if modified else ""))
+        lines.append("Passages from these reports that match the question are given with each question.")
+        return '\n'.join(lines)
+
+    def report_ids(self, selected):
+        """File ids of a select_reports() subset, or None for every report"""
+        if selected is None:
+            return None
+        return {report_info['id'] for report_info in selected.values()}
+
+    def load_ai_prompt(self, department, question=None):
+        """Load the system prompt for one department or a list of them, rendered once per version of their reports
+
+        In full mode a question naming a period ("last 4 weeks", "Week-12",
+        "Q2") only loads the reports of that period.
+        """
+        try:
+            departments = [department] if isinstance(department, str) else list(department)
+            catalogs = {}
+            for name in departments:
+                weekly_reports = self.get_department_reports(name)
+                if weekly_reports is None:
+                    return f"Error: Could not find folder for {name} department"
+                catalogs[name] = weekly_reports
+            
+            # Several departments are always answered from retrieved passages
+            mode = 'catalog' if self.use_retrieval or len(departments) > 1 else 'full'
+            selected = self.select_reports(department, question) if mode == 'full' and question else None
+            if selected is not None:
+                mode = f"full {' '.join(sorted(selected))}"
+                catalogs[department] = selected
+            
+            def render(prompt_template):
+                if mode == 'catalog':
+                    # Only report metadata here: per-question passages go in the user message
+                    department_data = '\n\n'.join(
+                        (f"{name.upper()} DEPARTMENT - " if len(departments) > 1 else '') + self.report_catalog(reports)
+                        for name, reports in catalogs.items()
+                    )
+                else:
+                    department_data = self.load_department_data(department, selected)
+                    if department_data.startswith("Error"):
+                        return department_data
+                    # Fall back to precomputed summaries rather than let Ollama truncate silently
+                    level, department_data = best_fit(
+                        self.summary_store, department, catalogs[department], department_data, self.full_context_budget
+                    )
+                    if level != 'raw':
+                        self.say(f"🗜️ Reports exceed {self.full_context_budget} tokens - using {level} summaries")
+                
+                prompt_template = prompt_template.replace('{departments}', ', '.join(self.departments))
+                prompt_template = prompt_template.replace('{department}', ' + '.join(name.upper() for name in departments))
+                prompt_template = prompt_template.replace('{department_data}', department_data)
+                return prompt_template
+            
+            version = '+'.join(corpus_version(reports) for reports in catalogs.values())
+            if mode != 'catalog':
+                version += '|' + self.summary_store.state(department)
+            return self.prompt_cache.get_or_render('+'.join(departments), version, mode, render)
             
         except Exception as e:
             return f"Error loading AI prompt: {e}"
 
-    def query_ollama(self, department, question):
-        """Query Ollama with the department-specific context"""
-        system_prompt = self.load_ai_prompt(department)
+    def build_messages(self, department, question, context_stats=None):
+        """Build the chat messages for a question, or return an error string
+
+        department may be a list, in which case passages are retrieved from
+        every listed department concurrently and merged into one context.
+        Retrieval statistics of this question go into context_stats; the
+        last_context_stats attribute is shared by every thread.
+
+        The system prompt is identical for every question about a department
+        until its reports change, so Ollama can reuse the KV cache for that
+        prefix and only prefill the passages and the question.
+        """
+        if isinstance(department, str):
+            result = self.answer_from_metrics(department, question)
+            if result is not None:
+                # The numbers are already computed: the model only has to phrase them
+                self.telemetry.count('metric_answers')
+                return [
+                    {'role': 'system', 'content': METRIC_PROMPT.format(department=department.upper(), result=result)},
+                    {'role': 'user', 'content': question}
+                ]
+        
+        with self.telemetry.span('prompt'):
+            system_prompt = self.load_ai_prompt(department, question)
         if not system_prompt or system_prompt.startswith("Error"):
             return f"Error: Could not load AI prompt - {system_prompt}"
         
+        user_content = question
+        if not isinstance(department, str):
+            with self.telemetry.span('retrieval', department='+'.join(department)):
+                context = self.load_relevant_context_many(department, question, context_stats)
+            if context.startswith("Error"):
+                return context
+            user_content = f"RELEVANT REPORT PASSAGES:\n{context}\n\nQUESTION: {question}"
+        elif self.use_retrieval:
+            with self.telemetry.span('retrieval', department=department):
+                context = self.load_relevant_context(department, question, context_stats)
+            if context.startswith("Error"):
+                return context
+            user_content = f"RELEVANT REPORT PASSAGES:\n{context}\n\nQUESTION: {question}"
+        
+        return [
+            {
+                'role': 'system',
+                'content': system_prompt
+            },
+            {
+                'role': 'user',
+                'content': user_content
+            }
+        ]
+
+    def record_final_stats(self, stats, part):
+        """Copy token counts, prefill and generation time from the final chunk of a response"""
+        stats['eval_count'] = part.get('eval_count')
+        stats['prompt_eval_count'] = part.get('prompt_eval_count')
+        if part.get('prompt_eval_duration') is not None:
+            stats['prefill_seconds'] = part['prompt_eval_duration'] / 1e9
+            self.telemetry.observe('llm', stats['prefill_seconds'], stage='prefill')
+            self.telemetry.count('llm_prompt_tokens', stats['prompt_eval_count'] or 0)
+        if part.get('eval_duration') is not None:
+            stats['generation_seconds'] = part['eval_duration'] / 1e9
+            if stats['eval_count'] and stats['generation_seconds']:
+                stats['tokens_per_second'] = stats['eval_count'] / stats['generation_seconds']
+            self.telemetry.observe('llm', stats['generation_seconds'], stage='generation')
+            self.telemetry.count('llm_generated_tokens', stats['eval_count'] or 0)
+
+    def cached_answer(self, department, question):
+        """Return (corpus version, cached answer or None) for a question to one or several departments"""
+        if isinstance(department, str):
+            weekly_reports = self.get_department_reports(department)
+            if not weekly_reports:
+                return None, None
+            version = corpus_version(weekly_reports)
+        else:
+            version = '+'.join(corpus_version(self.get_department_reports(name) or {}) for name in department)
+            department = '+'.join(department)
+        if self.answer_cache is None:
+            return version, None
+        return version, self.answer_cache.get(department, version, question)
+
+    def coalescing_stats(self):
+        """Calls run (leaders) and calls that joined one already running (shared), per kind"""
+        return {flight.name: flight.stats()
+                for flight in (self.department_flight, self.file_flight, self.question_flight)}
+
+    def question_key(self, kind, department, question, version):
+        label = department if isinstance(department, str) else '+'.join(department)
+        return kind, label, normalize_question(question), version
+
+    def remember_answer(self, department, version, question, answer):
+        """Cache a complete answer for the corpus version it was generated from"""
+        if self.answer_cache is not None and version and answer and not answer.startswith("Error"):
+            if not isinstance(department, str):
+                department = '+'.join(department)
+            self.answer_cache.put(department, version, question, answer)
+
+    def query_ollama(self, department, question):
+        """Query Ollama with the department-specific context"""
+        version, cached = self.cached_answer(department, question)
+        if cached is not None:
+            self.say("⚡ Answered from the answer cache")
+            return cached
+        
+        key = self.question_key('answer', department, question, version)
+        return self.question_flight.do(key, self._answer, department, question, version)
+
+    def _answer(self, department, question, version):
+        messages = self.build_messages(department, question)
+        if isinstance(messages, str):
+            return messages
+        
         try:
-            print("🤔 Processing your question with AI...")
-            response = ollama.chat(model='llama3.1:8b', messages=[
-                {
-                    'role': 'system',
-                    'content': system_prompt
-                },
-                {
-                    'role': 'user',
-                    'content': question
-                }
-            ])
-            return response['message']['content']
+            self.say("🤔 Processing your question with AI...")
+            backend, response = self.ollama_pool.chat(messages, tier=self.ollama_pool.tier_for(question),
+                                                      keep_alive=self.keep_alive)
+            self.telemetry.count('llm_requests', backend=backend.name, tier=backend.tier)
+            self.record_final_stats({}, response)
+            answer = response['message']['content']
+            self.remember_answer(department, version, question, answer)
+            return answer
         except Exception as e:
             return f"Error in query_ollama: {e}"
 
+    def stream_ollama(self, department, question, stats=None):
+        """Yield answer tokens as Ollama produces them
+
+        Timings are written into `stats` (and last_query_stats) once the
+        stream ends: context build time, time to first token, prefill time
+        and total latency, all measured from when the question arrived.
+        Answers served from the answer cache are yielded whole and marked
+        with stats['cache_hit']. For a list of departments, stats['departments']
+        breaks out retrieval time, passages and tokens per department.
+        stats['backend'] and stats['model'] name the Ollama backend that answered.
+        An identical question already being answered is not sent again: its
+        tokens are replayed as they arrive and stats['coalesced'] is set.
+        When the answer failed, even after part of it was streamed,
+        stats['error'] holds the reason.
+        """
+        stats = {} if stats is None else stats
+        started = time.perf_counter()
+        version, cached = self.cached_answer(department, question)
+        stats['cache_hit'] = cached is not None
+        if cached is not None:
+            stats['context_seconds'] = stats['ttft_seconds'] = stats['total_seconds'] = time.perf_counter() - started
+            self.last_query_stats = stats
+            self.telemetry.observe('query', stats['total_seconds'], cache_hit='true')
+            yield cached
+            return
+        
+        key = self.question_key('stream', department, question, version)
+        broadcast, leader = self.question_flight.begin(key, TokenBroadcast)
+        stats['coalesced'] = not leader
+        if not leader:
+            try:
+                for token in broadcast:
+                    if 'ttft_seconds' not in stats:
+                        stats['ttft_seconds'] = time.perf_counter() - started
+                    yield token
+                if not broadcast.complete:
+                    stats['error'] = "the shared answer was interrupted"
+            finally:
+                stats['total_seconds'] = time.perf_counter() - started
+                self.last_query_stats = stats
+                self.telemetry.observe('query', stats['total_seconds'], cache_hit='false')
+            return
+        
+        complete = False
+        try:
+            for token in self._stream_answer(department, question, version, stats, started):
+                broadcast.publish(token)
+                yield token
+            complete = not stats.get('error')
+        finally:
+            self.question_flight.end(key, broadcast)
+            broadcast.finish(complete)
+
+    def _stream_answer(self, department, question, version, stats, started):
+        context_stats = {}
+        messages = self.build_messages(department, question, context_stats)
+        stats['context_seconds'] = time.perf_counter() - started
+        if not isinstance(department, str):
+            stats['departments'] = context_stats.get('departments', {})
+        if isinstance(messages, str):
+            if messages.startswith("Error"):
+                stats['error'] = messages
+            stats['total_seconds'] = time.perf_counter() - started
+            yield messages
+            return
+        stats['prompt_tokens'] = sum(estimate_tokens(message['content']) for message in messages)
+        
+        tokens = []
+        try:
+            for backend, part in self.ollama_pool.stream_chat(messages, tier=self.ollama_pool.tier_for(question),
+                                                              keep_alive=self.keep_alive):
+                if 'backend' not in stats:
+                    stats['backend'], stats['model'] = backend.host, backend.model
+                    self.telemetry.count('llm_requests', backend=backend.name, tier=backend.tier)
+                token = part['message']['content']
+                if token and 'ttft_seconds' not in stats:
+                    stats['ttft_seconds'] = time.perf_counter() - started
+                if part.get('done'):
+                    self.record_final_stats(stats, part)
+                    self.remember_answer(department, version, question, ''.join(tokens) + token)
+                if token:
+                    tokens.append(token)
+                    yield token
+        except Exception as e:
+            stats['error'] = str(e)
+            yield f"Error in stream_ollama: {e}"
+        finally:
+            stats['total_seconds'] = time.perf_counter() - started
+            self.last_query_stats = stats
+            self.telemetry.observe('query', stats['total_seconds'], cache_hit='false')
+
+    def check_ollama_backends(self, interval=None):
+        """Probe the Ollama backends now and keep probing them in the background; return how many are healthy"""
+        results = self.ollama_pool.start_health_checks(interval)
+        for name, healthy in results.items():
+            print(f"{'✅' if healthy else '⚠️'} Ollama backend {name} {'ready' if healthy else 'unreachable or model missing'}")
+        return sum(results.values())
+
     def get_available_departments(self):
         """Get list of departments that have data available"""
-        print("\n🔍 Scanning for available department data...")
+        self.say("\n🔍 Scanning for available department data...")
         available = []
         
         for department in self.departments:
             try:
-                print(f"\n📊 Checking {department} department...")
-                department_folders = self.find_department_folders()
+                self.say(f"\n📊 Checking {department} department...")
+                weekly_reports = self.get_department_reports(department)
                 
-                if department in department_folders:
-                    weekly_reports = self.discover_weekly_reports(department_folders[department], department)
+                if weekly_reports is not None:
                     if weekly_reports:
                         available.append(department)
-                        print(f"✅ {department} has data available")
+                        self.say(f"✅ {department} has data available")
                     else:
                         print(f"❌ {department} has no supported files")
                 else:
@@ -456,6 +1087,16 @@ def main():
         print("❌ Failed to initialize Google Drive service")
         return
     
+    # Keep a local manifest of reports so questions need no folder listings
+    try:
+        ai.start_drive_sync()
+    except HttpError as error:
+        print(f"⚠️ Drive sync unavailable, falling back to folder scans: {error}")
+        ai.drive_sync = None
+    
+    if not ai.check_ollama_backends():
+        print("⚠️ No Ollama backend is ready - answers will fail until one comes up")
+    
     # Check available departments
     available_departments = ai.get_available_departments()
     
@@ -466,23 +1107,44 @@ def main():
     print(f"\n🎉 Ready! Available Departments: {', '.join(available_departments)}")
     print("Type 'quit' to exit\n")
 
+    by_name = {name.lower(): name for name in ai.departments}
     while True:
-        department = input("Which department do you want to ask about?\nYou: ").lower()
-        if department == 'quit':
+        choice = input("Which department do you want to ask about? ('all' or a comma list for several)\nYou: ").lower()
+        if choice == 'quit':
             break
-        if department not in ai.departments:
+        if choice == 'all':
+            selected = list(available_departments)
+        else:
+            selected = [by_name.get(name.strip(), name.strip()) for name in choice.split(',') if name.strip()]
+        if not selected or any(name not in ai.departments for name in selected):
             print("Invalid department. Please choose from:", ", ".join(ai.departments))
             continue
+        department = selected[0] if len(selected) == 1 else selected
+        label = department if isinstance(department, str) else ' + '.join(selected)
 
-        question = input(f"What is your question for the {department} department?\nYou: ")
+        question = input(f"What is your question for the {label} department?\nYou: ")
 
         if question.lower() == 'quit':
             break
 
         print("\n🤔 Thinking...")
-        answer = ai.query_ollama(department, question)
-        print(f"\n=== {department.upper()} DEPARTMENT ANSWER ===")
-        print(answer)
+        stats = {}
+        header_printed = False
+        for token in ai.stream_ollama(department, question, stats):
+            if not header_printed:
+                print(f"\n=== {label.upper()} DEPARTMENT ANSWER ===")
+                header_printed = True
+            print(token, end='', flush=True)
+        print()
+        if stats.get('cache_hit'):
+            print("⚡ Served from the answer cache")
+        elif 'ttft_seconds' in stats:
+            print(f"⏱️ First token after {stats['ttft_seconds']:.2f}s, full answer in {stats['total_seconds']:.2f}s")
+        for name, timing in stats.get('departments', {}).items():
+            print(f"   {name}: retrieved {timing['passages']} passages ({timing['context_tokens']} tokens) "
+                  f"in {timing['retrieval_seconds']:.2f}s")
+        if 'prefill_seconds' in stats:
+            print(f"🧠 Prefill {stats['prefill_seconds']:.2f}s for {stats['prompt_eval_count']} prompt tokens")
         print("=" * 50 + "\n")
 
 if __name__ == "__main__":
@@ -0,0 +1,377 @@
+# metrics.py
+import re
+import threading
+from collections import Counter
+from datetime import date
+
+import numpy as np
+
+from weeks import report_week
+
+METRIC_LINE = re.compile(r'^\s*[•\-*]?\s*(?P<name>[A-Za-z][A-Za-z0-9 &/()\-.]{1,60}?)\s*:\s*(?P<rest>.+?)\s*$')
+NUMBER = r'-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?'
+VALUE = re.compile(
+    rf'(?P<currency>[$€£])?\s*(?P<number>{NUMBER})'
+    r'(?P<scale>\s*(?:thousand|million|billion)\b|(?:k|K|M|bn|B)\b)?'
+    r'\s*(?P<unit>%|[A-Za-z]+\b)?'
+)
+BULLET = re.compile(r'^(?P<indent>\s*)(?P<marker>[•\-*])?')
+# A bullet with a label and no value, such as '• "Enterprise Solutions" Campaign:'
+PARENT_LINE = re.compile(r'^\s*[•\-*]\s*(?P<name>[^:]{1,80}?)\s*:\s*$')
+DURATION_PART = re.compile(rf'\s*(?P<number>{NUMBER})\s*(?P<unit>[A-Za-z]+)\b')
+
+SCALES = {'thousand': 1e3, 'k': 1e3, 'million': 1e6, 'm': 1e6, 'billion': 1e9, 'bn': 1e9, 'b': 1e9}
+# Durations are stored in seconds so "4 minutes 25 seconds" and "3.2 hours" compare
+DURATIONS = {'s': 1, 'second': 1, 'seconds': 1, 'sec': 1, 'secs': 1, 'minute': 60, 'minutes': 60, 'min': 60, 'mins': 60,
+             'h': 3600, 'hour': 3600, 'hours': 3600, 'hr': 3600, 'hrs': 3600, 'day': 86400, 'days': 86400}
+# Units kept as written; any other word after the number makes the line ambiguous
+UNITS = {'ms', 'KB', 'MB', 'GB', 'TB', 'PB', 'IOPS', 'Mbps', 'Gbps', 'impressions', 'visitors', 'subscribers',
+         'followers', 'users', 'tickets', 'licenses', 'leads', 'articles', 'units', 'endpoints', 'devices',
+         'servers', 'seats', 'employees', 'customers', 'orders', 'downloads', 'sessions', 'clicks'}
+
+# Words that may follow a unit without changing what the amount measures
+QUALIFIER = re.compile(r'\s*(?:average|avg|mean|median|peak|max|maximum|min|minimum|total|overall)\b', re.IGNORECASE)
+
+# Explicit aggregate phrases for each operation, checked in order; everyday words
+# like "now", "current" or "change" are left out so they never trigger a lookup
+OPERATIONS = (
+    ('trend', (r'\btrend\b', r'\btrending\b', r'\bover time\b', r'\bweek over week\b',
+               r'\bhow (?:has|have|did) (?:the )?{metric} (?:changed|change|grown|grow|evolved|moved)\b')),
+    ('average', (r'\baverage\b', r'\bmean\b', r'\bavg\b')),
+    ('total', (r'\btotal of\b', r'\bsum of\b', r'\bcombined\b', r'\bcumulative\b', r'\bin total\b')),
+    ('max', (r'\bhighest\b', r'\bmaximum\b', r'\bpeak\b')),
+    ('min', (r'\blowest\b', r'\bminimum\b')),
+    ('latest', (r'\blatest\b', r'\bmost recent\b')),
+)
+
+# Questions that ask for reasons or plans need the reports, whatever numbers they mention
+REASONING = re.compile(r'\b(?:why|how come|plan|plans|reduce|improve|explain|should|recommend|cause|caused|'
+                       r'reason|reasons|what happened|how can|how do we|strategy)\b')
+
+# Metric names too generic to be the subject of a question, such as budget lines per department
+GENERIC_NAMES = {'it', 'marketing', 'finance', 'operations', 'sales', 'hr', 'admin', 'hr admin', 'r d', 'total',
+                 'status', 'notes', 'note', 'summary', 'week', 'date', 'owner', 'other', 'misc', 'budget'}
+
+
+def _normalize_name(name):
+    return ' '.join(re.findall(r'[a-z0-9]+', name.lower()))
+
+
+def question_operation(question, metric=r'[a-z0-9 ]+?'):
+    """Return the aggregate a question explicitly asks for, or None"""
+    normalized = _normalize_name(question)
+    if REASONING.search(normalized):
+        return None
+    return next((name for name, patterns in OPERATIONS
+                 if any(re.search(pattern.format(metric=metric), normalized) for pattern in patterns)), None)
+
+
+def _number(text):
+    return float(text.replace(',', ''))
+
+
+def parse_value(text):
+    """Return (value, unit) for a cleanly written amount, or None
+
+    Accepts a number with an optional currency, scale word (thousand,
+    million, billion, k, M, bn), a known unit or a compound duration, one
+    qualifier word after a unit ("45,000 IOPS average", "68% peak") and at
+    most a parenthesised note after that. Anything else, such as
+    "1,245 this quarter" or "180 switches, 45 routers", is rejected.
+    """
+    match = VALUE.match(text)
+    if not match:
+        return None
+    value = _number(match.group('number'))
+    scale = (match.group('scale') or '').strip()
+    if scale:
+        value *= SCALES[scale.lower()]
+    unit = match.group('unit') or ''
+    end = match.end()
+
+    if unit.lower() in DURATIONS and not match.group('currency'):
+        value *= DURATIONS[unit.lower()]
+        while True:
+            part = DURATION_PART.match(text, end)
+            if not part or part.group('unit').lower() not in DURATIONS:
+                break
+            value += _number(part.group('number')) * DURATIONS[part.group('unit').lower()]
+            end = part.end()
+        unit = 'seconds'
+    elif unit and unit != '%' and unit not in UNITS:
+        return None
+    elif match.group('currency'):
+        if unit and unit != '%':
+            return None
+        unit = match.group('currency')
+
+    qualifier = QUALIFIER.match(text, end)
+    if qualifier and unit:
+        end = qualifier.end()
+    rest = text[end:].strip()
+    if rest and not rest.startswith('('):
+        return None
+    return value, unit
+
+
+def parse_metrics(text):
+    """Yield (name, value, unit) for every "Name: amount" line of a report that parses cleanly
+
+    Lines nested under a bullet that has no value of its own, like the
+    "- Reach:" lines under each '• "Enterprise Solutions" Campaign:', are
+    named after that bullet as well ("Enterprise Solutions Campaign Reach").
+    A name that still occurs more than once in the report is dropped, since
+    its values could not be told apart from one week to the next.
+    """
+    rows, parent = [], None
+    for line in text.splitlines():
+        bullet = BULLET.match(line)
+        indent, marker = len(bullet.group('indent')), bullet.group('marker')
+        # A nested line is indented deeper, or uses another bullet at the same depth
+        if parent is not None and not (line.strip() and (indent > parent[0] or (indent == parent[0]
+                                                                                and marker and marker != parent[1]))):
+            parent = None
+        heading = PARENT_LINE.match(line)
+        if heading and marker:
+            parent = (indent, marker, ' '.join(re.sub(r'["“”]', ' ', heading.group('name')).split()))
+            continue
+        match = METRIC_LINE.match(line)
+        if not match:
+            continue
+        parsed = parse_value(match.group('rest'))
+        if parsed is not None:
+            name = match.group('name').strip()
+            rows.append((f"{parent[2]} {name}" if parent else name, parsed[0], parsed[1]))
+
+    counts = Counter(_normalize_name(name) for name, _, _ in rows)
+    for name, value, unit in rows:
+        if counts[_normalize_name(name)] == 1:
+            yield name, value, unit
+
+
+def week_ordinal(year, week):
+    """Number weeks consecutively across years, so Week 1 follows the year's last ISO week"""
+    if not year:
+        return int(week)
+    try:
+        return date.fromisocalendar(int(year), int(week), 1).toordinal() // 7
+    except ValueError:
+        return date.fromisocalendar(int(year), 1, 1).toordinal() // 7 + int(week) - 1
+
+
+def format_value(value, unit):
+    if unit == 'seconds':
+        if value < 0:
+            return '-' + format_value(-value, unit)
+        parts = [(value // 3600, 'h'), (value % 3600 // 60, 'min'), (value % 60, 's')]
+        text = ' '.join(f"{amount:g} {label}" for amount, label in parts if amount)
+        return text or '0 s'
+    number = f"{value:,.0f}" if abs(value) >= 1000 or value == int(value) else f"{value:,.2f}"
+    if unit in ('$', '€', '£'):
+        return f"{unit}{number}"
+    if unit == '%':
+        return f"{number}%"
+    return f"{number} {unit}".strip()
+
+
+class MetricStore:
+    """Columnar table of report metrics: one row per (department, report, metric)
+
+    Rows live in parallel NumPy arrays (department id, file id, year, week,
+    metric id, value) with small dictionaries for the ids, so an aggregate over a
+    metric is a boolean mask and a reduction instead of an LLM reading every
+    report.
+    """
+
+    COLUMNS = (('department', np.int16), ('file', np.int32), ('year', np.int16), ('week', np.int32),
+               ('metric', np.int32), ('value', np.float64))
+
+    def __init__(self):
+        self.departments = {}     # name -> id
+        self.files = {}           # file_id -> (id, version)
+        self.metrics = {}         # normalized name -> id
+        self.metric_names = []    # id -> (display name, unit)
+        self.columns = {name: np.zeros(0, dtype=dtype) for name, dtype in self.COLUMNS}
+        self._pending = []
+        self._next_file = 0
+        self._lock = threading.Lock()
+
+    def has_report(self, file_id, version):
+        with self._lock:
+            return self.files.get(file_id, (None, None))[1] == version
+
+    def _id(self, table, key):
+        if key not in table:
+            table[key] = len(table)
+        return table[key]
+
+    def add_report(self, department, report_info, version, text):
+        """Replace a report's rows with the metrics parsed from its text; return the metric count
+
+        The week and year come from index_reports(); reports without a week
+        number are stored with week -1 and left out of every series.
+        """
+        file_id = report_info['id']
+        week, year = report_info.get('week'), report_info.get('year')
+        if 'week' not in report_info:
+            week, year = report_week(report_info['name'], report_info.get('modifiedTime', ''))
+        week = -1 if week is None else week
+        year = year or 0
+        rows = list(parse_metrics(text))
+        with self._lock:
+            self._remove(file_id)
+            department_id = self._id(self.departments, department)
+            file_index = self._next_file
+            self._next_file += 1
+            self.files[file_id] = (file_index, version)
+            for name, value, unit in rows:
+                key = _normalize_name(name)
+                if key not in self.metrics:
+                    self.metrics[key] = len(self.metric_names)
+                    self.metric_names.append((name, unit))
+                self._pending.append((department_id, file_index, year, week, self.metrics[key], value))
+        return len(rows)
+
+    def _remove(self, file_id):
+        entry = self.files.pop(file_id, None)
+        if entry is None:
+            return
+        self._flush()
+        keep = self.columns['file'] != entry[0]
+        self.columns = {name: column[keep] for name, column in self.columns.items()}
+
+    def remove_report(self, file_id):
+        with self._lock:
+            self._remove(file_id)
+
+    def prune(self, department, current_ids):
+        """Drop rows of reports that are no longer in the department"""
+        with self._lock:
+            department_id = self.departments.get(department)
+            if department_id is None:
+                return
+            self._flush()
+            present = set(self.columns['file'][self.columns['department'] == department_id].tolist())
+            for file_id, (index, _) in list(self.files.items()):
+                if index in present and file_id not in current_ids:
+                    self._remove(file_id)
+
+    def _flush(self):
+        """Append rows buffered by add_report to the column arrays"""
+        if not self._pending:
+            return
+        pending = np.array(self._pending, dtype=np.float64).T
+        self.columns = {
+            name: np.concatenate([self.columns[name], pending[i].astype(dtype)])
+            for i, (name, dtype) in enumerate(self.COLUMNS)
+        }
+        self._pending = []
+
+    def find_metric(self, department, question):
+        """Return the id of the longest metric name of the department that appears as a phrase in the question"""
+        normalized = f" {_normalize_name(question)} "
+        with self._lock:
+            self._flush()
+            department_id = self.departments.get(department)
+            if department_id is None:
+                return None
+            available = set(self.columns['metric'][self.columns['department'] == department_id].tolist())
+        candidates = [
+            (len(key.split()), metric_id) for key, metric_id in self.metrics.items()
+            if metric_id in available and key not in GENERIC_NAMES and f" {key} " in normalized
+        ]
+        return max(candidates)[1] if candidates else None
+
+    def series(self, department, metric_id, file_ids=None):
+        """Return (years, weeks, values) for a metric sorted by (year, week), optionally only from some files"""
+        with self._lock:
+            self._flush()
+            department_id = self.departments.get(department)
+            mask = (self.columns['department'] == department_id) & (self.columns['metric'] == metric_id)
+            mask &= self.columns['week'] >= 0
+            if file_ids is not None:
+                indexes = [self.files[file_id][0] for file_id in file_ids if file_id in self.files]
+                mask &= np.isin(self.columns['file'], indexes)
+            years = self.columns['year'][mask]
+            weeks = self.columns['week'][mask]
+            values = self.columns['value'][mask]
+        order = np.lexsort((weeks, years))
+        return years[order], weeks[order], values[order]
+
+    def answer(self, department, question, file_ids=None):
+        """Compute an aggregate for a metric question, or return None when it is not one
+
+        file_ids limits the rows to the reports a period in the question
+        selected (see DepartmentAI.select_reports); without it every report
+        of the department is used.
+        """
+        if question_operation(question) is None:
+            return None
+        metric_id = self.find_metric(department, question)
+        if metric_id is None:
+            return None
+        # The aggregate must apply to this metric, e.g. "how has <metric> changed"
+        operation = question_operation(question, re.escape(_normalize_name(self.metric_names[metric_id][0])))
+        if operation is None:
+            return None
+
+        years, weeks, values = self.series(department, metric_id, file_ids)
+        if not len(values):
+            return None
+
+        # Name the year only when the rows span more than one
+        if len(set(years.tolist())) > 1:
+            labels = [f"Week {week} of {year}" if year else f"Week {week}" for year, week in zip(years, weeks)]
+        else:
+            labels = [f"Week {week}" for week in weeks]
+        name, unit = self.metric_names[metric_id]
+        result = {
+            'metric': name,
+            'unit': unit,
+            'operation': operation,
+            'weeks': labels,
+            'series': [format_value(value, unit) for value in values]
+        }
+        if operation == 'average':
+            result['value'] = float(values.mean())
+        elif operation == 'total':
+            result['value'] = float(values.sum())
+        elif operation == 'max':
+            result['value'] = float(values.max())
+            result['week'] = labels[int(values.argmax())]
+        elif operation == 'min':
+            result['value'] = float(values.min())
+            result['week'] = labels[int(values.argmin())]
+        elif operation == 'latest':
+            result['value'] = float(values[-1])
+            result['week'] = labels[-1]
+        else:
+            result['first'], result['last'] = float(values[0]), float(values[-1])
+            result['value'] = result['last'] - result['first']
+            result['percent_change'] = (result['value'] / result['first'] * 100) if result['first'] else None
+            # Least-squares slope per week, counting weeks across year boundaries
+            ordinals = np.array([week_ordinal(year, week) for year, week in zip(years, weeks)])
+            result['slope'] = float(np.polyfit(ordinals, values, 1)[0]) if len(set(ordinals.tolist())) > 1 else 0.0
+        return result
+
+
+def describe(result):
+    """Render a computed metric result as plain sentences for the LLM to phrase"""
+    name, unit = result['metric'], result['unit']
+    weeks = result['weeks']
+    span = weeks[0] if len(weeks) == 1 else f"{weeks[0]} to {weeks[-1]} ({len(weeks)} reports)"
+    operation = result['operation']
+    if operation == 'trend':
+        change = format_value(result['value'], unit)
+        percent = f" ({result['percent_change']:+.1f}%)" if result['percent_change'] is not None else ''
+        text = (f"{name} went from {format_value(result['first'], unit)} in {weeks[0]} to "
+                f"{format_value(result['last'], unit)} in {weeks[-1]}, a change of {change}{percent}; "
+                f"fitted trend {format_value(result['slope'], unit)} per week.")
+    elif operation in ('max', 'min', 'latest'):
+        label = {'max': 'Highest', 'min': 'Lowest', 'latest': 'Latest'}[operation]
+        text = f"{label} {name} over {span}: {format_value(result['value'], unit)} in {result['week']}."
+    else:
+        label = 'Average' if operation == 'average' else 'Total'
+        text = f"{label} {name} over {span}: {format_value(result['value'], unit)}."
+    series = ', '.join(f"{week}: {value}" for week, value in zip(weeks, result['series']))
+    return f"{text}\nWeekly values: {series}"
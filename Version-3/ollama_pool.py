@@ -0,0 +1,270 @@
+# ollama_pool.py
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import ollama
+
+# host[=model][*max concurrent][@tier], e.g. http://gpu2:11434=llama3.2:3b*2@small
+BACKEND_SPEC = re.compile(r'^(?P<host>[^=*]+?)(?:=(?P<model>[^*]+?))?(?:\*(?P<cap>\d+))?(?:@(?P<tier>small|large))?$')
+
+# Words that make a question worth the larger model
+COMPLEX_WORDS = ('why', 'explain', 'compare', 'comparison', 'analyze', 'analyse', 'analysis', 'summarize',
+                 'summarise', 'summary', 'recommend', 'should', 'impact', 'cause', 'plan', 'strategy', 'risk',
+                 'trend', 'versus', 'vs')
+
+
+def question_tier(question, max_words=12):
+    """'small' for short lookups, 'large' for anything that needs reasoning"""
+    words = re.findall(r'[a-z0-9]+', question.lower())
+    if len(words) > max_words or any(word in COMPLEX_WORDS for word in words):
+        return 'large'
+    return 'small'
+
+
+class Backend:
+    """One Ollama host serving one model, with a cap on requests in flight"""
+
+    def __init__(self, host, model, max_concurrent=4, tier='large'):
+        self.host = host
+        self.model = model
+        self.max_concurrent = max_concurrent
+        self.tier = tier
+        self.client = ollama.Client(host=host)
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.healthy = True
+        self.checked_at = 0.0
+        self._async_client = None
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = ollama.AsyncClient(host=self.host)
+        return self._async_client
+
+    @property
+    def name(self):
+        return f"{self.host}={self.model}"
+
+    def check(self):
+        """Healthy when the host answers and has the model pulled"""
+        try:
+            models = ollama.Client(host=self.host, timeout=2).list()['models']
+            names = {model['model'] for model in models}
+            return self.model in names or f"{self.model}:latest" in names
+        except Exception:
+            return False
+
+    def stats(self):
+        return {
+            'host': self.host,
+            'model': self.model,
+            'tier': self.tier,
+            'healthy': self.healthy,
+            'checked': self.checked_at > 0,
+            'outstanding': self.outstanding,
+            'max_concurrent': self.max_concurrent,
+            'requests': self.requests,
+            'failures': self.failures
+        }
+
+
+def parse_backend(spec, default_model='llama3.1:8b', default_concurrent=4):
+    """Build a Backend from host[=model][*max concurrent][@tier]"""
+    match = BACKEND_SPEC.match(spec.strip())
+    if not match:
+        raise ValueError(f"Invalid Ollama backend: {spec}")
+    return Backend(match.group('host'), match.group('model') or default_model,
+                   int(match.group('cap') or default_concurrent), match.group('tier') or 'large')
+
+
+class BackendPool:
+    """Routes chat requests across several Ollama backends
+
+    Each request goes to the healthy backend of the wanted tier with the
+    fewest requests in flight; when every such backend is at its cap the
+    caller waits for a slot. A backend that fails to connect or returns a
+    server error is marked unhealthy, the request moves to the next backend,
+    and the failed one is probed again after `health_interval` seconds.
+    With no backend in a tier, requests for it use the other tier.
+    start_health_checks() probes every backend up front and then
+    periodically, so backends are not assumed healthy before a request
+    has reached them.
+    """
+
+    def __init__(self, backends, health_interval=15.0, route_by_question=True):
+        if not backends:
+            raise ValueError("An Ollama backend pool needs at least one backend")
+        self.backends = list(backends)
+        self.health_interval = health_interval
+        self.route_by_question = route_by_question
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_specs(cls, specs, default_model='llama3.1:8b', default_concurrent=4, **kwargs):
+        return cls([parse_backend(spec, default_model, default_concurrent) for spec in specs], **kwargs)
+
+    @property
+    def tiers(self):
+        return {backend.tier for backend in self.backends}
+
+    def tier_for(self, question):
+        """The tier to route a question to; only splits when both tiers exist"""
+        if not self.route_by_question or self.tiers != {'small', 'large'}:
+            return None
+        return question_tier(question)
+
+    def check_health(self):
+        """Probe every backend now; return {name: healthy}"""
+        results = {backend.name: backend.check() for backend in self.backends}
+        with self._condition:
+            for backend in self.backends:
+                backend.healthy = results[backend.name]
+                backend.checked_at = time.monotonic()
+            self._condition.notify_all()
+        return results
+
+    def start_health_checks(self, interval=None):
+        """Probe every backend now and then every interval seconds in a background thread; return the first results"""
+        results = self.check_health()
+        if self._thread and self._thread.is_alive():
+            return results
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval or self.health_interval):
+                try:
+                    self.check_health()
+                except Exception as e:
+                    print(f"❌ Ollama health check failed: {e}")
+
+        self._thread = threading.Thread(target=run, name='ollama-health', daemon=True)
+        self._thread.start()
+        return results
+
+    def stop_health_checks(self):
+        """Stop the background health checks"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _recheck_due(self):
+        """Probe unhealthy backends whose retry time has come, outside the lock"""
+        now = time.monotonic()
+        with self._condition:
+            due = [backend for backend in self.backends
+                   if not backend.healthy and now - backend.checked_at >= self.health_interval]
+            for backend in due:
+                backend.checked_at = now
+        for backend in due:
+            if backend.check():
+                with self._condition:
+                    backend.healthy = True
+                    self._condition.notify_all()
+
+    def _candidates(self, tier, exclude):
+        untried = [backend for backend in self.backends if backend not in exclude]
+        # With every backend down, still try them rather than fail without a request
+        healthy = [backend for backend in untried if backend.healthy] or untried
+        wanted = [backend for backend in healthy if tier is None or backend.tier == tier]
+        return wanted or healthy
+
+    def acquire(self, tier=None, exclude=(), timeout=None):
+        """Block until a backend has a free slot and claim it; None when every backend is excluded"""
+        self._recheck_due()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                candidates = self._candidates(tier, exclude)
+                if not candidates:
+                    return None
+                free = [backend for backend in candidates if backend.outstanding < backend.max_concurrent]
+                if free:
+                    backend = min(free, key=lambda item: (item.outstanding, item.requests))
+                    backend.outstanding += 1
+                    backend.requests += 1
+                    return backend
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def release(self, backend, failed=False):
+        with self._condition:
+            backend.outstanding -= 1
+            if failed:
+                backend.failures += 1
+                backend.healthy = False
+                backend.checked_at = time.monotonic()
+            self._condition.notify_all()
+
+    @contextmanager
+    def lease(self, tier=None, exclude=()):
+        """Hold a backend slot for the duration of a block"""
+        backend = self.acquire(tier, exclude)
+        if backend is None:
+            raise ConnectionError("No Ollama backend could answer")
+        failed = False
+        try:
+            yield backend
+        except Exception as e:
+            failed = is_backend_error(e)
+            raise
+        finally:
+            self.release(backend, failed)
+
+    def chat(self, messages, tier=None, **kwargs):
+        """Non-streaming chat on the best backend; returns (backend, response)"""
+        tried = []
+        while True:
+            backend = self.acquire(tier, tried)
+            if backend is None:
+                raise ConnectionError(f"No Ollama backend could answer ({len(tried)} tried)")
+            tried.append(backend)
+            try:
+                response = backend.client.chat(model=backend.model, messages=messages, **kwargs)
+            except Exception as e:
+                self.release(backend, failed=is_backend_error(e))
+                if is_backend_error(e):
+                    continue
+                raise
+            self.release(backend)
+            return backend, response
+
+    def stream_chat(self, messages, tier=None, **kwargs):
+        """Streaming chat yielding (backend, part); moves to another backend if one fails before its first part"""
+        tried = []
+        while True:
+            backend = self.acquire(tier, tried)
+            if backend is None:
+                raise ConnectionError(f"No Ollama backend could answer ({len(tried)} tried)")
+            tried.append(backend)
+            started = failed = False
+            try:
+                for part in backend.client.chat(model=backend.model, messages=messages, stream=True, **kwargs):
+                    started = True
+                    yield backend, part
+                return
+            except Exception as e:
+                failed = is_backend_error(e)
+                if started or not failed:
+                    raise
+            finally:
+                self.release(backend, failed)
+
+    def stats(self):
+        with self._condition:
+            return [backend.stats() for backend in self.backends]
+
+
+def is_backend_error(error):
+    """Errors that say the backend, not the request, is at fault"""
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code >= 500 or error.status_code == 404
+    return isinstance(error, (ConnectionError, OSError)) or type(error).__module__.startswith('httpx')
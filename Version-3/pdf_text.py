@@ -0,0 +1,172 @@
+# pdf_text.py
+import multiprocessing
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+PAGES_PER_TASK = 8
+
+# (path, mtime) and reader of the last PDF opened in this process
+_open_reader = (None, None)
+
+
+class PypdfExtractor:
+    """Pure-Python extractor backed by the optional pypdf package"""
+
+    name = 'pypdf'
+
+    @staticmethod
+    def available():
+        return pypdf is not None
+
+    @staticmethod
+    def reader(path):
+        """Open path once per process; later batches of the same file reuse the parsed xref"""
+        global _open_reader
+        key = (path, os.stat(path).st_mtime_ns)
+        if _open_reader[0] != key:
+            _open_reader = (key, pypdf.PdfReader(path))
+        return _open_reader[1]
+
+    def page_count(self, path):
+        return len(self.reader(path).pages)
+
+    def extract_pages(self, path, start, stop):
+        reader = self.reader(path)
+        return [(reader.pages[index].extract_text() or '').strip() for index in range(start, stop)]
+
+
+class PdftotextExtractor:
+    """Extractor that shells out to poppler's pdftotext and pdfinfo"""
+
+    name = 'pdftotext'
+
+    @staticmethod
+    def available():
+        return shutil.which('pdftotext') is not None and shutil.which('pdfinfo') is not None
+
+    def page_count(self, path):
+        info = subprocess.run(['pdfinfo', path], capture_output=True, text=True, check=True).stdout
+        for line in info.splitlines():
+            if line.startswith('Pages:'):
+                return int(line.split(':', 1)[1])
+        return 0
+
+    def extract_pages(self, path, start, stop):
+        output = subprocess.run(
+            ['pdftotext', '-layout', '-f', str(start + 1), '-l', str(stop), path, '-'],
+            capture_output=True, text=True, check=True
+        ).stdout
+        # pdftotext ends every page with a form feed
+        pages = [page.strip() for page in output.split('\f')][:stop - start]
+        return pages + [''] * (stop - start - len(pages))
+
+
+EXTRACTORS = {extractor.name: extractor for extractor in (PypdfExtractor, PdftotextExtractor)}
+
+
+def get_extractor(name=None):
+    """Return an instance of the named extractor, or of the first one available"""
+    if name is not None:
+        extractor = EXTRACTORS[name]
+        return extractor() if extractor.available() else None
+    for extractor in EXTRACTORS.values():
+        if extractor.available():
+            return extractor()
+    return None
+
+
+def _extract_pages(extractor, path, start, stop):
+    """Process pool entry point: extract pages [start, stop) of one file"""
+    return extractor.extract_pages(path, start, stop)
+
+
+class PdfTextExtractor:
+    """Extracts PDF text page by page across a process pool with a per-page cache
+
+    Pages are handed to workers in small batches and yielded in order as soon
+    as they are ready, so callers that stop early never pay for the rest of
+    the file. Every extracted page is written to the page cache, keyed by
+    file id and version, so an interrupted or repeated extraction only works
+    on the pages it has not seen.
+    """
+
+    def __init__(self, extractor=None, workers=None, pages_per_task=PAGES_PER_TASK, page_cache=None):
+        self.extractor = extractor if extractor is not None else get_extractor()
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.page_cache = page_cache
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: the pool is created from a threaded process
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def iter_pages(self, path, file_id=None, version=None):
+        """Yield (page_number, text) for every page of the PDF at path, in order"""
+        if self.extractor is None:
+            raise RuntimeError("No PDF extractor available; install pypdf or poppler-utils")
+
+        page_count = self.extractor.page_count(path)
+        use_cache = self.page_cache is not None and file_id is not None and version is not None
+        cached = {}
+        if use_cache:
+            cached = self.page_cache.get_pages(file_id, version)
+
+        batches = []
+        start = 0
+        while start < page_count:
+            stop = min(start + self.pages_per_task, page_count)
+            if not all(page in cached for page in range(start, stop)):
+                batches.append((start, stop))
+            start = stop
+
+        if len(batches) <= 1 or self.workers == 1:
+            # Too little work to be worth shipping to another process
+            pending = {batch: None for batch in batches}
+        else:
+            pool = self._get_pool()
+            # Keep a bounded window in flight so large files stay lazy
+            window = self.workers * 2
+            pending = {}
+            for batch in batches[:window]:
+                pending[batch] = pool.submit(_extract_pages, self.extractor, path, *batch)
+            queued = iter(batches[window:])
+
+        for index in range(page_count):
+            if index in cached:
+                yield index + 1, cached[index]
+                continue
+
+            batch = next(batch for batch in pending if batch[0] <= index < batch[1])
+            future = pending.pop(batch)
+            texts = future.result() if future is not None else self.extractor.extract_pages(path, *batch)
+            if future is not None:
+                following = next(queued, None)
+                if following is not None:
+                    pending[following] = self._pool.submit(_extract_pages, self.extractor, path, *following)
+
+            extracted = dict(zip(range(*batch), texts))
+            cached.update(extracted)
+            if use_cache:
+                self.page_cache.put_pages(file_id, version, extracted)
+            yield index + 1, cached[index]
+
+    def extract_text(self, path, file_id=None, version=None):
+        """Return the text of every page, separated by page markers"""
+        return '\n\n'.join(
+            f"[Page {number}]\n{text}" for number, text in self.iter_pages(path, file_id, version) if text
+        )
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,69 @@
+# prompt_cache.py
+import hashlib
+import os
+import threading
+
+from content_cache import report_version
+
+
+def corpus_version(weekly_reports):
+    """Fingerprint a department's reports from their ids and versions"""
+    digest = hashlib.sha1()
+    for report_info in sorted(weekly_reports.values(), key=lambda info: info['id']):
+        digest.update(f"{report_info['id']}|{report_version(report_info)}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class PromptCache:
+    """Rendered system prompts per department, reused until the template or the reports change
+
+    The template file is re-read only when its mtime changes. A rendered
+    prompt is stored under (department, corpus version, mode), so the text
+    sent for a department stays byte-identical between questions - which is
+    what lets Ollama reuse the KV cache of that prefix.
+    """
+
+    def __init__(self, template_path='ai_prompt.txt'):
+        self.template_path = template_path
+        self.hits = 0
+        self.misses = 0
+        self._template = (None, None)
+        self._rendered = {}
+        self._lock = threading.Lock()
+
+    def template(self):
+        """Return the template text, reading the file again only if it changed"""
+        mtime = os.stat(self.template_path).st_mtime_ns
+        with self._lock:
+            if self._template[0] != mtime:
+                with open(self.template_path, 'r', encoding='utf-8') as f:
+                    self._template = (mtime, f.read())
+                self._rendered.clear()
+            return self._template[1]
+
+    def get_or_render(self, department, version, mode, render):
+        """Return the cached prompt for this key, calling render(template) on a miss"""
+        template = self.template()
+        key = (department, mode)
+        with self._lock:
+            cached = self._rendered.get(key)
+            if cached is not None and cached[0] == version:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        rendered = render(template)
+        if not rendered.startswith("Error"):
+            with self._lock:
+                self._rendered[key] = (version, rendered)
+        return rendered
+
+    def invalidate(self, department=None):
+        """Forget rendered prompts for one department, or for all of them"""
+        with self._lock:
+            for key in [key for key in self._rendered if department is None or key[0] == department]:
+                del self._rendered[key]
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._rendered)}
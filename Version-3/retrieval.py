@@ -0,0 +1,305 @@
+# retrieval.py
+import math
+import re
+import threading
+from collections import Counter
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+(?:[.,:/-][a-z0-9]+)*')
+
+
+def estimate_tokens(text):
+    """Rough llama token count: about four characters per token"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def tokenize(text):
+    """Lowercase terms, keeping numbers like 99.95, 45,000 and Week-12 intact"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def chunk_text(text, chunk_tokens=300, overlap_tokens=50):
+    """Split text into overlapping chunks on line boundaries"""
+    lines = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if estimate_tokens(line) <= chunk_tokens:
+            lines.append(line)
+            continue
+        # Break very long lines on words
+        words, current = line.split(), []
+        for word in words:
+            if current and estimate_tokens(' '.join(current + [word])) > chunk_tokens:
+                lines.append(' '.join(current))
+                current = []
+            current.append(word)
+        if current:
+            lines.append(' '.join(current))
+
+    chunks, current, current_tokens = [], [], 0
+    for line in lines:
+        line_tokens = estimate_tokens(line)
+        if current and current_tokens + line_tokens > chunk_tokens:
+            chunks.append('\n'.join(current))
+            # Carry trailing lines forward as overlap
+            overlap, overlap_size = [], 0
+            for previous in reversed(current):
+                size = estimate_tokens(previous)
+                if overlap_size + size > overlap_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += size
+            current, current_tokens = overlap, overlap_size
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+
+def reciprocal_rank_fusion(rankings, k=60, top_k=None):
+    """Fuse several ranked lists of (score, key) into one by reciprocal rank"""
+    fused = {}
+    for ranking in rankings:
+        for rank, (score, key) in enumerate(ranking):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+    ranked = sorted(((score, key) for key, score in fused.items()), key=lambda item: -item[0])
+    return ranked[:top_k] if top_k else ranked
+
+
+class RetrievalIndex:
+    """Per-department index of report chunks
+
+    Chunks are scored lexically (BM25 when a lexical index is attached,
+    TF-IDF otherwise) and by embedding similarity when a VectorStore is
+    attached. With both, the two rankings are merged by reciprocal rank
+    fusion.
+    """
+
+    def __init__(self, chunk_tokens=300, overlap_tokens=50, vector_store=None, lexical_index=None):
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.vector_store = vector_store
+        self.lexical_index = lexical_index
+        self.chunks = {}          # department -> {chunk_id: chunk}
+        self.reports = {}         # department -> {file_id: (version, [chunk_ids])}
+        self.doc_freq = {}        # department -> Counter(term -> number of chunks)
+        self.positions = {}       # department -> {(file_id, position): chunk_id}
+        self._next_id = 0
+        self._lock = threading.RLock()
+
+    def has_report(self, department, file_id, version):
+        with self._lock:
+            entry = self.reports.get(department, {}).get(file_id)
+            return entry is not None and entry[0] == version
+
+    def report_ids(self, department):
+        with self._lock:
+            return set(self.reports.get(department, {}))
+
+    def add_report(self, department, report_name, file_id, version, text, order=()):
+        """Chunk a report and add it, replacing any older version of the same file
+
+        order is a sort key that places the report in time, e.g. its
+        (year, week); selected passages are returned in that order. Chunking and embedding run outside the index lock, so searches and
+        other departments are not held up by the embedding model; the new
+        chunks and vectors are then swapped in together under the lock.
+        """
+        texts = chunk_text(text, self.chunk_tokens, self.overlap_tokens)
+        vectors = None
+        # Only embed when the stored vectors are missing or stale
+        if self.vector_store is not None and not self.vector_store.has_report(department, file_id, version):
+            vectors = self.vector_store.embed_chunks(texts)
+
+        with self._lock:
+            self._drop_chunks(department, file_id)
+            chunks = self.chunks.setdefault(department, {})
+            positions = self.positions.setdefault(department, {})
+            doc_freq = self.doc_freq.setdefault(department, Counter())
+            chunk_ids = []
+
+            for position, chunk in enumerate(texts):
+                terms = Counter(tokenize(chunk))
+                chunk_id = self._next_id
+                self._next_id += 1
+                chunks[chunk_id] = {
+                    'id': chunk_id,
+                    'department': department,
+                    'report': report_name,
+                    'order': order,
+                    'file_id': file_id,
+                    'position': position,
+                    'text': chunk,
+                    'tokens': estimate_tokens(chunk),
+                    'terms': terms
+                }
+                doc_freq.update(terms.keys())
+                positions[(file_id, position)] = chunk_id
+                chunk_ids.append(chunk_id)
+                if self.lexical_index is not None:
+                    self.lexical_index.add_document(department, file_id, chunk_id, chunk)
+
+            self.reports.setdefault(department, {})[file_id] = (version, chunk_ids)
+
+            if vectors is not None:
+                self.vector_store.add_report(department, file_id, version, report_name, texts, vectors)
+            return len(chunk_ids)
+
+    def _drop_chunks(self, department, file_id):
+        entry = self.reports.get(department, {}).pop(file_id, None)
+        if entry is None:
+            return 0
+        chunks = self.chunks[department]
+        positions = self.positions[department]
+        doc_freq = self.doc_freq[department]
+        for chunk_id in entry[1]:
+            chunk = chunks.pop(chunk_id)
+            positions.pop((file_id, chunk['position']), None)
+            doc_freq.subtract(chunk['terms'].keys())
+        doc_freq += Counter()  # drop zero counts
+        self.doc_freq[department] = doc_freq
+        if self.lexical_index is not None:
+            self.lexical_index.remove_file(department, file_id)
+        return len(entry[1])
+
+    def remove_report(self, department, file_id):
+        """Drop all chunks (and vectors) that came from a file"""
+        with self._lock:
+            removed = self._drop_chunks(department, file_id)
+            if self.vector_store is not None:
+                self.vector_store.remove_report(department, file_id)
+            return removed
+
+    def prune(self, department, current_ids):
+        """Remove every report whose file is no longer in the department"""
+        with self._lock:
+            stale = self.report_ids(department)
+            if self.vector_store is not None:
+                stale |= self.vector_store.report_ids(department)
+            stale -= set(current_ids)
+            for file_id in stale:
+                self.remove_report(department, file_id)
+            return len(stale)
+
+    def search(self, department, question, top_k=8, file_ids=None):
+        """Return the top_k (score, chunk) pairs for a question, optionally only from the given files"""
+        lexical = self.lexical_search(department, question, top_k * 2, file_ids)
+        if self.vector_store is None:
+            return lexical[:top_k]
+
+        semantic = self.vector_search(department, question, top_k * 2, file_ids)
+        with self._lock:
+            chunks = self.chunks.get(department, {})
+            fused = reciprocal_rank_fusion(
+                [[(score, chunk['id']) for score, chunk in ranking] for ranking in (lexical, semantic)],
+                top_k=top_k
+            )
+            return [(score, chunks[chunk_id]) for score, chunk_id in fused if chunk_id in chunks]
+
+    def _candidates(self, department, top_k, file_ids):
+        """How many hits to ask an index for so that top_k survive the file filter"""
+        if file_ids is None:
+            return top_k
+        with self._lock:
+            return max(top_k, len(self.chunks.get(department, {})))
+
+    def vector_search(self, department, question, top_k=8, file_ids=None):
+        """Rank chunks by embedding similarity"""
+        hits = self.vector_store.search(department, question, self._candidates(department, top_k, file_ids))
+        with self._lock:
+            positions = self.positions.get(department, {})
+            chunks = self.chunks.get(department, {})
+            return [
+                (score, chunks[positions[(file_id, position)]])
+                for score, file_id, position in hits
+                if (file_id, position) in positions and (file_ids is None or file_id in file_ids)
+            ][:top_k]
+
+    def lexical_search(self, department, question, top_k=8, file_ids=None):
+        """Rank chunks by BM25, or by TF-IDF term overlap without a lexical index"""
+        if self.lexical_index is not None:
+            hits = self.lexical_index.search(department, question, self._candidates(department, top_k, file_ids))
+            with self._lock:
+                chunks = self.chunks.get(department, {})
+                return [
+                    (score, chunks[chunk_id])
+                    for score, chunk_id in hits
+                    if chunk_id in chunks and (file_ids is None or chunks[chunk_id]['file_id'] in file_ids)
+                ][:top_k]
+
+        with self._lock:
+            chunks = self.chunks.get(department, {})
+            if not chunks:
+                return []
+            doc_freq = self.doc_freq[department]
+            total = len(chunks)
+            query_terms = set(tokenize(question))
+            idf = {
+                term: math.log(1 + total / doc_freq[term])
+                for term in query_terms if doc_freq.get(term)
+            }
+
+            scored = []
+            for chunk in chunks.values():
+                if file_ids is not None and chunk['file_id'] not in file_ids:
+                    continue
+                terms = chunk['terms']
+                score = sum((1 + math.log(terms[term])) * weight for term, weight in idf.items() if term in terms)
+                if score > 0:
+                    scored.append((score / math.sqrt(chunk['tokens']), chunk))
+
+            scored.sort(key=lambda item: (-item[0], item[1]['id']))
+            return scored[:top_k]
+
+    def select_context(self, department, question, top_k=8, token_budget=3000, file_ids=None):
+        """Pick the best passages that fit in the token budget"""
+        selected, used = [], 0
+        for score, chunk in self.search(department, question, top_k, file_ids):
+            if used + chunk['tokens'] > token_budget:
+                continue
+            selected.append(chunk)
+            used += chunk['tokens']
+
+        # Keep report order so the model reads passages chronologically
+        selected.sort(key=lambda chunk: (chunk['order'], chunk['report'], chunk['position']))
+        return selected, used
+
+    def select_context_many(self, rankings, token_budget=3000, top_k=None):
+        """Merge per-department rankings by reciprocal rank and fill one token budget
+
+        rankings maps department -> [(score, chunk)] from search(). Scores of
+        different departments are not comparable, so only ranks are used and
+        every department's best passage is considered before anyone's second.
+        Returns ([(department, chunk)], tokens used).
+        """
+        by_key = {
+            (department, chunk['id']): (department, chunk)
+            for department, ranking in rankings.items() for _, chunk in ranking
+        }
+        fused = reciprocal_rank_fusion(
+            [[(score, (department, chunk['id'])) for score, chunk in ranking] for department, ranking in rankings.items()],
+            top_k=top_k
+        )
+
+        selected, used = [], 0
+        for _, key in fused:
+            department, chunk = by_key[key]
+            if used + chunk['tokens'] > token_budget:
+                continue
+            selected.append((department, chunk))
+            used += chunk['tokens']
+
+        order = list(rankings)
+        selected.sort(key=lambda item: (order.index(item[0]), item[1]['order'], item[1]['report'], item[1]['position']))
+        return selected, used
+
+    def format_context(self, chunks):
+        """Render selected passages for the prompt"""
+        return '\n'.join(f"\n--- {chunk['report']} (passage {chunk['position'] + 1}) ---\n{chunk['text']}" for chunk in chunks)
+
+    def format_context_many(self, selected):
+        """Render (department, chunk) passages, labelling each with its department"""
+        return '\n'.join(
+            f"\n--- {department.upper()} / {chunk['report']} (passage {chunk['position'] + 1}) ---\n{chunk['text']}"
+            for department, chunk in selected
+        )
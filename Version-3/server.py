@@ -0,0 +1,220 @@
+# server.py
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from index import DepartmentAI
+
+
+class DepartmentServer:
+    """Long-lived HTTP/JSON front end around one warmed DepartmentAI
+
+    GET  /health       liveness plus sync and cache state
+    GET  /departments  departments that currently have reports
+    GET  /metrics      stage timings and cache counters as Prometheus text
+    POST /ask          {"department", "question", "stream"}; with
+                       "stream": true the answer is sent as Server-Sent Events
+    """
+
+    def __init__(self, ai, host='127.0.0.1', port=8080, max_concurrent_per_department=4):
+        self.ai = ai
+        self.started_at = time.time()
+        self.requests = 0
+        self.available_departments = []
+        self._lock = threading.Lock()
+        self._limits = {
+            department: threading.BoundedSemaphore(max_concurrent_per_department)
+            for department in ai.departments
+        }
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def warm_up(self, sync_interval=60, health_interval=None):
+        """Sync the Drive manifest, probe the Ollama backends and pre-build every department's indexes"""
+        print("🔥 Warming up department indexes...")
+        if self.ai.drive_sync is None:
+            self.ai.start_drive_sync(sync_interval)
+        self.ai.check_ollama_backends(health_interval)
+        self.available_departments = self.ai.get_available_departments()
+        for department in self.available_departments:
+            self.ai.ingest_department(department)
+        print(f"✅ Warm: {', '.join(self.available_departments) or 'no departments'}")
+
+    def serve_forever(self):
+        print(f"🌐 Serving on {self.url}")
+        self.httpd.serve_forever()
+
+    def start(self):
+        """Serve in a background thread and return the base URL"""
+        thread = threading.Thread(target=self.httpd.serve_forever, name='department-server', daemon=True)
+        thread.start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.ai.ollama_pool.stop_health_checks()
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'requests': self.requests,
+            'departments': self.available_departments,
+            'last_sync': self.ai.drive_sync.last_sync if self.ai.drive_sync else None,
+            'content_cache': self.ai.content_cache.stats(),
+            'answer_cache': self.ai.answer_cache.stats() if self.ai.answer_cache else None,
+            'ollama_backends': self.ai.ollama_pool.stats(),
+            'coalescing': self.ai.coalescing_stats()
+        }
+
+    def metrics(self):
+        """Prometheus text: the AI's span histograms plus request and cache gauges"""
+        lines = [self.ai.telemetry.prometheus_text().rstrip('\n')]
+        lines.append('# TYPE department_ai_http_requests_total counter')
+        lines.append(f'department_ai_http_requests_total {self.requests}')
+        caches = {'content': self.ai.content_cache.stats()}
+        if self.ai.answer_cache:
+            caches['answer'] = self.ai.answer_cache.stats()
+        for cache, stats in caches.items():
+            for key, value in stats.items():
+                lines.append(f'department_ai_cache_{key}{{cache="{cache}"}} {value}')
+        lines.append('# TYPE department_ai_backend_outstanding gauge')
+        lines.append('# TYPE department_ai_backend_healthy gauge')
+        for backend in self.ai.ollama_pool.stats():
+            labels = f'{{backend="{backend["host"]}",model="{backend["model"]}",tier="{backend["tier"]}"}}'
+            lines.append(f'department_ai_backend_outstanding{labels} {backend["outstanding"]}')
+            lines.append(f'department_ai_backend_healthy{labels} {int(backend["healthy"])}')
+        return '\n'.join(lines) + '\n'
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_event(self, event, payload):
+                self.wfile.write(f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode('utf-8'))
+                self.wfile.flush()
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                path = urlparse(self.path).path
+                if path == '/health':
+                    self._send_json(server.health())
+                elif path == '/departments':
+                    self._send_json({'departments': server.available_departments})
+                elif path == '/metrics':
+                    body = server.metrics().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                else:
+                    self._send_json({'error': f'Unknown path {path}'}, status=404)
+
+            def do_POST(self):
+                with server._lock:
+                    server.requests += 1
+                if urlparse(self.path).path != '/ask':
+                    self._send_json({'error': 'Unknown path'}, status=404)
+                    return
+
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                    if not isinstance(payload, dict):
+                        raise ValueError('the body is not a JSON object')
+                    department = payload['department']
+                    question = payload['question']
+                    if not isinstance(department, str) or not isinstance(question, str) or not question.strip():
+                        raise ValueError('department and question must be non-empty strings')
+                except (ValueError, KeyError) as e:
+                    self._send_json({'error': f'Expected JSON with department and question: {e}'}, status=400)
+                    return
+
+                if department not in server.ai.departments:
+                    self._send_json({'error': f'Unknown department {department}'}, status=404)
+                    return
+
+                with server._limits[department]:
+                    if payload.get('stream'):
+                        self._stream_answer(department, question)
+                    else:
+                        self._answer(department, question)
+
+            def _answer(self, department, question):
+                stats = {}
+                answer = ''.join(server.ai.stream_ollama(department, question, stats))
+                status = 500 if answer.startswith('Error') else 200
+                self._send_json({'department': department, 'answer': answer, 'stats': stats}, status=status)
+
+            def _stream_answer(self, department, question):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+
+                stats = {}
+                try:
+                    for token in server.ai.stream_ollama(department, question, stats):
+                        self._send_event('token', {'token': token})
+                    self._send_event('done', {'stats': stats})
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the department assistant over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--ollama-host', default=None)
+    parser.add_argument('--ollama-backend', action='append', default=None, metavar='HOST[=MODEL][*MAX][@TIER]',
+                        help='add an Ollama backend to the pool; repeat for several, tier is small or large')
+    parser.add_argument('--sync-interval', type=int, default=60)
+    parser.add_argument('--health-interval', type=float, default=15.0, help='seconds between Ollama backend probes')
+    parser.add_argument('--quiet', action='store_true', help='no per-file progress lines')
+    parser.add_argument('--telemetry-log', default=None, help='append one JSON line per timed span')
+    args = parser.parse_args()
+
+    ai = DepartmentAI(ollama_host=args.ollama_host, quiet=args.quiet, telemetry_log=args.telemetry_log,
+                      ollama_backends=args.ollama_backend)
+    if not ai.drive_service:
+        print("❌ Failed to initialize Google Drive service")
+        return
+
+    server = DepartmentServer(ai, host=args.host, port=args.port)
+    server.warm_up(args.sync_interval, args.health_interval)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
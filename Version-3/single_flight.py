@@ -0,0 +1,107 @@
+# single_flight.py
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one
+
+    The first caller for a key (the leader) runs the operation; callers
+    that arrive while it is still running share its result instead of
+    repeating the work. Nothing is kept once the operation finishes, so this
+    is deduplication of in-flight work, not a cache. A thread that asks for
+    a key it is itself running gets a call of its own rather than waiting
+    on itself; coroutines, which share their event loop's thread, pass
+    their task as the owner instead.
+    """
+
+    def __init__(self, name, telemetry=None):
+        self.name = name
+        self.telemetry = telemetry
+        self.leaders = 0
+        self.shared = 0
+        self._calls = {}          # key -> (shared object, leader thread id or task)
+        self._lock = threading.Lock()
+
+    def begin(self, key, factory=Future, owner=None):
+        """Return (shared object, is_leader); the leader must call end(key) when done"""
+        owner = threading.get_ident() if owner is None else owner
+        with self._lock:
+            entry = self._calls.get(key)
+            if entry is not None and entry[1] != owner:
+                self.shared += 1
+                shared, leader = entry[0], False
+            else:
+                self.leaders += 1
+                shared, leader = factory(), True
+                if entry is None:
+                    self._calls[key] = (shared, owner)
+        if not leader and self.telemetry is not None:
+            self.telemetry.count('coalesced_calls', kind=self.name)
+        return shared, leader
+
+    def end(self, key, shared):
+        with self._lock:
+            if self._calls.get(key, (None,))[0] is shared:
+                del self._calls[key]
+
+    def do(self, key, function, *args):
+        """Run function(*args), or wait for the identical call already running and return its result"""
+        future, leader = self.begin(key)
+        if not leader:
+            return future.result()
+        try:
+            result = function(*args)
+        except BaseException as e:
+            self.end(key, future)
+            future.set_exception(e)
+            raise
+        self.end(key, future)
+        future.set_result(result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'leaders': self.leaders, 'shared': self.shared, 'in_flight': len(self._calls)}
+
+
+class TokenBroadcast:
+    """Tokens of one streamed answer, replayed to every caller that shares it
+
+    The leader publishes tokens as it receives them; followers iterate and
+    block until the next token or the end of the stream. A stream that ends
+    without finish(complete=True) yields an error to the followers.
+    """
+
+    def __init__(self):
+        self.tokens = []
+        self.done = False
+        self.complete = False
+        self._condition = threading.Condition()
+
+    def publish(self, token):
+        with self._condition:
+            self.tokens.append(token)
+            self._condition.notify_all()
+
+    def finish(self, complete=True):
+        with self._condition:
+            self.done = True
+            self.complete = complete
+            self._condition.notify_all()
+
+    def __iter__(self):
+        position = 0
+        while True:
+            with self._condition:
+                while position == len(self.tokens) and not self.done:
+                    self._condition.wait()
+                pending = self.tokens[position:]
+                position += len(pending)
+                finished, complete = self.done, self.complete
+            for token in pending:
+                yield token
+            if finished and position == len(self.tokens):
+                if not complete:
+                    yield "Error: the shared answer was interrupted"
+                return
@@ -0,0 +1,222 @@
+# stub_ollama.py
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from retrieval import estimate_tokens
+from vector_store import HashingEmbedder
+
+
+class StubOllamaServer:
+    """Local stand-in for an Ollama server with a configurable generation speed
+
+    Implements /api/chat (streaming and not), /api/generate, /api/embed,
+    /api/embeddings, /api/tags and /api/version. Responses carry the same
+    timing fields as Ollama (prompt_eval_count, eval_count, ...), and
+    `parallel` limits how many requests are served at once, like
+    OLLAMA_NUM_PARALLEL. Each slot remembers its last prompt, and only the
+    part after the longest shared prefix is prefilled and counted in
+    prompt_eval_count, as with Ollama's prompt KV cache. Chat requests for
+    any model other than `model` get Ollama's 404 "model not found".
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, tokens_per_second=50.0, prefill_tokens_per_second=2000.0,
+                 answer_tokens=40, parallel=4, model='llama3.1:8b'):
+        self.tokens_per_second = tokens_per_second
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.answer_tokens = answer_tokens
+        self.model = model
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.stopped = False
+        self._slots = threading.Semaphore(parallel)
+        self._kv_prompts = [''] * parallel
+        self._lock = threading.Lock()
+        self._embedder = HashingEmbedder(dim=256)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Serve in a background thread and return the base URL"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-ollama', daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        # Kept-alive connections outlive shutdown(); the handlers drop them like a dead server would
+        self.stopped = True
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _reuse_prefix(self, prompt, keep_alive):
+        """Claim the slot sharing the longest prefix with prompt and return that prefix length"""
+        with self._lock:
+            shared = [len(os.path.commonprefix([cached, prompt])) for cached in self._kv_prompts]
+            slot = max(range(len(shared)), key=shared.__getitem__)
+            # keep_alive=0 unloads the model, and its cache with it, after the request
+            self._kv_prompts[slot] = '' if keep_alive in (0, '0', '0s') else prompt
+            return shared[slot]
+
+    def _answer_words(self, messages):
+        question = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+        words = [f'token{i}' for i in range(self.answer_tokens)]
+        words[:min(len(question.split()), 8)] = question.split()[:8]
+        return words
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_json(self):
+                length = int(self.headers.get('Content-Length', 0))
+                return json.loads(self.rfile.read(length) or b'{}')
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_GET(self):
+                if server.stopped:
+                    self.close_connection = True
+                    return
+                if self.path == '/api/tags':
+                    self._send_json({'models': [{'name': server.model, 'model': server.model}]})
+                elif self.path == '/api/version':
+                    self._send_json({'version': 'stub'})
+                else:
+                    self._send_json({'status': 'Ollama is running'})
+
+            def do_POST(self):
+                if server.stopped:
+                    self.close_connection = True
+                    return
+                payload = self._read_json()
+                if self.path in ('/api/embed', '/api/embeddings'):
+                    texts = payload.get('input', payload.get('prompt', ''))
+                    single = isinstance(texts, str)
+                    vectors = server._embedder.embed([texts] if single else texts)
+                    if self.path == '/api/embeddings':
+                        self._send_json({'embedding': vectors[0].tolist()})
+                    else:
+                        self._send_json({'model': payload.get('model'), 'embeddings': np.asarray(vectors).tolist()})
+                    return
+
+                if self.path not in ('/api/chat', '/api/generate'):
+                    self._send_json({'error': 'not found'}, status=404)
+                    return
+
+                # Like Ollama, refuse models that are not pulled on this server
+                if payload.get('model') not in (None, server.model):
+                    self._send_json({'error': f"model \"{payload['model']}\" not found, try pulling it first"}, status=404)
+                    return
+
+                messages = payload.get('messages') or [{'role': 'user', 'content': payload.get('prompt', '')}]
+                with server._slots:
+                    with server._lock:
+                        server.requests += 1
+                        server.active += 1
+                        server.max_active = max(server.max_active, server.active)
+                    try:
+                        self._generate(payload, messages)
+                    finally:
+                        with server._lock:
+                            server.active -= 1
+
+            def _generate(self, payload, messages):
+                started = time.perf_counter()
+                chat = self.path == '/api/chat'
+                model = payload.get('model', server.model)
+                prompt = ''.join(f"{m.get('role', '')}\n{m.get('content', '')}\n" for m in messages)
+                reused = server._reuse_prefix(prompt, payload.get('keep_alive'))
+                prompt_tokens = estimate_tokens(prompt[reused:])
+                prefill = prompt_tokens / server.prefill_tokens_per_second
+                time.sleep(prefill)
+                words = server._answer_words(messages)
+                delay = 1.0 / server.tokens_per_second
+
+                def piece(text, done, extra=None):
+                    item = {'model': model, 'created_at': '2024-01-01T00:00:00Z', 'done': done}
+                    if chat:
+                        item['message'] = {'role': 'assistant', 'content': text}
+                    else:
+                        item['response'] = text
+                    item.update(extra or {})
+                    return item
+
+                def final_stats():
+                    total = time.perf_counter() - started
+                    return {
+                        'done_reason': 'stop',
+                        'total_duration': int(total * 1e9),
+                        'load_duration': 0,
+                        'prompt_eval_count': prompt_tokens,
+                        'prompt_eval_duration': int(prefill * 1e9),
+                        'eval_count': len(words),
+                        'eval_duration': int(len(words) * delay * 1e9)
+                    }
+
+                if payload.get('stream', True):
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/x-ndjson')
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+                    for i, word in enumerate(words):
+                        time.sleep(delay)
+                        self._write_chunk(piece(word + ('' if i == len(words) - 1 else ' '), False))
+                    self._write_chunk(piece('', True, final_stats()))
+                    self.wfile.write(b'0\r\n\r\n')
+                    return
+
+                time.sleep(delay * len(words))
+                self._send_json(piece(' '.join(words), True, final_stats()))
+
+            def _write_chunk(self, item):
+                data = json.dumps(item).encode('utf-8') + b'\n'
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                self.wfile.flush()
+
+        return Handler
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a stub Ollama server')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--parallel', type=int, default=4)
+    parser.add_argument('--model', default='llama3.1:8b')
+    args = parser.parse_args()
+
+    stub = StubOllamaServer(port=args.port, tokens_per_second=args.tokens_per_second, parallel=args.parallel,
+                            model=args.model)
+    print(f"🧪 Stub Ollama listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
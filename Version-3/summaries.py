@@ -0,0 +1,285 @@
+# summaries.py
+import argparse
+import hashlib
+import sqlite3
+import threading
+import time
+from datetime import date
+
+from content_cache import report_version
+from retrieval import chunk_text, estimate_tokens
+
+# Levels from most to least detailed
+LEVELS = ('report', 'month', 'department')
+
+SUMMARY_PROMPT = (
+    "Summarize the following {what} for later question answering. Keep every number, date, metric name, "
+    "project and decision; drop filler. Use short bullet points.\n\n{text}"
+)
+
+
+def month_of(report_info):
+    """Group reports by the month of the week they cover, as 'YYYY-MM'
+
+    The week and year come from index_reports(); an ISO week belongs to the
+    month its Thursday falls in. Reports without a week number fall back to
+    the month they were last modified in.
+    """
+    week, year = report_info.get('week'), report_info.get('year')
+    if week is None or not year:
+        return report_info.get('modifiedTime', '')[:7] or 'undated'
+    try:
+        thursday = date.fromisocalendar(year, week, 4)
+    except ValueError:
+        # Week 53 of a year that has only 52, or a week number out of range
+        thursday = date.fromisocalendar(year, min(max(week, 1), 52), 4)
+    return f"{thursday.year:04d}-{thursday.month:02d}"
+
+
+def _fingerprint(parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part.encode('utf-8') + b'\n')
+    return digest.hexdigest()[:16]
+
+
+def _month_version(children):
+    """Version of a month summary built from [(report name, file id, report version)]"""
+    return _fingerprint(version for _, _, version in sorted(children))
+
+
+def _department_version(month_versions):
+    """Version of a department overview built from {month: month summary version}"""
+    return _fingerprint(f"{month}|{version}" for month, version in sorted(month_versions.items()))
+
+
+def expected_versions(weekly_reports):
+    """The month and department summary versions that cover exactly the current reports"""
+    months = {}
+    for report_name, report_info in weekly_reports.items():
+        months.setdefault(month_of(report_info), []).append((report_name, report_info['id'], report_version(report_info)))
+    month_versions = {month: _month_version(children) for month, children in months.items()}
+    return month_versions, _department_version(month_versions)
+
+
+class SummaryStore:
+    """Summaries per report, per month and per department, stored next to the content cache
+
+    Each row carries the version of what it summarises: the report version
+    for a report, and a fingerprint of the child summaries for a month or a
+    department, so a refresh only redoes what actually changed.
+    """
+
+    def __init__(self, path='department_cache.db'):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS summaries (
+                level TEXT NOT NULL,
+                department TEXT NOT NULL,
+                key TEXT NOT NULL,
+                version TEXT NOT NULL,
+                label TEXT,
+                content TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (level, department, key)
+            )"""
+        )
+        self._conn.commit()
+
+    def get(self, level, department, key):
+        """Return (version, label, content) or None"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT version, label, content FROM summaries WHERE level=? AND department=? AND key=?",
+                (level, department, key)
+            ).fetchone()
+
+    def put(self, level, department, key, version, label, content):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (level, department, key, version, label, content, tokens, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (level, department, key, version, label, content, estimate_tokens(content), time.time())
+            )
+            self._conn.commit()
+
+    def level(self, department, level):
+        """Return {key: (version, label, content, tokens)} for one level of a department"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, version, label, content, tokens FROM summaries WHERE level=? AND department=?",
+                (level, department)
+            ).fetchall()
+        return {key: (version, label, content, tokens) for key, version, label, content, tokens in rows}
+
+    def prune(self, level, department, keep):
+        """Delete rows of a level whose keys are no longer present"""
+        stale = [key for key in self.level(department, level) if key not in keep]
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM summaries WHERE level=? AND department=? AND key=?",
+                [(level, department, key) for key in stale]
+            )
+            self._conn.commit()
+        return len(stale)
+
+    def state(self, department):
+        """A string that changes whenever any summary of the department changes"""
+        with self._lock:
+            count, updated = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(MAX(updated), 0) FROM summaries WHERE department=?", (department,)
+            ).fetchone()
+        return f"{count}@{updated:.3f}"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Summarizer:
+    """Builds and refreshes the summary hierarchy of a department with map-reduce over the LLM
+
+    Text longer than `input_tokens` is split into chunks that are summarised
+    separately (map), then the partial summaries are summarised together
+    (reduce), so no single call exceeds the model's context window.
+    """
+
+    def __init__(self, ai, store, model=None, input_tokens=3000, summary_tokens=400):
+        self.ai = ai
+        self.store = store
+        self.model = model or ai.model
+        self.input_tokens = input_tokens
+        self.summary_tokens = summary_tokens
+
+    def _generate(self, what, text):
+        response = self.ai.ollama_client.chat(
+            model=self.model,
+            messages=[{'role': 'user', 'content': SUMMARY_PROMPT.format(what=what, text=text)}],
+            options={'num_predict': self.summary_tokens},
+            keep_alive=self.ai.keep_alive
+        )
+        return response['message']['content'].strip()
+
+    def summarize(self, what, text):
+        """Summarise text of any length by map-reduce"""
+        while estimate_tokens(text) > self.input_tokens:
+            parts = chunk_text(text, chunk_tokens=self.input_tokens, overlap_tokens=0)
+            text = '\n\n'.join(self._generate(f"part of {what}", part) for part in parts)
+        return self._generate(what, text)
+
+    def refresh_department(self, department):
+        """Bring a department's summaries up to date; return how many were regenerated per level"""
+        weekly_reports = self.ai.get_department_reports(department)
+        if weekly_reports is None:
+            return f"Could not find folder for {department} department"
+
+        counts = dict.fromkeys(LEVELS, 0)
+        months = {}
+        for report_name, report_info in weekly_reports.items():
+            version = report_version(report_info)
+            months.setdefault(month_of(report_info), []).append((report_name, report_info['id']))
+            stored = self.store.get('report', department, report_info['id'])
+            if stored is not None and stored[0] == version:
+                continue
+            content = self.ai.get_report_content(report_info)
+            if not content or content.startswith("Error"):
+                continue
+            self.store.put('report', department, report_info['id'], version, report_name,
+                           self.summarize(f"{department} report {report_name}", content))
+            counts['report'] += 1
+        self.store.prune('report', department, {report_info['id'] for report_info in weekly_reports.values()})
+
+        reports = self.store.level(department, 'report')
+        for month, members in months.items():
+            children = sorted((name, file_id, reports[file_id][0]) for name, file_id in members if file_id in reports)
+            version = _month_version(children)
+            stored = self.store.get('month', department, month)
+            if not children or (stored is not None and stored[0] == version):
+                continue
+            text = '\n\n'.join(f"{name}:\n{reports[file_id][2]}" for name, file_id, _ in children)
+            self.store.put('month', department, month, version, month,
+                           self.summarize(f"{department} reports for {month}", text))
+            counts['month'] += 1
+        self.store.prune('month', department, set(months))
+
+        month_rows = self.store.level(department, 'month')
+        version = _department_version({month: row[0] for month, row in month_rows.items()})
+        stored = self.store.get('department', department, department)
+        if month_rows and (stored is None or stored[0] != version):
+            text = '\n\n'.join(f"{month}:\n{row[2]}" for month, row in sorted(month_rows.items()))
+            self.store.put('department', department, department, version, department,
+                           self.summarize(f"{department} department reports", text))
+            counts['department'] += 1
+        return counts
+
+
+def best_fit(store, department, weekly_reports, full_text, token_budget):
+    """Return (level, text) for the most detailed representation that fits the budget
+
+    The raw reports are used when they fit. Otherwise report, month and
+    department summaries are tried in turn; a level is only used when it
+    covers every current report, i.e. its stored version matches the one
+    the current reports would give. If nothing fits, the up-to-date
+    department summary (or else the raw text) is cut to the budget and the
+    level is marked truncated.
+    """
+    if estimate_tokens(full_text) <= token_budget:
+        return 'raw', full_text
+
+    reports = store.level(department, 'report')
+    current = {report_info['id']: (report_name, report_version(report_info))
+               for report_name, report_info in weekly_reports.items()}
+    if all(file_id in reports and reports[file_id][0] == version for file_id, (_, version) in current.items()):
+        text = '\n'.join(
+            f"\n--- {name} (summary) ---\n{reports[file_id][2]}"
+            for file_id, (name, _) in current.items()
+        )
+        if estimate_tokens(text) <= token_budget:
+            return 'report', text
+
+    month_versions, department_version = expected_versions(weekly_reports)
+    months = store.level(department, 'month')
+    if month_versions and all(months.get(month, (None,))[0] == version for month, version in month_versions.items()):
+        text = '\n'.join(f"\n--- {month} (summary) ---\n{months[month][2]}" for month in sorted(month_versions))
+        if estimate_tokens(text) <= token_budget:
+            return 'month', text
+
+    overview = store.get('department', department, department)
+    if overview is not None and overview[0] != department_version:
+        print(f"⚠️ {department} overview summary does not cover the current reports - refresh summaries")
+        overview = None
+    text = f"\n--- {department} overview (summary) ---\n{overview[2]}" if overview else full_text
+    if estimate_tokens(text) <= token_budget:
+        return 'department', text
+    return 'truncated', text[:token_budget * 4]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or refresh report summaries offline')
+    parser.add_argument('departments', nargs='*', help='departments to refresh (default: all)')
+    parser.add_argument('--ollama-host', default=None)
+    parser.add_argument('--model', default=None, help='summarisation model (default: the answer model)')
+    args = parser.parse_args()
+
+    from index import DepartmentAI
+
+    ai = DepartmentAI(ollama_host=args.ollama_host, quiet=True)
+    if not ai.drive_service:
+        print("❌ Failed to initialize Google Drive service")
+        return
+
+    summarizer = Summarizer(ai, ai.summary_store, model=args.model)
+    for department in args.departments or ai.departments:
+        started = time.perf_counter()
+        counts = summarizer.refresh_department(department)
+        if isinstance(counts, str):
+            print(f"❌ {counts}")
+            continue
+        print(f"🗂️ {department}: {counts['report']} report, {counts['month']} month and "
+              f"{counts['department']} department summaries refreshed in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
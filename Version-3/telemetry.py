@@ -0,0 +1,120 @@
+# telemetry.py
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from cache hits to a slow generation
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+
+class Telemetry:
+    """Timing spans and counters for the query hot path
+
+    Every span is aggregated into a per-(name, labels) histogram that can be
+    rendered as Prometheus text, and - when `log_path` is set - written as
+    one JSON line with its attributes. Labels should have few values (stage,
+    department, mime type); per-file details belong in attributes.
+    """
+
+    def __init__(self, log_path=None):
+        self.log_path = log_path
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._log = open(log_path, 'a', encoding='utf-8') if log_path else None
+
+    def _key(self, name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time a block; the yielded dict collects attributes for the JSON log"""
+        attributes = {}
+        started = time.perf_counter()
+        try:
+            yield attributes
+        except Exception as e:
+            attributes['error'] = str(e)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, attributes, **labels)
+
+    def observe(self, name, seconds, attributes=None, **labels):
+        """Record a duration measured elsewhere, such as Ollama's eval_duration"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._histograms.setdefault(key, _Histogram()).observe(seconds)
+            if self._log is not None:
+                record = {'ts': time.time(), 'span': name, 'seconds': round(seconds, 6), 'thread': threading.current_thread().name}
+                record.update(labels)
+                record.update(attributes or {})
+                self._log.write(json.dumps(record, default=str) + '\n')
+                self._log.flush()
+
+    def count(self, name, value=1, **labels):
+        """Add to a counter, such as tokens generated"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        """Return {span: {labels: {count, sum}}} and counters as plain data"""
+        with self._lock:
+            spans = {}
+            for (name, labels), histogram in self._histograms.items():
+                spans.setdefault(name, []).append(
+                    {'labels': dict(labels), 'count': histogram.count, 'seconds': round(histogram.sum, 6)}
+                )
+            counters = {}
+            for (name, labels), value in self._counters.items():
+                counters.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+        return {'spans': spans, 'counters': counters}
+
+    def prometheus_text(self, prefix='department_ai'):
+        """Render histograms and counters in the Prometheus text exposition format"""
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{key}="{value}"' for key, value in pairs) + '}'
+
+        lines = [f'# TYPE {prefix}_span_seconds histogram']
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                labels = (('span', name),) + labels
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_span_seconds_bucket{label_text(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{prefix}_span_seconds_bucket{label_text(labels, [("le", "+Inf")])} {histogram.count}')
+                lines.append(f'{prefix}_span_seconds_sum{label_text(labels)} {histogram.sum:.6f}')
+                lines.append(f'{prefix}_span_seconds_count{label_text(labels)} {histogram.count}')
+
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append(f'# TYPE {prefix}_{name}_total counter')
+                for (counter, labels), value in sorted(self._counters.items()):
+                    if counter == name:
+                        lines.append(f'{prefix}_{name}_total{label_text(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# The modules of Version-3 import each other by name, as when run from that directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
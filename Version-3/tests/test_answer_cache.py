@@ -0,0 +1,55 @@
+# test_answer_cache.py
+from answer_cache import AnswerCache, normalize_question
+
+
+def test_rewordings_share_a_key():
+    assert normalize_question("What's the Q3 budget?") == normalize_question('q3 budget')
+
+
+def test_exact_and_reworded_hits():
+    cache = AnswerCache()
+    cache.put('finance', 'v1', 'What is the total revenue?', '$8.45M')
+    assert cache.get('finance', 'v1', 'total revenue') == '$8.45M'
+    assert cache.get('IT', 'v1', 'total revenue') is None
+    assert cache.stats()['hits'] == 1
+
+
+def test_different_numbers_never_match():
+    cache = AnswerCache(threshold=0.0)
+    cache.put('finance', 'v1', 'Q3 budget', 'Q3 answer')
+    assert cache.get('finance', 'v1', 'Q4 budget') is None
+
+
+def test_new_corpus_version_invalidates_the_department():
+    cache = AnswerCache()
+    cache.put('finance', 'v1', 'total revenue', 'old')
+    cache.put('IT', 'v1', 'server uptime', '99.9%')
+    assert cache.get('finance', 'v2', 'total revenue') is None
+    assert cache.stats()['invalidations'] == 1
+    assert cache.get('IT', 'v1', 'server uptime') == '99.9%'
+    # Going back to the old version does not resurrect its answers
+    assert cache.get('finance', 'v1', 'total revenue') is None
+
+
+def test_explicit_invalidation():
+    cache = AnswerCache()
+    cache.put('finance', 'v1', 'total revenue', 'a')
+    cache.put('IT', 'v1', 'server uptime', 'b')
+    cache.invalidate('finance')
+    assert cache.get('finance', 'v1', 'total revenue') is None
+    assert cache.get('IT', 'v1', 'server uptime') == 'b'
+    cache.invalidate()
+    assert cache.stats()['entries'] == 0
+
+
+def test_expired_and_evicted_entries():
+    cache = AnswerCache(ttl=-1)
+    cache.put('finance', 'v1', 'total revenue', 'a')
+    assert cache.get('finance', 'v1', 'total revenue') is None
+
+    cache = AnswerCache(max_entries=2)
+    for week in (1, 2, 3):
+        cache.put('finance', 'v1', f'revenue week {week}', str(week))
+    assert cache.get('finance', 'v1', 'revenue week 1') is None
+    assert cache.get('finance', 'v1', 'revenue week 3') == '3'
+    assert cache.stats()['evictions'] == 1
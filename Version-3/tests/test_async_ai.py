@@ -0,0 +1,71 @@
+# test_async_ai.py
+import asyncio
+
+import pytest
+
+from async_ai import AsyncDepartmentAI
+from fake_drive import build_synthetic_drive
+from index import DepartmentAI
+from stub_ollama import StubOllamaServer
+
+
+@pytest.fixture
+def stub():
+    stub = StubOllamaServer(tokens_per_second=200, answer_tokens=20)
+    stub.start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def ai(stub):
+    return DepartmentAI(drive_service=build_synthetic_drive(reports_per_department=3), ollama_host=stub.url,
+                        manifest_path=None, cache_path=':memory:', vector_store_dir=None, embedding_model=None,
+                        quiet=True, answer_cache_size=0)
+
+
+def test_identical_async_questions_make_one_llm_call(ai, stub):
+    front = AsyncDepartmentAI(ai)
+    try:
+        answers = asyncio.run(front.ask_many([('IT', 'What was the uptime?')] * 6))
+    finally:
+        front.close()
+    assert len(set(answers)) == 1 and not answers[0].startswith('Error')
+    assert stub.requests == 1
+    assert ai.question_flight.stats() == {'leaders': 1, 'shared': 5, 'in_flight': 0}
+
+
+def test_identical_async_streams_make_one_llm_call(ai, stub):
+    front = AsyncDepartmentAI(ai)
+
+    async def stream(stats):
+        return ''.join([token async for token in front.stream_ollama('IT', 'What was the uptime?', stats)])
+
+    async def main():
+        return await asyncio.gather(*(stream(stats) for stats in runs))
+
+    runs = [{} for _ in range(4)]
+    try:
+        answers = asyncio.run(main())
+    finally:
+        front.close()
+    assert len(set(answers)) == 1 and not answers[0].startswith('Error')
+    assert stub.requests == 1
+    assert sorted(stats['coalesced'] for stats in runs) == [False, True, True, True]
+    assert not any(stats.get('error') for stats in runs)
+
+
+def test_async_and_sync_callers_share_one_answer(ai, stub):
+    front = AsyncDepartmentAI(ai)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(front.query_ollama('IT', 'What was the uptime?'),
+                                    loop.run_in_executor(None, ai.query_ollama, 'IT', 'What was the uptime?'))
+
+    try:
+        first, second = asyncio.run(main())
+    finally:
+        front.close()
+    assert first == second
+    assert stub.requests == 1
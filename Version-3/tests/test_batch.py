@@ -0,0 +1,67 @@
+# test_batch.py
+import json
+
+import pytest
+
+from batch import completed_ids, read_questions, run_batch
+from fake_drive import build_synthetic_drive
+from index import DepartmentAI
+from stub_ollama import StubOllamaServer
+
+
+@pytest.fixture
+def ai():
+    stub = StubOllamaServer(tokens_per_second=2000, answer_tokens=5)
+    stub.start()
+    ai = DepartmentAI(drive_service=build_synthetic_drive(reports_per_department=3), ollama_host=stub.url,
+                      manifest_path=None, cache_path=':memory:', vector_store_dir=None, embedding_model=None,
+                      quiet=True, answer_cache_size=0)
+    yield ai
+    stub.stop()
+
+
+def read_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_questions(tmp_path):
+    path = tmp_path / 'questions.jsonl'
+    path.write_text('{"department": "IT", "question": "Uptime?"}\n\n'
+                    '{"department": "all", "question": "Highlights?", "id": 7}\n')
+    first, second = read_questions(str(path), ['IT', 'finance'])
+    assert first['department'] == 'IT' and len(first['id']) == 12
+    assert second == {'id': '7', 'department': ['IT', 'finance'], 'question': 'Highlights?'}
+    path.write_text('{"department": "legal", "question": "?"}\n')
+    with pytest.raises(ValueError):
+        read_questions(str(path), ['IT'])
+
+
+def test_answers_are_written_and_skipped_on_resume(ai, tmp_path):
+    output = str(tmp_path / 'answers.jsonl')
+    questions = [{'id': str(number), 'department': 'IT', 'question': f'What happened in week {number}?'}
+                 for number in (1, 2, 3)]
+    summary = run_batch(ai, questions, output, concurrency=2)
+    assert summary['IT']['answered'] == 3
+    assert completed_ids(output) == {'1', '2', '3'}
+    run_batch(ai, questions, output, concurrency=2)
+    assert len(read_results(output)) == 3
+
+
+def test_a_stream_that_breaks_midway_is_retried(ai, tmp_path, monkeypatch):
+    def broken_stream(messages, tier=None, **kwargs):
+        yield ai.ollama_pool.backends[0], {'message': {'content': 'Partial answer'}}
+        raise ConnectionError('backend went away')
+
+    monkeypatch.setattr(ai.ollama_pool, 'stream_chat', broken_stream)
+    output = str(tmp_path / 'answers.jsonl')
+    questions = [{'id': 'q1', 'department': 'IT', 'question': 'What happened in week 1?'}]
+    run_batch(ai, questions, output, concurrency=1)
+    result, = read_results(output)
+    assert result['answer'].startswith('Partial answer')
+    assert result['error'] and 'went away' in result['stats']['error']
+    assert completed_ids(output) == set()
+
+    monkeypatch.undo()
+    run_batch(ai, questions, output, concurrency=1)
+    assert completed_ids(output) == {'q1'}
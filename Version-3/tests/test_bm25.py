@@ -0,0 +1,63 @@
+# test_bm25.py
+import time
+
+from bm25 import BM25Index, analyze
+from retrieval import RetrievalIndex
+
+
+def test_analyze_splits_week_names_and_thousands():
+    assert analyze('Week-12 spend 45,000') == ['week-12', 'week', '12', 'spend', '45,000', '45000']
+
+
+def test_exact_numbers_rank_first():
+    index = BM25Index()
+    index.add_report('marketing', 'w11', 'Week-11 marketing spend was $38,500')
+    index.add_report('marketing', 'w12', 'Week-12 marketing spend was $45,000')
+    index.add_report('IT', 'i12', 'Week-12: 24 servers were patched')
+    assert index.search('marketing', 'what was week 12 marketing spend')[0][1] == 'w12'
+    assert index.search('marketing', 'spend of 45000')[0][1] == 'w12'
+    assert index.search('IT', 'marketing spend') == []
+    assert index.search('legal', 'spend') == []
+
+
+def test_updates_are_incremental():
+    index = BM25Index()
+    index.add_report('IT', 'w1', 'Two servers were patched')
+    index.add_report('IT', 'w2', 'The helpdesk closed 340 tickets')
+    index.add_report('IT', 'w1', 'Backups finished on time')
+    assert index.search('IT', 'servers patched') == []
+    assert [key for _, key in index.search('IT', 'backups tickets')] in (['w1', 'w2'], ['w2', 'w1'])
+    assert index.remove_file('IT', 'w2') == 1
+    assert index.search('IT', 'tickets') == []
+    assert index.remove_file('IT', 'missing') == 0
+
+
+def test_top_k_is_ordered_by_score():
+    index = BM25Index()
+    for n in range(20):
+        index.add_document('IT', f'f{n}', n, 'uptime ' * (n % 5 + 1) + 'filler ' * 10)
+    hits = index.search('IT', 'uptime', top_k=5)
+    assert len(hits) == 5
+    assert [score for score, _ in hits] == sorted((score for score, _ in hits), reverse=True)
+    assert all(key % 5 == 4 for _, key in hits[:4])
+
+
+def test_search_over_thousands_of_reports_is_fast():
+    index = BM25Index()
+    for n in range(3000):
+        index.add_report('IT', f'f{n}', f'Week-{n % 52 + 1} report {n}: {n * 7} tickets, {n % 40} servers, uptime 99.{n % 100}%')
+    index.search('IT', 'week 12 tickets servers uptime')
+    started = time.perf_counter()
+    for _ in range(10):
+        index.search('IT', 'week 12 tickets servers uptime')
+    assert (time.perf_counter() - started) / 10 < 0.05
+
+
+def test_retrieval_index_uses_bm25_for_lexical_search():
+    lexical = BM25Index()
+    index = RetrievalIndex(chunk_tokens=20, overlap_tokens=0, lexical_index=lexical)
+    index.add_report('marketing', 'Week-12', 'w12', 'v1', 'Week-12 marketing spend was $45,000\nLeads grew 8%')
+    (_, chunk), = index.lexical_search('marketing', '45000', top_k=3)
+    assert chunk['file_id'] == 'w12' and '45,000' in chunk['text']
+    index.remove_report('marketing', 'w12')
+    assert lexical.search('marketing', 'spend') == []
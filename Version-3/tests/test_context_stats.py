@@ -0,0 +1,41 @@
+# test_context_stats.py
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fake_drive import build_synthetic_drive
+from index import DepartmentAI
+from stub_ollama import StubOllamaServer
+
+
+@pytest.fixture
+def ai():
+    stub = StubOllamaServer(tokens_per_second=2000, answer_tokens=5)
+    stub.start()
+    ai = DepartmentAI(drive_service=build_synthetic_drive(reports_per_department=3, latency=0.01),
+                      ollama_host=stub.url, manifest_path=None, cache_path=':memory:', vector_store_dir=None,
+                      embedding_model=None, quiet=True, answer_cache_size=0)
+    yield ai
+    stub.stop()
+
+
+def test_build_messages_fills_the_callers_stats(ai):
+    context_stats = {}
+    messages = ai.build_messages(['IT', 'finance'], 'What happened in week 2?', context_stats)
+    assert 'RELEVANT REPORT PASSAGES' in messages[-1]['content']
+    assert set(context_stats['departments']) == {'IT', 'finance'}
+    assert context_stats['passages'] == sum(row['passages'] for row in context_stats['departments'].values())
+
+
+def test_concurrent_questions_keep_their_own_department_stats(ai):
+    questions = [(['IT', 'finance'] if number % 2 else ['IT', 'finance', 'marketing'], f'Open actions in week {number}?')
+                 for number in range(12)]
+
+    def ask(item):
+        stats = {}
+        ''.join(ai.stream_ollama(item[0], item[1], stats))
+        return item[0], stats
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        for departments, stats in pool.map(ask, questions):
+            assert set(stats['departments']) == set(departments)
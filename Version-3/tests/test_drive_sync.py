@@ -0,0 +1,96 @@
+# test_drive_sync.py
+from drive_sync import DriveSync
+from fake_drive import build_synthetic_drive
+
+TEXT = 'text/plain'
+
+
+def folder_id(drive, name):
+    return next(record['id'] for record in drive.files_by_id.values() if record['name'] == name)
+
+
+def names(sync, department):
+    return sorted(entry['name'] for entry in sync.get_department_files(department))
+
+
+def make_sync(tmp_path, departments=('finance', 'IT')):
+    drive = build_synthetic_drive(departments=('finance', 'IT'), reports_per_department=3)
+    sync = DriveSync(drive, list(departments), manifest_path=str(tmp_path / 'manifest.json'))
+    stats = sync.sync()
+    assert stats['full_scan']
+    return drive, sync
+
+
+def test_first_sync_lists_every_department(tmp_path):
+    drive, sync = make_sync(tmp_path)
+    assert set(sync.get_department_folders()) == {'finance', 'IT'}
+    assert len(sync.get_department_files('IT')) == 3
+
+
+def test_added_file_is_picked_up_from_changes(tmp_path):
+    drive, sync = make_sync(tmp_path)
+    drive.reset_calls()
+    drive.add_file('Week-4 IT report.txt', folder_id(drive, 'IT'), TEXT, 'Help Desk Tickets: 40')
+    stats = sync.sync()
+    assert not stats['full_scan'] and stats['changes_applied'] == 1
+    assert 'Week-4 IT report.txt' in names(sync, 'IT')
+    assert drive.calls['files.list'] == 0
+
+
+def test_modified_file_updates_its_version(tmp_path):
+    drive, sync = make_sync(tmp_path)
+    entry = next(entry for entry in sync.get_department_files('IT') if entry['name'].endswith('.txt'))
+    drive.update_file(entry['id'], content='Help Desk Tickets: 41', name='Week-1 IT report v2.txt')
+    sync.sync()
+    updated = next(item for item in sync.get_department_files('IT') if item['id'] == entry['id'])
+    assert updated['name'] == 'Week-1 IT report v2.txt'
+    assert updated['md5Checksum'] != entry['md5Checksum']
+
+
+def test_trashed_and_deleted_files_are_removed(tmp_path):
+    drive, sync = make_sync(tmp_path)
+    first, second = sync.get_department_files('finance')[:2]
+    drive.trash_file(first['id'])
+    drive.delete_file(second['id'])
+    stats = sync.sync()
+    assert stats['changes_applied'] == 2
+    remaining = {entry['id'] for entry in sync.get_department_files('finance')}
+    assert first['id'] not in remaining and second['id'] not in remaining
+
+
+def test_unsupported_and_foreign_files_are_ignored(tmp_path):
+    drive, sync = make_sync(tmp_path)
+    drive.add_file('diagram.png', folder_id(drive, 'IT'), 'image/png', b'png')
+    drive.add_file('Week-9 notes.txt', None, TEXT, 'not in a department')
+    stats = sync.sync()
+    assert stats['changes_applied'] == 0
+    assert len(sync.get_department_files('IT')) == 3
+
+
+def test_new_department_folder_triggers_a_full_scan(tmp_path):
+    drive, sync = make_sync(tmp_path, departments=('finance', 'IT', 'marketing'))
+    assert 'marketing' not in sync.get_department_folders()
+    marketing = drive.add_folder('marketing', folder_id(drive, 'Company Reports'))
+    drive.add_file('Week-1 marketing report.txt', marketing, TEXT, 'Leads Generated: 120')
+    stats = sync.sync()
+    assert stats['full_scan']
+    assert sync.get_department_folders()['marketing'] == marketing
+    assert names(sync, 'marketing') == ['Week-1 marketing report.txt']
+
+
+def test_trashed_department_folder_drops_its_files(tmp_path):
+    drive, sync = make_sync(tmp_path)
+    drive.trash_file(folder_id(drive, 'IT'))
+    sync.sync()
+    assert 'IT' not in sync.get_department_folders()
+    assert sync.get_department_files('IT') == []
+
+
+def test_manifest_survives_a_restart(tmp_path):
+    drive, sync = make_sync(tmp_path)
+    drive.reset_calls()
+    restarted = DriveSync(drive, ['finance', 'IT'], manifest_path=sync.manifest_path)
+    stats = restarted.sync()
+    assert not stats['full_scan']
+    assert names(restarted, 'IT') == names(sync, 'IT')
+    assert drive.calls['files.list'] == 0
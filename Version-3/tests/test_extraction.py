@@ -0,0 +1,69 @@
+# test_extraction.py
+import io
+import zipfile
+
+import pytest
+
+from content_cache import ContentCache
+from docx_text import extract_docx_text
+from fake_drive import W_NS, build_synthetic_drive, make_docx, make_text_pdf
+from index import DepartmentAI
+from pdf_text import PdfTextExtractor, get_extractor
+
+
+def test_docx_paragraphs_become_lines():
+    assert extract_docx_text(make_docx('Week 3 report\nRevenue: $5,000')) == 'Week 3 report\nRevenue: $5,000'
+
+
+def test_docx_tab_stops_are_not_text():
+    paragraph = ('<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr>'
+                 '<w:r><w:t>Revenue:</w:t><w:tab/><w:t>$5</w:t></w:r></w:p>')
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as docx:
+        docx.writestr('word/document.xml', f'<w:document xmlns:w="{W_NS}"><w:body>{paragraph}</w:body></w:document>')
+    assert extract_docx_text(buffer.getvalue()) == 'Revenue:\t$5'
+
+
+def test_docx_without_body_is_rejected():
+    with pytest.raises(Exception):
+        extract_docx_text(b'not a zip file')
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / 'report.pdf'
+    path.write_bytes(make_text_pdf(['Week 3 report\nRevenue: $5,000', 'Page two']))
+    return str(path)
+
+
+@pytest.mark.skipif(get_extractor() is None, reason='no PDF extractor installed')
+def test_pdf_pages_are_extracted_in_order(pdf_path):
+    extractor = PdfTextExtractor(workers=1)
+    pages = list(extractor.iter_pages(pdf_path))
+    assert [number for number, _ in pages] == [1, 2]
+    assert 'Revenue: $5,000' in pages[0][1]
+    assert extractor.extract_text(pdf_path).startswith('[Page 1]')
+
+
+@pytest.mark.skipif(get_extractor() is None, reason='no PDF extractor installed')
+def test_pdf_pages_come_from_the_page_cache(pdf_path):
+    cache = ContentCache(':memory:')
+    cache.put_pages('f1', 'v1', {0: 'cached one', 1: 'cached two'})
+    extractor = PdfTextExtractor(workers=1, page_cache=cache)
+    assert [text for _, text in extractor.iter_pages(pdf_path, 'f1', 'v1')] == ['cached one', 'cached two']
+    assert 'Revenue' in extractor.extract_text(pdf_path, 'f1', 'v2')
+    assert 'Revenue' in cache.get_pages('f1', 'v2')[0]
+
+
+@pytest.mark.skipif(get_extractor() is None, reason='no PDF extractor installed')
+def test_reports_in_every_format_are_read_from_drive():
+    drive = build_synthetic_drive(departments=('IT',), reports_per_department=4,
+                                  formats=('txt', 'gdoc', 'docx', 'pdf'))
+    ai = DepartmentAI(drive_service=drive, manifest_path=None, cache_path=':memory:', vector_store_dir=None,
+                      embedding_model=None, quiet=True, answer_cache_size=0, pdf_workers=1)
+    reports = ai.get_department_reports('IT')
+    assert len(reports) == 4
+    for report_info in reports.values():
+        content = ai.get_report_content(report_info)
+        assert f"WEEK {report_info['week']} REPORT" in content
+        assert 'Help Desk Tickets:' in content
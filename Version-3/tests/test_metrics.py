@@ -0,0 +1,118 @@
+# test_metrics.py
+import os
+
+import pytest
+
+from metrics import MetricStore, describe, parse_metrics, parse_value, question_operation
+
+VERSION_1 = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'Version-1')
+
+
+def read_report(name):
+    with open(os.path.join(VERSION_1, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def metrics_of(name):
+    return {metric: (value, unit) for metric, value, unit in parse_metrics(read_report(name))}
+
+
+def weekly_store(department, name, edits):
+    """A store holding one copy of a Version-1 report per week, with text replaced per week"""
+    store = MetricStore()
+    text = read_report(name)
+    for week, replacements in enumerate(edits, 1):
+        body = text
+        for old, new in replacements.items():
+            body = body.replace(old, new)
+        report_info = {'id': f'w{week}', 'name': f'Week-{week} report', 'week': week, 'year': 2024}
+        store.add_report(department, report_info, 1, body)
+    return store
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('$8,450,000 (15.2% increase from Q2)', (8450000.0, '$')),
+    ('2.5 million impressions', (2500000.0, 'impressions')),
+    ('4 minutes 25 seconds', (265.0, 'seconds')),
+    ('3.2 hours', (11520.0, 'seconds')),
+    ('85ms', (85.0, 'ms')),
+    ('99.98%', (99.98, '%')),
+    ('45,000 IOPS average', (45000.0, 'IOPS')),
+    ('68% peak', (68.0, '%')),
+    ('2.5 PB total (1.8 PB utilized)', (2.5, 'PB')),
+    ('450 average', None),
+    ('1,245 this quarter', None),
+    ('180 switches, 45 routers', None),
+    ('2 minor incidents (both resolved)', None),
+    ('2.8:1', None),
+])
+def test_parse_value(text, expected):
+    assert parse_value(text) == expected
+
+
+def test_finance_report_metrics():
+    metrics = metrics_of('finance.txt')
+    assert metrics['Total Revenue'] == (8450000.0, '$')
+    assert metrics['Gross Profit Margin'] == (42.3, '%')
+    assert 'Current Ratio' not in metrics
+    assert 'CFO' not in metrics
+
+
+def test_it_report_metrics():
+    metrics = metrics_of('IT.txt')
+    assert metrics['Average Resolution Time'] == (11520.0, 'seconds')
+    assert metrics['Microsoft 365'] == (450.0, 'licenses')
+    assert metrics['Storage I/O'] == (45000.0, 'IOPS')
+    assert metrics['Bandwidth Utilization'] == (68.0, '%')
+    assert metrics['Storage Capacity'] == (2.5, 'PB')
+    assert 'Network Devices' not in metrics
+    assert 'Phishing Attempts Blocked' not in metrics
+
+
+def test_campaign_metrics_are_named_after_their_campaign():
+    metrics = metrics_of('marketing.txt')
+    assert metrics['Digital Transformation 2024 Campaign Reach'] == (2500000.0, 'impressions')
+    assert metrics['Enterprise Solutions Campaign Reach'] == (1800000.0, 'impressions')
+    assert metrics['Average Time on Site'] == (265.0, 'seconds')
+    assert 'Reach' not in metrics
+
+
+def test_repeated_names_are_dropped_when_nesting_is_lost():
+    # Docx paragraphs carry no indentation, but the bullets still differ
+    flat = '• "A" Campaign:\n- Reach: 5 impressions\n• "B" Campaign:\n- Reach: 7 impressions\n'
+    assert list(parse_metrics(flat)) == [('A Campaign Reach', 5.0, 'impressions'),
+                                         ('B Campaign Reach', 7.0, 'impressions')]
+    repeated = 'Reach: 5 impressions\nReach: 7 impressions\nLeads: 9\n'
+    assert list(parse_metrics(repeated)) == [('Leads', 9.0, '')]
+
+
+def test_one_row_per_campaign_and_week():
+    store = weekly_store('marketing', 'marketing.txt', [{}, {'2.5 million': '2.7 million'}])
+    # "Reach" alone names no metric: both campaigns have one, so the question goes to the model
+    assert store.answer('marketing', 'How has reach changed over time?') is None
+    assert store.answer('marketing', 'What is the latest reach?') is None
+
+    result = store.answer('marketing', 'How has digital transformation 2024 campaign reach changed over time?')
+    assert result['first'] == 2500000 and result['last'] == 2700000
+    assert result['weeks'] == ['Week 1', 'Week 2']
+    result = store.answer('marketing', 'Latest enterprise solutions campaign reach?')
+    assert result['value'] == 1800000 and result['week'] == 'Week 2'
+    assert '(2 reports)' in describe(result)
+
+
+def test_aggregates_over_weeks():
+    store = weekly_store('finance', 'finance.txt', [
+        {}, {'$8,450,000': '$9,000,000'}, {'$8,450,000': '$8,000,000'}
+    ])
+    assert store.answer('finance', 'What is the average total revenue?')['value'] == pytest.approx(8483333.33, 0.01)
+    highest = store.answer('finance', 'Which week had the highest total revenue?')
+    assert (highest['value'], highest['week']) == (9000000, 'Week 2')
+    assert store.answer('finance', 'latest total revenue', file_ids={'w1', 'w2'})['value'] == 9000000
+
+
+def test_questions_that_need_reasoning_are_not_metric_lookups():
+    assert question_operation('Why is it taking so long to close the books now?') is None
+    assert question_operation('What is the latest total revenue?') == 'latest'
+    store = weekly_store('finance', 'finance.txt', [{}])
+    # Budget lines named after departments are never the subject of a question
+    assert store.answer('finance', 'What is the latest IT news?') is None
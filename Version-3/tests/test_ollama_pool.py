@@ -0,0 +1,107 @@
+# test_ollama_pool.py
+import time
+
+import pytest
+
+from ollama_pool import Backend, BackendPool, parse_backend, question_tier
+from stub_ollama import StubOllamaServer
+
+MESSAGES = [{'role': 'user', 'content': 'What is the total revenue?'}]
+
+
+@pytest.fixture
+def stubs():
+    servers = [StubOllamaServer(tokens_per_second=2000, answer_tokens=5) for _ in range(2)]
+    for server in servers:
+        server.start()
+    yield servers
+    for server in servers:
+        if not server.stopped:
+            server.stop()
+
+
+def test_parse_backend():
+    backend = parse_backend('http://gpu2:11434=llama3.2:3b*2@small')
+    assert (backend.host, backend.model, backend.max_concurrent, backend.tier) == \
+        ('http://gpu2:11434', 'llama3.2:3b', 2, 'small')
+    with pytest.raises(ValueError):
+        parse_backend('')
+
+
+def test_question_tier():
+    assert question_tier('Total revenue?') == 'small'
+    assert question_tier('Why did revenue drop?') == 'large'
+
+
+def test_requests_spread_over_backends(stubs):
+    pool = BackendPool([Backend(server.url, 'llama3.1:8b', 1) for server in stubs])
+    used = {pool.chat(MESSAGES)[0].host for _ in range(4)}
+    assert used == {server.url for server in stubs}
+
+
+def test_chat_fails_over_to_a_healthy_backend(stubs):
+    pool = BackendPool([Backend(server.url, 'llama3.1:8b') for server in stubs], health_interval=3600)
+    stubs[0].stop()
+    hosts = {pool.chat(MESSAGES)[0].host for _ in range(3)}
+    assert hosts == {stubs[1].url}
+    down = pool.backends[0]
+    assert not down.healthy and down.failures == 1
+    assert down.outstanding == 0
+
+
+def test_stream_fails_over_before_the_first_token(stubs):
+    pool = BackendPool([Backend(server.url, 'llama3.1:8b') for server in stubs], health_interval=3600)
+    stubs[0].stop()
+    parts = list(pool.stream_chat(MESSAGES))
+    assert parts and {backend.host for backend, _ in parts} == {stubs[1].url}
+    assert all(backend.outstanding == 0 for backend in pool.backends)
+
+
+def test_missing_model_counts_as_a_backend_failure(stubs):
+    pool = BackendPool([Backend(stubs[0].url, 'not-pulled'), Backend(stubs[1].url, 'llama3.1:8b')])
+    backend, response = pool.chat(MESSAGES)
+    assert backend.host == stubs[1].url
+    assert response['message']['content']
+
+
+def test_every_backend_down_raises(stubs):
+    pool = BackendPool([Backend(server.url, 'llama3.1:8b') for server in stubs])
+    for server in stubs:
+        server.stop()
+    with pytest.raises(ConnectionError):
+        pool.chat(MESSAGES)
+
+
+def test_health_check_and_recovery(stubs):
+    pool = BackendPool([Backend(server.url, 'llama3.1:8b') for server in stubs], health_interval=0)
+    port = stubs[0]._server.server_address[1]
+    stubs[0].stop()
+    assert pool.check_health() == {pool.backends[0].name: False, pool.backends[1].name: True}
+
+    # A backend that comes back is probed again once health_interval has passed
+    restarted = StubOllamaServer(port=port, tokens_per_second=2000, answer_tokens=5)
+    restarted.start()
+    try:
+        pool.chat(MESSAGES)
+        assert pool.backends[0].healthy
+    finally:
+        restarted.stop()
+
+
+def test_backends_are_probed_before_the_first_request(stubs):
+    pool = BackendPool([Backend(server.url, 'llama3.1:8b') for server in stubs] +
+                       [Backend(stubs[0].url, 'not-pulled')])
+    assert not any(backend['checked'] for backend in pool.stats())
+    try:
+        results = pool.start_health_checks(interval=0.05)
+        assert list(results.values()) == [True, True, False]
+        assert [backend['healthy'] for backend in pool.stats()] == [True, True, False]
+        assert all(backend['checked'] for backend in pool.stats())
+
+        stubs[1].stop()
+        deadline = time.monotonic() + 5
+        while pool.backends[1].healthy and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not pool.backends[1].healthy
+    finally:
+        pool.stop_health_checks()
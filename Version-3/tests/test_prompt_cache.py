@@ -0,0 +1,71 @@
+# test_prompt_cache.py
+import os
+
+import pytest
+
+from fake_drive import build_synthetic_drive
+from index import DepartmentAI
+from prompt_cache import PromptCache, corpus_version
+
+REPORTS = {'Week-1': {'id': 'w1', 'modifiedTime': '2025-01-03T10:00:00Z'},
+           'Week-2': {'id': 'w2', 'modifiedTime': '2025-01-10T10:00:00Z'}}
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / 'ai_prompt.txt'
+    path.write_text('You answer for {department}.\n{department_data}')
+    return path
+
+
+def test_corpus_version_follows_the_reports():
+    version = corpus_version(REPORTS)
+    assert corpus_version(dict(reversed(list(REPORTS.items())))) == version
+    changed = dict(REPORTS, **{'Week-2': {'id': 'w2', 'modifiedTime': '2025-01-11T09:00:00Z'}})
+    assert corpus_version(changed) != version
+    assert corpus_version({'Week-1': REPORTS['Week-1']}) != version
+
+
+def test_prompts_are_rendered_once_per_version(template):
+    cache = PromptCache(str(template))
+    renders = []
+
+    def render(text):
+        renders.append(text)
+        return text.replace('{department}', 'IT').replace('{department_data}', f'data {len(renders)}')
+
+    first = cache.get_or_render('IT', 'v1', 'catalog', render)
+    assert cache.get_or_render('IT', 'v1', 'catalog', render) == first
+    assert cache.get_or_render('IT', 'v2', 'catalog', render) == 'You answer for IT.\ndata 2'
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'entries': 1}
+
+    cache.invalidate('IT')
+    cache.get_or_render('IT', 'v2', 'catalog', render)
+    assert len(renders) == 3
+
+
+def test_errors_are_not_cached(template):
+    cache = PromptCache(str(template))
+    assert cache.get_or_render('IT', 'v1', 'full', lambda text: 'Error: no reports').startswith('Error')
+    assert cache.get_or_render('IT', 'v1', 'full', lambda text: 'ok') == 'ok'
+
+
+def test_template_is_reread_only_when_it_changes(template):
+    cache = PromptCache(str(template))
+    cache.get_or_render('IT', 'v1', 'catalog', lambda text: text)
+    stat = os.stat(template)
+    template.write_text('New template')
+    os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get_or_render('IT', 'v1', 'catalog', lambda text: text) == 'New template'
+
+
+def test_system_prompt_is_byte_identical_across_questions(template):
+    ai = DepartmentAI(drive_service=build_synthetic_drive(reports_per_department=3), prompt_path=str(template),
+                      manifest_path=None, cache_path=':memory:', vector_store_dir=None, embedding_model=None,
+                      quiet=True, answer_cache_size=0)
+    first = ai.build_messages('IT', 'What was the uptime?')
+    second = ai.build_messages('IT', 'How many tickets were closed?')
+    assert first[0] == second[0]
+    assert first[0]['content'].startswith('You answer for IT.')
+    assert 'RELEVANT REPORT PASSAGES' in second[1]['content']
+    assert ai.prompt_cache.stats()['hits'] >= 1
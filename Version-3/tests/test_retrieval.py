@@ -0,0 +1,93 @@
+# test_retrieval.py
+import pytest
+
+from retrieval import RetrievalIndex, chunk_text, estimate_tokens, reciprocal_rank_fusion, tokenize
+
+REPORT = '\n'.join(f"Line {n}: server {n} handled {n * 1000} requests" for n in range(60))
+
+
+def test_tokenize_keeps_numbers_and_week_names_whole():
+    assert tokenize('Week-12 spend was $45,000 at 99.95% uptime') == [
+        'week-12', 'spend', 'was', '45,000', 'at', '99.95', 'uptime']
+
+
+def test_chunks_fit_the_budget_and_overlap():
+    chunks = chunk_text(REPORT, chunk_tokens=60, overlap_tokens=15)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 60 for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous.splitlines()[-1] == current.splitlines()[0]
+    assert chunks[0].splitlines()[0] == 'Line 0: server 0 handled 0 requests'
+    assert chunks[-1].splitlines()[-1] == 'Line 59: server 59 handled 59000 requests'
+
+
+def test_long_lines_are_split_on_words():
+    chunks = chunk_text('word ' * 400, chunk_tokens=50, overlap_tokens=0)
+    assert len(chunks) > 1 and all(estimate_tokens(chunk) <= 50 for chunk in chunks)
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[(9, 'a'), (8, 'b')], [(0.9, 'b'), (0.8, 'c')]])
+    assert [key for _, key in fused] == ['b', 'a', 'c']
+    assert len(reciprocal_rank_fusion([[(1, 'a'), (1, 'b')]], top_k=1)) == 1
+
+
+@pytest.fixture
+def index():
+    index = RetrievalIndex(chunk_tokens=60, overlap_tokens=0)
+    index.add_report('IT', 'Week-1', 'w1', 'v1', "Uptime was 99.95% this week.\nTwo servers were patched.")
+    index.add_report('IT', 'Week-2', 'w2', 'v1', "The helpdesk closed 340 tickets.\nUptime was 99.2%.")
+    index.add_report('finance', 'Week-1', 'f1', 'v1', "Revenue was $1.2M.")
+    return index
+
+
+def test_search_finds_the_matching_passage(index):
+    (score, chunk), *_ = index.search('IT', 'How many tickets did the helpdesk close?')
+    assert chunk['report'] == 'Week-2' and '340 tickets' in chunk['text']
+    assert index.search('IT', 'revenue') == []
+
+
+def test_search_can_be_limited_to_files(index):
+    hits = index.search('IT', 'uptime', file_ids={'w1'})
+    assert [chunk['file_id'] for _, chunk in hits] == ['w1']
+
+
+def test_reports_are_replaced_and_removed(index):
+    assert index.has_report('IT', 'w1', 'v1') and not index.has_report('IT', 'w1', 'v2')
+    index.add_report('IT', 'Week-1', 'w1', 'v2', "Backups finished on time.")
+    assert index.search('IT', 'patched') == []
+    assert index.search('IT', 'backups')[0][1]['file_id'] == 'w1'
+
+    assert index.prune('IT', {'w1'}) == 1
+    assert index.report_ids('IT') == {'w1'}
+    assert index.remove_report('IT', 'w1') == 1
+    assert index.search('IT', 'backups') == []
+
+
+def test_select_context_respects_the_token_budget(index):
+    selected, used = index.select_context('IT', 'uptime helpdesk tickets servers', token_budget=15)
+    assert used <= 15 and used == sum(chunk['tokens'] for chunk in selected)
+    selected, used = index.select_context('IT', 'uptime helpdesk tickets servers', token_budget=1000)
+    assert [chunk['report'] for chunk in selected] == ['Week-1', 'Week-2']
+    assert '--- Week-1 (passage 1) ---' in index.format_context(selected)
+
+
+def test_select_context_many_takes_every_department_in_turn(index):
+    rankings = {department: index.search(department, 'uptime revenue') for department in ('IT', 'finance')}
+    selected, used = index.select_context_many(rankings, token_budget=1000)
+    assert [department for department, _ in selected] == ['IT', 'IT', 'finance']
+    assert '--- FINANCE / Week-1 (passage 1) ---' in index.format_context_many(selected)
+
+
+def test_passages_are_ordered_by_week_not_by_name():
+    index = RetrievalIndex(chunk_tokens=60, overlap_tokens=0)
+    for name, order in (('Week-10', (2025, 10)), ('Week-2', (2025, 2)), ('Week-52', (2024, 52))):
+        index.add_report('IT', name, name, 'v1', f"{name}: uptime was high", order)
+        index.add_report('finance', name, f"f-{name}", 'v1', f"{name}: uptime of billing", order)
+    selected, _ = index.select_context('IT', 'uptime', token_budget=1000)
+    assert [chunk['report'] for chunk in selected] == ['Week-52', 'Week-2', 'Week-10']
+
+    rankings = {department: index.search(department, 'uptime') for department in ('IT', 'finance')}
+    selected, _ = index.select_context_many(rankings, token_budget=1000)
+    assert [(department, chunk['report']) for department, chunk in selected] == [
+        (department, name) for department in ('IT', 'finance') for name in ('Week-52', 'Week-2', 'Week-10')]
@@ -0,0 +1,58 @@
+# test_server.py
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from fake_drive import build_synthetic_drive
+from index import DepartmentAI
+from server import DepartmentServer
+from stub_ollama import StubOllamaServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    stub = StubOllamaServer(tokens_per_second=2000, answer_tokens=5)
+    stub.start()
+    ai = DepartmentAI(drive_service=build_synthetic_drive(reports_per_department=2), ollama_host=stub.url,
+                      manifest_path=None, cache_path=':memory:', vector_store_dir=None, embedding_model=None,
+                      quiet=True, answer_cache_size=0)
+    server = DepartmentServer(ai, port=0)
+    server.start()
+    yield server
+    server.stop()
+    stub.stop()
+
+
+def post(server, body):
+    data = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+    request = urllib.request.Request(f'{server.url}/ask', data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_ask_answers_a_question(server):
+    status, body = post(server, {'department': 'IT', 'question': 'What was the uptime?'})
+    assert status == 200 and body['answer'] and 'total_seconds' in body['stats']
+
+
+@pytest.mark.parametrize('payload', [
+    b'not json',
+    b'[1, 2]',
+    b'"IT"',
+    {'department': 'IT'},
+    {'department': 'IT', 'question': 42},
+    {'department': 'IT', 'question': '   '},
+    {'department': ['IT'], 'question': 'Uptime?'},
+])
+def test_malformed_requests_get_400(server, payload):
+    status, body = post(server, payload)
+    assert status == 400 and body['error'].startswith('Expected JSON')
+
+
+def test_unknown_department_gets_404(server):
+    assert post(server, {'department': 'legal', 'question': 'Uptime?'})[0] == 404
@@ -0,0 +1,84 @@
+# test_single_flight.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from single_flight import SingleFlight, TokenBroadcast
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight('test')
+    calls = []
+    release = threading.Event()
+
+    def load(key):
+        calls.append(key)
+        release.wait(5)
+        return f'{key} loaded'
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(flight.do, 'IT', load, 'IT') for _ in range(4)]
+        while flight.stats()['shared'] < 3:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ['IT loaded'] * 4
+    assert calls == ['IT']
+    assert flight.stats() == {'leaders': 1, 'shared': 3, 'in_flight': 0}
+
+
+def test_finished_calls_are_not_cached():
+    flight = SingleFlight('test')
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    assert flight.stats()['leaders'] == 2
+
+
+def test_errors_reach_every_waiter_and_clear_the_key():
+    flight = SingleFlight('test')
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError('boom')
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, 'key', fail)
+        started.wait(5)
+        follower = pool.submit(flight.do, 'key', fail)
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.stats()['in_flight'] == 0
+    assert flight.do('key', lambda: 'ok') == 'ok'
+
+
+def test_reentrant_call_runs_instead_of_waiting_on_itself():
+    flight = SingleFlight('test')
+    assert flight.do('key', lambda: flight.do('key', lambda: 'inner')) == 'inner'
+
+
+def test_broadcast_replays_tokens_to_late_followers():
+    broadcast = TokenBroadcast()
+    broadcast.publish('Hello')
+    received = []
+    follower = threading.Thread(target=lambda: received.extend(broadcast))
+    follower.start()
+    broadcast.publish(' world')
+    broadcast.finish()
+    follower.join(5)
+    assert ''.join(received) == 'Hello world'
+    assert list(broadcast) == ['Hello', ' world']
+
+
+def test_broadcast_reports_an_interrupted_stream():
+    broadcast = TokenBroadcast()
+    broadcast.publish('Partial')
+    broadcast.finish(complete=False)
+    tokens = list(broadcast)
+    assert tokens[0] == 'Partial'
+    assert tokens[-1].startswith('Error')
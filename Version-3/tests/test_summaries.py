@@ -0,0 +1,49 @@
+# test_summaries.py
+from content_cache import report_version
+from summaries import SummaryStore, best_fit, expected_versions, month_of
+
+WEEK_1 = {'id': 'w1', 'week': 1, 'year': 2025, 'modifiedTime': '2025-01-03T10:00:00Z'}
+WEEK_2 = {'id': 'w2', 'week': 2, 'year': 2025, 'modifiedTime': '2025-01-10T10:00:00Z'}
+FULL_TEXT = 'numbers ' * 4000
+
+
+def summarised_store(weekly_reports):
+    """A store as refresh_department would leave it for these reports"""
+    store = SummaryStore(':memory:')
+    for name, info in weekly_reports.items():
+        store.put('report', 'IT', info['id'], report_version(info), name, f"Summary of {name} " + 'x ' * 600)
+    month_versions, department_version = expected_versions(weekly_reports)
+    for month, version in month_versions.items():
+        store.put('month', 'IT', month, version, month, f"Summary of {month} " + 'x ' * 600)
+    store.put('department', 'IT', 'IT', department_version, 'IT', 'Overview of week 1 only')
+    return store
+
+
+def test_month_of_uses_the_thursday_of_the_week():
+    assert month_of(WEEK_1) == '2025-01'
+    assert month_of({'week': 5, 'year': 2025}) == '2025-01'
+    assert month_of({'modifiedTime': '2024-06-30T00:00:00Z'}) == '2024-06'
+
+
+def test_overview_is_used_when_it_covers_the_reports():
+    store = summarised_store({'Week-1': WEEK_1})
+    assert best_fit(store, 'IT', {'Week-1': WEEK_1}, FULL_TEXT, 300) == (
+        'department', '\n--- IT overview (summary) ---\nOverview of week 1 only')
+
+
+def test_stale_overview_falls_back_to_truncated_text(capsys):
+    store = summarised_store({'Week-1': WEEK_1})
+    level, text = best_fit(store, 'IT', {'Week-1': WEEK_1, 'Week-2': WEEK_2}, FULL_TEXT, 300)
+    assert (level, text) == ('truncated', FULL_TEXT[:1200])
+    assert 'does not cover the current reports' in capsys.readouterr().out
+
+
+def test_stale_month_summaries_are_not_used():
+    store = summarised_store({'Week-1': WEEK_1})
+    reports = {'Week-1': WEEK_1, 'Week-2': WEEK_2}
+    store.put('report', 'IT', 'w2', report_version(WEEK_2), 'Week-2', 'Summary of Week-2 ' + 'x ' * 600)
+    level, _ = best_fit(store, 'IT', reports, FULL_TEXT, 500)
+    assert level == 'truncated'
+    month_versions, _ = expected_versions(reports)
+    store.put('month', 'IT', '2025-01', month_versions['2025-01'], '2025-01', 'January')
+    assert best_fit(store, 'IT', reports, FULL_TEXT, 500) == ('month', '\n--- 2025-01 (summary) ---\nJanuary')
@@ -0,0 +1,82 @@
+# test_vector_store.py
+import numpy as np
+import pytest
+
+from retrieval import RetrievalIndex
+from vector_store import HashingEmbedder, VectorStore
+
+CHUNKS = ["Uptime was 99.95% across all servers", "The helpdesk closed 340 tickets", "Revenue grew by 12%"]
+
+
+def test_hashing_embeddings_are_normalised_and_deterministic():
+    embedder = HashingEmbedder(dim=64)
+    vectors = embedder.embed(CHUNKS + [''])
+    assert vectors.shape == (4, 64) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0)
+    assert not vectors[3].any()
+    assert np.array_equal(vectors[:3], embedder.embed(CHUNKS))
+
+
+def test_search_returns_the_closest_chunk(tmp_path):
+    store = VectorStore(str(tmp_path), ['IT', 'finance'])
+    store.add_report('IT', 'w1', 'v1', 'Week-1', CHUNKS)
+    score, file_id, position = store.search('IT', 'how many helpdesk tickets were closed', top_k=1)[0]
+    assert (file_id, position) == ('w1', 1) and score > 0
+    assert store.search('finance', 'tickets') == []
+    with pytest.raises(KeyError):
+        store.search('legal', 'tickets')
+
+
+def test_batched_search_matches_single_searches(tmp_path):
+    store = VectorStore(str(tmp_path), ['IT'])
+    store.add_report('IT', 'w1', 'v1', 'Week-1', CHUNKS)
+    questions = ['uptime of servers', 'revenue growth']
+    assert store.search_many('IT', questions, top_k=2) == [store.search('IT', q, top_k=2) for q in questions]
+
+
+def test_replaced_and_removed_reports_leave_the_results(tmp_path):
+    store = VectorStore(str(tmp_path), ['IT'])
+    store.add_report('IT', 'w1', 'v1', 'Week-1', CHUNKS)
+    store.add_report('IT', 'w1', 'v2', 'Week-1', ['Backups finished on time'])
+    assert store.has_report('IT', 'w1', 'v2') and not store.has_report('IT', 'w1', 'v1')
+    assert [position for _, _, position in store.search('IT', 'tickets', top_k=5)] == [0]
+    assert store.remove_report('IT', 'w1') == 1
+    assert store.search('IT', 'backups') == [] and store.report_ids('IT') == set()
+
+
+def test_partitions_are_reloaded_from_disk(tmp_path):
+    store = VectorStore(str(tmp_path), ['IT'], chunking={'chunk_tokens': 300})
+    store.add_report('IT', 'w1', 'v1', 'Week-1', CHUNKS)
+    expected = store.search('IT', 'revenue')
+
+    reloaded = VectorStore(str(tmp_path), ['IT'], chunking={'chunk_tokens': 300})
+    assert reloaded.has_report('IT', 'w1', 'v1')
+    assert reloaded.search('IT', 'revenue') == expected
+
+    # Rows cut with other chunk sizes no longer line up with the chunks
+    rechunked = VectorStore(str(tmp_path), ['IT'], chunking={'chunk_tokens': 200})
+    assert rechunked.report_ids('IT') == set()
+
+
+def test_deleted_rows_are_compacted(tmp_path):
+    store = VectorStore(str(tmp_path), ['IT'], embedder=HashingEmbedder(dim=32))
+    for n in range(40):
+        store.add_report('IT', f'f{n}', 'v1', f'Week-{n}', [f'report {n} part {part}' for part in range(2)])
+    for n in range(30):
+        store.remove_report('IT', f'f{n}')
+    # Compacted once half of the 80 rows were dead; small partitions are left alone
+    partition = store.partition('IT')
+    assert partition.rows == 40 and int(partition.live[:partition.rows].sum()) == 20
+    assert all(partition.row_meta[row][0] == file_id
+               for file_id, entry in partition.files.items() for row in entry['rows'])
+    assert {file_id for _, file_id, _ in store.search('IT', 'report 35 part 1', top_k=20)} == {
+        f'f{n}' for n in range(30, 40)}
+
+
+def test_retrieval_fuses_lexical_and_vector_rankings(tmp_path):
+    index = RetrievalIndex(chunk_tokens=20, overlap_tokens=0, vector_store=VectorStore(str(tmp_path), ['IT']))
+    index.add_report('IT', 'Week-1', 'w1', 'v1', '\n'.join(CHUNKS))
+    assert index.vector_store.has_report('IT', 'w1', 'v1')
+    assert 'helpdesk' in index.search('IT', 'helpdesk tickets', top_k=1)[0][1]['text']
+    index.remove_report('IT', 'w1')
+    assert index.vector_store.report_ids('IT') == set()
@@ -0,0 +1,87 @@
+# test_weeks.py
+import pytest
+
+from weeks import WeekIndex, parse_period, report_order, report_week
+
+
+def reports(*names_and_times):
+    index = {}
+    for number, (name, modified) in enumerate(names_and_times):
+        week, year = report_week(name, modified)
+        index[name.split()[0]] = {'id': f'f{number}', 'name': name, 'modifiedTime': modified, 'week': week, 'year': year}
+    return index
+
+
+@pytest.fixture
+def year_end():
+    return WeekIndex(reports(
+        ('Week-2 Report', '2025-01-13T09:00:00Z'),
+        ('Week-51 Report', '2024-12-20T09:00:00Z'),
+        ('Week-1 Report', '2025-01-06T09:00:00Z'),
+        ('Week-52 Report', '2025-01-02T09:00:00Z'),
+        ('Notes', '2025-01-03T09:00:00Z'),
+    ))
+
+
+def test_report_week_years():
+    assert report_week('Week-52 Report', '2025-01-02T09:00:00Z') == (52, 2024)
+    assert report_week('Week-3 2023 Report', '2025-01-02T09:00:00Z') == (3, 2023)
+    assert report_week('Budget', '2025-01-02T09:00:00Z') == (None, None)
+
+
+def test_parse_period():
+    assert parse_period('What happened last week?')['last'] == 1
+    assert parse_period('Summarize the past three weeks')['last'] == 3
+    assert parse_period('Compare weeks 3 to 5')['weeks'] == [3, 4, 5]
+    assert parse_period('Q2 2024 revenue') == {'weeks': list(range(14, 27)), 'year': 2024, 'label': 'Q2 2024'}
+    assert parse_period('What is the total revenue?') is None
+
+
+def weeks_named(question):
+    period = parse_period(question)
+    return sorted(week for part in period.get('parts', [period]) for week in part['weeks'])
+
+
+def test_and_lists_weeks_instead_of_a_range():
+    assert weeks_named('Compare week 3 and week 10') == [3, 10]
+    assert weeks_named('weeks 2 and 12') == [2, 12]
+    assert weeks_named('weeks 2, 5 and 7') == [2, 5, 7]
+    assert weeks_named('week 3 and 2024') == [3]
+    assert parse_period('between week 3 and week 5')['weeks'] == [3, 4, 5]
+
+
+def test_every_period_in_a_question_is_kept():
+    assert parse_period('this week compared with last week')['last'] == 2
+    period = parse_period('Q3 vs Q4')
+    assert [part['label'] for part in period['parts']] == ['Q3', 'Q4']
+    period = parse_period('Q4 2024 vs Q1 2025')
+    assert [(part['label'], part['year']) for part in period['parts']] == [('Q4 2024', 2024), ('Q1 2025', 2025)]
+
+
+def test_latest_weeks_cross_the_year_boundary(year_end):
+    assert year_end.select(parse_period('latest week')) == ['Week-2']
+    assert year_end.select(parse_period('last 3 weeks')) == ['Week-52', 'Week-1', 'Week-2']
+    assert 'Notes' not in year_end.select(parse_period('last 10 weeks'))
+
+
+def test_week_numbers_use_the_latest_year_that_has_them(year_end):
+    assert year_end.select(parse_period('Week-1')) == ['Week-1']
+    assert year_end.select(parse_period('weeks 51 to 52')) == ['Week-51', 'Week-52']
+    assert year_end.select(parse_period('Week-1 2024')) == []
+    assert year_end.select(parse_period('Q4 2024')) == ['Week-51', 'Week-52']
+
+
+def test_several_periods_select_all_their_reports(year_end):
+    assert year_end.select(parse_period('Compare week 51 and week 2')) == ['Week-51', 'Week-2']
+    assert year_end.select(parse_period('week 52 of 2024 vs week 2 of 2025')) == ['Week-52', 'Week-2']
+    assert year_end.select(parse_period('Q4 2024 vs Q1 2025')) == ['Week-51', 'Week-52', 'Week-1', 'Week-2']
+    assert year_end.select(parse_period('this week compared with last week')) == ['Week-1', 'Week-2']
+
+
+def test_no_period_selects_nothing(year_end):
+    assert year_end.select(None) == []
+
+
+def test_report_order_follows_year_then_week():
+    reports = [{'week': 10, 'year': 2025}, {'week': 2, 'year': 2025}, {'week': 52, 'year': 2024}, {'week': None}]
+    assert [info.get('week') for info in sorted(reports, key=report_order)] == [None, 52, 2, 10]
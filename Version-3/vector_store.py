@@ -0,0 +1,290 @@
+# vector_store.py
+import json
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+import ollama
+
+from retrieval import tokenize
+
+
+class HashingEmbedder:
+    """Local fallback embedder: signed feature hashing of terms and bigrams"""
+
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f'hashing-{dim}'
+
+    def _features(self, text):
+        terms = tokenize(text)
+        return terms + [f'{a} {b}' for a, b in zip(terms, terms[1:])]
+
+    def embed(self, texts):
+        """Return an (n, dim) float32 matrix of L2-normalised vectors"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if not features:
+                continue
+            hashes = np.fromiter((zlib.crc32(f.encode('utf-8')) for f in features), dtype=np.uint64, count=len(features))
+            buckets = (hashes % self.dim).astype(np.int64)
+            signs = np.where((hashes >> np.uint64(31)) & np.uint64(1), -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], buckets, signs)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+class OllamaEmbedder:
+    """Embeds text through Ollama, falling back to hashing when no model is available"""
+
+    def __init__(self, model='nomic-embed-text', fallback=None, client=None):
+        self.model = model
+        self.client = client or ollama
+        self.fallback = fallback or HashingEmbedder()
+        self.available = None
+        self.name = f'ollama-{model}'
+
+    def _ollama_embed(self, texts):
+        if hasattr(self.client, 'embed'):
+            return self.client.embed(model=self.model, input=texts)['embeddings']
+        return [self.client.embeddings(model=self.model, prompt=text)['embedding'] for text in texts]
+
+    def probe(self):
+        """Check once whether the embedding model answers, and pick the backend"""
+        if self.available is None:
+            try:
+                self._ollama_embed(['probe'])
+                self.available = True
+            except Exception as e:
+                print(f"⚠️ Embedding model '{self.model}' unavailable ({e}), using local hashing embeddings")
+                self.available = False
+                self.name = self.fallback.name
+        return self.available
+
+    def embed(self, texts):
+        """Return an (n, dim) float32 matrix of L2-normalised vectors"""
+        if not self.probe():
+            return self.fallback.embed(texts)
+
+        matrix = np.asarray(self._ollama_embed(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+class VectorPartition:
+    """One department's vectors: a memory-mapped float32 matrix plus row metadata
+
+    The metadata records the embedder and the chunking parameters; a
+    partition saved with different ones is discarded and rebuilt, because
+    its rows no longer line up with the chunks of the retrieval index.
+    """
+
+    def __init__(self, directory, department, embedder_name, chunking=None):
+        safe_name = re.sub(r'[^A-Za-z0-9_-]', '_', department)
+        self.vectors_path = os.path.join(directory, f'{safe_name}.f32')
+        self.meta_path = os.path.join(directory, f'{safe_name}.json')
+        self.embedder_name = embedder_name
+        self.chunking = dict(chunking or {})
+        self.dim = None
+        self.capacity = 0
+        self.rows = 0
+        self.row_meta = []      # per row: [file_id, report, position] or None once deleted
+        self.files = {}         # file_id -> {'version': str, 'rows': [int]}
+        self.matrix = None
+        self.live = np.zeros(0, dtype=bool)
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.meta_path) or not os.path.exists(self.vectors_path):
+            return
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        if meta.get('embedder') != self.embedder_name:
+            return  # vectors from another model are not comparable
+        if meta.get('chunking', {}) != self.chunking:
+            return  # rows were cut with other chunk sizes
+
+        self.dim = meta['dim']
+        self.capacity = meta['capacity']
+        self.rows = meta['rows']
+        self.row_meta = meta['row_meta']
+        self.files = meta['files']
+        self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(self.capacity, self.dim))
+        self.live = np.array([entry is not None for entry in self.row_meta] + [False] * (self.capacity - self.rows), dtype=bool)
+
+    def _save(self):
+        if self.matrix is not None:
+            self.matrix.flush()
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'embedder': self.embedder_name,
+                'chunking': self.chunking,
+                'dim': self.dim,
+                'capacity': self.capacity,
+                'rows': self.rows,
+                'row_meta': self.row_meta,
+                'files': self.files
+            }, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _ensure_capacity(self, needed):
+        if self.rows + needed <= self.capacity:
+            return
+        new_capacity = max(64, self.capacity * 2, self.rows + needed)
+        if self.matrix is not None:
+            self.matrix.flush()
+            del self.matrix
+        with open(self.vectors_path, 'ab') as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(new_capacity, self.dim))
+        self.live = np.concatenate([self.live, np.zeros(new_capacity - self.capacity, dtype=bool)])
+        self.capacity = new_capacity
+
+    def has_file(self, file_id, version):
+        entry = self.files.get(file_id)
+        return entry is not None and entry['version'] == version
+
+    def add(self, file_id, version, report_name, vectors):
+        """Append a file's chunk vectors, replacing its previous version"""
+        self.remove(file_id, save=False)
+        if len(vectors):
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            self._ensure_capacity(len(vectors))
+            start = self.rows
+            self.matrix[start:start + len(vectors)] = vectors
+            self.live[start:start + len(vectors)] = True
+            self.row_meta.extend([file_id, report_name, position] for position in range(len(vectors)))
+            self.rows += len(vectors)
+            rows = list(range(start, start + len(vectors)))
+        else:
+            rows = []
+        self.files[file_id] = {'version': version, 'rows': rows}
+        self._maybe_compact()
+        self._save()
+
+    def remove(self, file_id, save=True):
+        """Mark a file's rows as deleted"""
+        entry = self.files.pop(file_id, None)
+        if entry is None:
+            return 0
+        for row in entry['rows']:
+            self.row_meta[row] = None
+            self.live[row] = False
+        if save:
+            self._maybe_compact()
+            self._save()
+        return len(entry['rows'])
+
+    def _maybe_compact(self):
+        """Rewrite the matrix without deleted rows once they make up half of it"""
+        dead = self.rows - int(self.live[:self.rows].sum())
+        if self.rows < 64 or dead * 2 < self.rows:
+            return
+        versions = {file_id: entry['version'] for file_id, entry in self.files.items()}
+        keep = np.flatnonzero(self.live[:self.rows])
+        self.matrix[:len(keep)] = self.matrix[keep]
+        self.row_meta = [self.row_meta[row] for row in keep]
+        self.rows = len(keep)
+        self.live[:] = False
+        self.live[:self.rows] = True
+        self.files = {file_id: {'version': version, 'rows': []} for file_id, version in versions.items()}
+        for row, (file_id, report_name, position) in enumerate(self.row_meta):
+            self.files[file_id]['rows'].append(row)
+
+    def search(self, query_vectors, top_k):
+        """Return per query a list of (score, row) using one matrix product"""
+        if self.matrix is None or not self.rows:
+            return [[] for _ in range(len(query_vectors))]
+
+        scores = query_vectors @ self.matrix[:self.rows].T
+        scores[:, ~self.live[:self.rows]] = -np.inf
+        k = min(top_k, int(self.live[:self.rows].sum()))
+        if k <= 0:
+            return [[] for _ in range(len(query_vectors))]
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for query_scores, rows in zip(scores, top):
+            rows = rows[np.argsort(-query_scores[rows])]
+            results.append([(float(query_scores[row]), int(row)) for row in rows])
+        return results
+
+
+class VectorStore:
+    """Per-department embedding store for report chunks
+
+    chunking holds the chunk parameters the vectors were built with, e.g.
+    {'chunk_tokens': 300, 'chunk_overlap': 50}; partitions saved with other
+    values are rebuilt.
+    """
+
+    def __init__(self, directory, departments, embedder=None, chunking=None):
+        self.directory = directory
+        self.departments = departments
+        self.embedder = embedder or HashingEmbedder()
+        self.chunking = chunking
+        self.partitions = {}
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+
+    def partition(self, department):
+        if department not in self.departments:
+            raise KeyError(f"Unknown department: {department}")
+        with self._lock:
+            if department not in self.partitions:
+                if isinstance(self.embedder, OllamaEmbedder):
+                    self.embedder.probe()
+                self.partitions[department] = VectorPartition(
+                    self.directory, department, self.embedder.name, self.chunking
+                )
+            return self.partitions[department]
+
+    def has_report(self, department, file_id, version):
+        with self._lock:
+            return self.partition(department).has_file(file_id, version)
+
+    def report_ids(self, department):
+        with self._lock:
+            return set(self.partition(department).files)
+
+    def embed_chunks(self, chunk_texts):
+        """Embed chunk texts without taking the store lock"""
+        return self.embedder.embed(chunk_texts) if chunk_texts else np.zeros((0, 0), dtype=np.float32)
+
+    def add_report(self, department, file_id, version, report_name, chunk_texts, vectors=None):
+        """Store a report's chunk vectors, embedding them first unless given, replacing the old version"""
+        if vectors is None:
+            vectors = self.embed_chunks(chunk_texts)
+        with self._lock:
+            partition = self.partition(department)
+            partition.add(file_id, version, report_name, vectors)
+
+    def remove_report(self, department, file_id):
+        with self._lock:
+            return self.partition(department).remove(file_id)
+
+    def search(self, department, question, top_k=8):
+        """Return [(score, file_id, position)] for the chunks closest to a question"""
+        return self.search_many(department, [question], top_k)[0]
+
+    def search_many(self, department, questions, top_k=8):
+        """Batched search: one matrix product for all questions"""
+        query_vectors = self.embedder.embed(questions)
+        with self._lock:
+            partition = self.partition(department)
+            results = partition.search(query_vectors, top_k)
+            return [
+                [(score, partition.row_meta[row][0], partition.row_meta[row][2]) for score, row in hits]
+                for hits in results
+            ]
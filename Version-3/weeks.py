@@ -0,0 +1,188 @@
+# weeks.py
+import bisect
+import re
+from collections import namedtuple
+
+WEEK_NAME = re.compile(r'Week[-\s]*(\d+)', re.IGNORECASE)
+YEAR = re.compile(r'\b(20\d{2})\b')
+WEEK_RANGE = re.compile(r'weeks?[-\s]*(\d+)\s*(?:-|–|to|through|until)\s*(?:weeks?[-\s]*)?(\d+)', re.IGNORECASE)
+BETWEEN_WEEKS = re.compile(r'between\s+weeks?[-\s]*(\d+)\s*and\s*(?:weeks?[-\s]*)?(\d+)', re.IGNORECASE)
+# "week 3 and week 10", "weeks 2, 5 and 12": the weeks named, not the ones between them
+WEEK_LIST = re.compile(r'weeks?[-\s]*\d+(?:\s*(?:,|and|&|or|vs\.?|versus)\s*(?:weeks?[-\s]*)?\d+\b)+', re.IGNORECASE)
+SINGLE_WEEK = re.compile(r'week[-\s]*(\d+)', re.IGNORECASE)
+LAST_WEEKS = re.compile(r'(?:last|past|previous|recent)\s+(\d+|[a-z]+)\s+weeks', re.IGNORECASE)
+LAST_WEEK = re.compile(r'\b(this|latest|last|previous|most recent)\s+week\b', re.IGNORECASE)
+QUARTER = re.compile(r'\b(?:q([1-4])|(first|second|third|fourth|1st|2nd|3rd|4th)\s+quarter)\b', re.IGNORECASE)
+YEAR_AFTER = re.compile(r'[\s,]*(?:of\s+|in\s+)?(20\d{2})\b')
+
+NUMBER_WORDS = {'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8,
+                'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12}
+QUARTER_WORDS = {'first': 1, '1st': 1, 'second': 2, '2nd': 2, 'third': 3, '3rd': 3, 'fourth': 4, '4th': 4}
+
+# One entry per report that has a week number, ordered by (year, week, modified)
+ReportWeek = namedtuple('ReportWeek', ['year', 'week', 'modified', 'key'])
+
+
+def quarter_weeks(quarter):
+    """Weeks 1-13 are Q1, 14-26 Q2, 27-39 Q3 and 40-53 Q4"""
+    first = (quarter - 1) * 13 + 1
+    return list(range(first, 54 if quarter == 4 else first + 13))
+
+
+def report_week(file_name, modified_time):
+    """Return (week, year) for a report name, or (None, None) when it has no week number
+
+    The year comes from the name when it carries one, otherwise from when
+    the file was last modified; a late-year week edited in the first months
+    of a year belongs to the year before.
+    """
+    match = WEEK_NAME.search(file_name)
+    if not match:
+        return None, None
+    week = int(match.group(1))
+    year = YEAR.search(file_name)
+    if year:
+        return week, int(year.group(1))
+    if len(modified_time) < 7:
+        return week, None
+    year, month = int(modified_time[:4]), int(modified_time[5:7])
+    if week >= 40 and month <= 3:
+        year -= 1
+    return week, year
+
+
+def report_order(report_info):
+    """Sort key that puts reports in time order: (year, week, modifiedTime), undated reports first"""
+    week = report_info.get('week')
+    return report_info.get('year') or 0, week if week is not None else 0, report_info.get('modifiedTime', '')
+
+
+def _period_year(question, match, years):
+    """The year written right after a period, else the only year in the question"""
+    after = YEAR_AFTER.match(question, match.end())
+    if after:
+        return int(after.group(1))
+    return years[0] if len(years) == 1 else None
+
+
+def parse_period(question):
+    """Find the time periods in a question
+
+    Returns None, or a dict with either 'last' (a number of most recent
+    weeks) or 'weeks' (week numbers, from "Week-12", "weeks 3 to 5" or a
+    quarter), an optional 'year' and a 'label' for progress messages. A
+    question naming several periods ("Q3 vs Q4", "week 3 and week 10",
+    "this week compared with last week") gets them all: two latest-week
+    phrases become the last 2 weeks, and anything else is returned as
+    'parts', a list of such dicts, which WeekIndex.select() merges.
+    """
+    years = sorted({int(year) for year in YEAR.findall(question)})
+    year = years[0] if years else None
+    parts, taken = [], []
+
+    def matches(pattern):
+        for match in pattern.finditer(question):
+            if all(match.end() <= start or match.start() >= end for start, end in taken):
+                taken.append(match.span())
+                yield match
+
+    for match in matches(LAST_WEEKS):
+        count = match.group(1).lower()
+        count = int(count) if count.isdigit() else NUMBER_WORDS.get(count)
+        if count:
+            parts.append({'last': count, 'year': year, 'label': f"last {count} weeks"})
+    # "this week" and "last week" in one question are two different weeks
+    latest = {'last' if match.group(1).lower() in ('last', 'previous') else 'this' for match in matches(LAST_WEEK)}
+    if latest:
+        count = len(latest)
+        parts.append({'last': count, 'year': year, 'label': "latest week" if count == 1 else f"last {count} weeks"})
+
+    for match in matches(QUARTER):
+        number = int(match.group(1)) if match.group(1) else QUARTER_WORDS[match.group(2).lower()]
+        quarter_year = _period_year(question, match, years)
+        parts.append({'weeks': quarter_weeks(number), 'year': quarter_year,
+                      'label': f"Q{number}" + (f" {quarter_year}" if quarter_year else '')})
+
+    for pattern in (BETWEEN_WEEKS, WEEK_RANGE):
+        for match in matches(pattern):
+            first, last = sorted(int(value) for value in match.groups())
+            parts.append({'weeks': list(range(first, last + 1)), 'year': _period_year(question, match, years),
+                          'label': f"weeks {first}-{last}"})
+    for match in matches(WEEK_LIST):
+        # Each listed week is its own period, so "week 51 and week 2" can span a new year;
+        # a year after "and" is not a week: "week 3 and 2024" lists one week
+        list_year = _period_year(question, match, years)
+        for week in sorted({int(value) for value in re.findall(r'\d+', match.group(0)) if int(value) <= 53}):
+            parts.append({'weeks': [week], 'year': list_year, 'label': f"Week-{week}"})
+    singles = {}
+    for match in matches(SINGLE_WEEK):
+        singles.setdefault(_period_year(question, match, years), set()).add(int(match.group(1)))
+    for single_year, weeks in singles.items():
+        weeks = sorted(weeks)
+        parts.append({'weeks': weeks, 'year': single_year, 'label': ', '.join(f"Week-{week}" for week in weeks)})
+
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return {'parts': parts, 'year': year, 'label': ' and '.join(part['label'] for part in parts)}
+
+
+class WeekIndex:
+    """Sorted index of a department's reports by year, week and modifiedTime
+
+    Built from the reports dict of index_reports(); reports without a week
+    number are kept out of the index and are never selected by a period.
+    """
+
+    def __init__(self, weekly_reports):
+        self.entries = sorted(
+            ReportWeek(report_info['year'] or 0, report_info['week'], report_info.get('modifiedTime', ''), key)
+            for key, report_info in weekly_reports.items()
+            if report_info.get('week') is not None
+        )
+        self._positions = [(entry.year, entry.week) for entry in self.entries]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def years(self):
+        return sorted({entry.year for entry in self.entries})
+
+    def latest(self, count, year=None):
+        """Keys of the reports of the `count` most recent weeks"""
+        entries = [entry for entry in self.entries if year is None or entry.year == year]
+        weeks = sorted({(entry.year, entry.week) for entry in entries})[-count:]
+        return [entry.key for entry in entries if (entry.year, entry.week) in weeks]
+
+    def weeks(self, numbers, year=None):
+        """Keys of the reports for the given week numbers, in the given year or the latest year that has any"""
+        if year is None:
+            years = [candidate for candidate in self.years()
+                     if any(self._has(candidate, week) for week in numbers)]
+            if not years:
+                return []
+            year = years[-1]
+        keys = []
+        for week in sorted(numbers):
+            start = bisect.bisect_left(self._positions, (year, week))
+            end = bisect.bisect_right(self._positions, (year, week))
+            keys.extend(entry.key for entry in self.entries[start:end])
+        return keys
+
+    def _has(self, year, week):
+        position = bisect.bisect_left(self._positions, (year, week))
+        return position < len(self._positions) and self._positions[position] == (year, week)
+
+    def select(self, period):
+        """Report keys matching a period from parse_period(), oldest first"""
+        if period is None:
+            return []
+        if 'parts' in period:
+            keys = set()
+            for part in period['parts']:
+                keys.update(self.select(part))
+            return [entry.key for entry in self.entries if entry.key in keys]
+        if 'last' in period:
+            return self.latest(period['last'], period.get('year'))
+        return self.weeks(period['weeks'], period.get('year'))